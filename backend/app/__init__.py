@@ -1,19 +1,44 @@
 """
 Acoustic Player Application Package
 This package contains the main modules for the music player app.
+
+The exports below are imported on first access rather than with the package:
+importing any submodule runs this file, and the API and WebSocket layers
+create the player, the database session and other singletons when imported.
+Analysis worker processes import single modules and must not pay for that.
 """
+import importlib
 
-# Export core classes for easier imports
-from .models.player import MusicPlayer
-from .models.playlist import PlaylistManager
-from .models.metadata import MetadataManager
-from .models.library import LibraryManager
+_EXPORTS = {
+    # Core classes
+    'MusicPlayer': '.models.player',
+    'PlaylistManager': '.models.playlist',
+    'MetadataManager': '.models.metadata',
+    'LibraryManager': '.models.library',
+    # API endpoints
+    'player_api': '.api',
+    'library_api': '.api',
+    'playlist_api': '.api',
+    'lyrics_api': '.api',
+    'visualizer_api': '.api',
+    'changes_api': '.api',
+    # WebSocket functionality
+    'socketio': '.ws',
+    'emit_player_status': '.ws',
+    'emit_library_update': '.ws',
+    'emit_playlist_changed': '.ws',
+    'player_clock': '.ws',
+    # Lyrics functionality
+    'get_lyrics_for_track': '.lyrics',
+    'LyricsManager': '.lyrics',
+}
 
-# Make API endpoints available
-from .api import player_api, library_api, playlist_api, lyrics_api
+__all__ = list(_EXPORTS)
 
-# Make WebSocket functionality available
-from .ws import socketio, emit_player_status, emit_library_update, emit_playlist_changed
 
-# Make lyrics functionality available
-from .lyrics import get_lyrics_for_track, LyricsManager
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
@@ -7,6 +7,8 @@ from .player_endpoints import player_api
 from .library_endpoints import library_api
 from .playlist_endpoints import playlist_api
 from .lyrics_endpoints import lyrics_api
+from .visualizer_endpoints import visualizer_api
+from .changes_endpoints import changes_api
 from .serializers import (
     player_status_schema,
     track_schema,
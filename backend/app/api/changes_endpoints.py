@@ -0,0 +1,52 @@
+"""
+Change Feed API Endpoints
+This module defines the API route for delta sync of tracks and playlists.
+"""
+from flask import Blueprint, Response, request, jsonify
+from config import settings
+from ..models.changes import change_log
+from .encoders import negotiate
+
+# Create Blueprint
+changes_api = Blueprint('changes_api', __name__)
+
+
+def _int_arg(name: str, default: int) -> int:
+    """
+    Read an integer query argument.
+
+    Raises:
+        ValueError: If the argument is given but is not an integer
+    """
+    value = request.args.get(name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer")
+
+
+@changes_api.route('', methods=['GET'])
+def get_changes():
+    """Get track and playlist changes after a version (JSON, MessagePack or CBOR)."""
+    try:
+        # A malformed version must not silently turn into a full resync
+        since = _int_arg('since', 0)
+        limit = _int_arg('limit', settings.CHANGE_FEED_PAGE_SIZE)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if since < 0:
+        return jsonify({'error': 'since must not be negative'}), 400
+    if not 1 <= limit <= settings.CHANGE_FEED_PAGE_SIZE:
+        return jsonify({'error': f'limit must be between 1 and {settings.CHANGE_FEED_PAGE_SIZE}'}), 400
+
+    try:
+        fmt = negotiate(listing=False)
+        response = Response(fmt.encode(change_log.changes_since(since, limit)), mimetype=fmt.mimetype)
+        response.vary.add('Accept')
+        return response
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,191 @@
+"""
+Response Compression
+This module compresses API responses with the best encoding the client
+accepts: zstd (``zstandard``) or brotli (``brotli``) when installed, and
+gzip otherwise.
+
+Only compressible media types (JSON, NDJSON, MessagePack, CBOR, text) are
+encoded, so JPEG/PNG images and audio pass untouched, and bodies smaller
+than ``settings.COMPRESSION_MIN_BYTES`` are sent as they are.  Streamed
+listings are compressed chunk by chunk and flushed after every chunk, so
+they stay streamed.  Levels are configurable per encoding to trade CPU for
+bandwidth.
+"""
+import abc
+import zlib
+from itertools import chain
+from flask import request
+from config import settings
+
+try:
+    import brotli
+except ImportError:  # Optional, brotli encoding
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # Optional, zstd encoding
+    zstandard = None
+
+COMPRESSIBLE_TYPES = {
+    'application/json', 'application/x-ndjson', 'application/msgpack', 'application/cbor',
+    'application/javascript', 'image/svg+xml',
+}
+
+
+class Encoder(abc.ABC):
+    """A streaming compressor for one Content-Encoding."""
+
+    name = None
+
+    @classmethod
+    def available(cls) -> bool:
+        return True
+
+    @abc.abstractmethod
+    def compress(self, chunk: bytes, flush: bool = True) -> bytes:
+        """
+        Compress a chunk.
+
+        Args:
+            chunk: Uncompressed bytes
+            flush: Flush the output, so the client can decode it right away
+        """
+
+    @abc.abstractmethod
+    def finish(self) -> bytes:
+        """Flush the remaining output and end the stream."""
+
+
+class GzipEncoder(Encoder):
+    name = 'gzip'
+
+    def __init__(self):
+        # wbits 31: zlib stream with a gzip header and trailer
+        self._compressor = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, chunk: bytes, flush: bool = True) -> bytes:
+        data = self._compressor.compress(chunk)
+        return data + self._compressor.flush(zlib.Z_SYNC_FLUSH) if flush else data
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class BrotliEncoder(Encoder):
+    name = 'br'
+
+    @classmethod
+    def available(cls) -> bool:
+        return brotli is not None
+
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+
+    def compress(self, chunk: bytes, flush: bool = True) -> bytes:
+        data = self._compressor.process(chunk)
+        return data + self._compressor.flush() if flush else data
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class ZstdEncoder(Encoder):
+    name = 'zstd'
+
+    @classmethod
+    def available(cls) -> bool:
+        return zstandard is not None
+
+    def __init__(self):
+        self._compressor = zstandard.ZstdCompressor(level=settings.COMPRESSION_ZSTD_LEVEL).compressobj()
+
+    def compress(self, chunk: bytes, flush: bool = True) -> bytes:
+        data = self._compressor.compress(chunk)
+        return data + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK) if flush else data
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+# Server preference when the client accepts several with the same quality
+ENCODERS = (ZstdEncoder, BrotliEncoder, GzipEncoder)
+
+
+def compressible(mimetype: str) -> bool:
+    """Whether a media type is worth compressing (images and audio are not)."""
+    return mimetype in COMPRESSIBLE_TYPES or mimetype.startswith('text/')
+
+
+def choose_encoder():
+    """The accepted encoder with the highest quality, or None."""
+    best, best_quality = None, 0
+    for encoder in ENCODERS:
+        if not encoder.available():
+            continue
+        quality = request.accept_encodings[encoder.name]
+        if quality > best_quality:
+            best, best_quality = encoder, quality
+    return best
+
+
+def _compress_stream(chunks, encoder):
+    for chunk in chunks:
+        if chunk:
+            data = encoder.compress(chunk)
+            if data:
+                yield data
+    yield encoder.finish()
+
+
+def compress_response(response):
+    """
+    ``after_request`` hook compressing eligible responses.
+
+    Args:
+        response: Flask response
+
+    Returns:
+        The response, compressed if the client accepts it and it pays off
+    """
+    if not settings.COMPRESSION_ENABLED or not compressible(response.mimetype or ''):
+        return response
+    response.vary.add('Accept-Encoding')
+    if (response.status_code != 200 or request.method == 'HEAD' or response.direct_passthrough
+            or 'Content-Encoding' in response.headers):
+        return response
+    encoder_class = choose_encoder()
+    if encoder_class is None:
+        return response
+
+    if response.is_streamed:
+        # Read ahead until the body is known to reach the threshold
+        chunks = response.iter_encoded()
+        head, size = [], 0
+        for chunk in chunks:
+            head.append(chunk)
+            size += len(chunk)
+            if size >= settings.COMPRESSION_MIN_BYTES:
+                break
+        else:
+            response.set_data(b''.join(head))
+            return response
+        source = response.response
+        if hasattr(source, 'close'):
+            response.call_on_close(source.close)
+        response.response = _compress_stream(chain(head, chunks), encoder_class())
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < settings.COMPRESSION_MIN_BYTES:
+            return response
+        encoder = encoder_class()
+        response.set_data(encoder.compress(data, flush=False) + encoder.finish())
+
+    response.headers['Content-Encoding'] = encoder_class.name
+    # The encoded bytes differ, so the validator of the plain body becomes
+    # weak; If-None-Match still matches it (weak comparison)
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
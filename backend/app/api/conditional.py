@@ -0,0 +1,83 @@
+"""
+Conditional Requests
+This module adds HTTP cache validators (ETag, Last-Modified) to API responses.
+
+Library and playlist responses are validated by the change log version, so
+a request carrying a current ``If-None-Match`` or ``If-Modified-Since`` is
+answered with 304 before the view queries anything.  Responses are sent
+with ``Cache-Control: no-cache``: clients keep them and revalidate on use.
+"""
+import hashlib
+from functools import wraps
+from flask import request, make_response
+from ..models.changes import change_log
+
+# Content-addressed resources never change under the same URL
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'no-cache'
+
+
+def make_etag(*parts) -> str:
+    """Quoted strong ETag from the parts identifying a representation."""
+    digest = hashlib.sha1('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+    return f'"{digest[:20]}"'
+
+
+def is_fresh(etag: str, last_modified: float = None) -> bool:
+    """
+    Whether the client's copy is current.
+
+    ``If-None-Match`` takes precedence over ``If-Modified-Since`` (RFC 9110).
+    """
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag.strip('"'))
+    since = request.if_modified_since
+    if since is not None and last_modified is not None:
+        return int(last_modified) <= since.timestamp()
+    return False
+
+
+def set_validators(response, etag: str, last_modified: float = None, cache_control: str = REVALIDATE):
+    """Add validators and the cache policy to a response."""
+    response.set_etag(etag.strip('"'))
+    if last_modified is not None:
+        response.last_modified = int(last_modified)
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+
+def not_modified(etag: str, last_modified: float = None, cache_control: str = REVALIDATE):
+    """Empty 304 response carrying the validators."""
+    return set_validators(make_response('', 304), etag, last_modified, cache_control)
+
+
+def library_validators(*args, **kwargs):
+    """Validators of library and playlist data: the change log version and time."""
+    version, changed_at = change_log.latest()
+    # Accept selects the representation (JSON array or NDJSON) of the same URL
+    return make_etag('v', version, changed_at, request.full_path, request.headers.get('Accept', '')), changed_at
+
+
+def conditional(validators=library_validators):
+    """
+    Answer conditional GETs of a view from validators computed up front.
+
+    Args:
+        validators: Callable receiving the view arguments and returning
+            ``(etag, last_modified)``
+
+    Returns:
+        View decorator
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            etag, last_modified = validators(*args, **kwargs)
+            if is_fresh(etag, last_modified):
+                return not_modified(etag, last_modified)
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                set_validators(response, etag, last_modified)
+            return response
+        return wrapper
+    return decorator
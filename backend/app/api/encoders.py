@@ -0,0 +1,170 @@
+"""
+Wire Encoders
+This module encodes API payloads as JSON, NDJSON, MessagePack or CBOR.
+
+JSON is encoded with ``orjson`` when it is installed (several times faster
+than the standard library encoder) and with :mod:`json` otherwise.
+MessagePack (``msgpack``) and CBOR (``cbor2``) are offered only if their
+packages are installed.  :func:`negotiate` picks the format from a
+``format`` argument or the ``Accept`` header.
+"""
+import abc
+import json
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # Optional, faster JSON encoder
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # Optional, MessagePack wire format
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:  # Optional, CBOR wire format
+    cbor2 = None
+
+
+def dumps_json(value) -> bytes:
+    """Encode a value as compact UTF-8 JSON."""
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+class WireFormat(abc.ABC):
+    """
+    An encoding of API payloads.
+
+    A streamed listing is ``open``, then every encoded row followed by
+    ``suffix`` and separated by ``separator``, then ``close``.
+    """
+
+    name = None
+    mimetype = None
+    open = b''
+    separator = b''
+    suffix = b''
+    close = b''
+    # Whether a single document (not a listing) can be sent in this format
+    documents = True
+
+    @classmethod
+    def available(cls) -> bool:
+        return True
+
+    @staticmethod
+    @abc.abstractmethod
+    def encode(value) -> bytes:
+        """Encode one document or listing row."""
+
+
+class JsonFormat(WireFormat):
+    """JSON; listings are one array."""
+
+    name = 'json'
+    mimetype = 'application/json'
+    open = b'['
+    separator = b','
+    close = b']'
+    encode = staticmethod(dumps_json)
+
+
+class NdjsonFormat(WireFormat):
+    """Newline-delimited JSON, one row per line."""
+
+    name = 'ndjson'
+    mimetype = 'application/x-ndjson'
+    suffix = b'\n'
+    documents = False
+    encode = staticmethod(dumps_json)
+
+
+class MsgpackFormat(WireFormat):
+    """MessagePack; listings are a stream of concatenated maps (read with ``msgpack.Unpacker``)."""
+
+    name = 'msgpack'
+    mimetype = 'application/msgpack'
+
+    @classmethod
+    def available(cls) -> bool:
+        return msgpack is not None
+
+    @staticmethod
+    def encode(value) -> bytes:
+        return msgpack.packb(value, use_bin_type=True)
+
+
+class CborFormat(WireFormat):
+    """CBOR; listings are one indefinite-length array (RFC 8949)."""
+
+    name = 'cbor'
+    mimetype = 'application/cbor'
+    open = b'\x9f'
+    close = b'\xff'
+
+    @classmethod
+    def available(cls) -> bool:
+        return cbor2 is not None
+
+    @staticmethod
+    def encode(value) -> bytes:
+        return cbor2.dumps(value)
+
+
+# In order of preference when the client accepts several equally; instances,
+# so an incomplete format fails on import rather than in a response
+WIRE_FORMATS = (JsonFormat(), NdjsonFormat(), MsgpackFormat(), CborFormat())
+JSON_FORMAT = WIRE_FORMATS[0]
+
+
+def negotiate(listing: bool = True):
+    """
+    Pick the wire format of the current request.
+
+    An explicit ``format`` argument wins; otherwise the best ``Accept`` match
+    among the available formats, falling back to JSON.
+
+    Args:
+        listing: Whether a streamed listing (rather than one document) is sent
+
+    Returns:
+        WireFormat
+
+    Raises:
+        ValueError: If the requested format is unknown or unavailable
+    """
+    formats = [fmt for fmt in WIRE_FORMATS if fmt.available() and (listing or fmt.documents)]
+    name = request.args.get('format')
+    if name:
+        for fmt in formats:
+            if fmt.name == name:
+                return fmt
+        raise ValueError(f"Unsupported format: {name} (available: {', '.join(fmt.name for fmt in formats)})")
+    best = request.accept_mimetypes.best_match([fmt.mimetype for fmt in formats])
+    for fmt in formats:
+        if fmt.mimetype == best:
+            return fmt
+    return JSON_FORMAT
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider encoding ``jsonify`` responses with ``orjson`` when it is installed."""
+
+    def response(self, *args, **kwargs):
+        if orjson is None or self._app.debug or self.compact is False:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        try:
+            # Dates and dataclasses go through Flask's default() as before
+            data = orjson.dumps(obj, default=self.default, option=option)
+        except TypeError:
+            return super().response(*args, **kwargs)
+        return self._app.response_class(data, mimetype=self.mimetype)
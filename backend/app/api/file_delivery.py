@@ -0,0 +1,185 @@
+"""
+File Delivery
+This module sends files (album art, audio) without copying them through
+Python.
+
+How the bytes leave depends on ``settings.FILE_DELIVERY``:
+
+- ``'auto'``: on Werkzeug's threading server the file is copied to the
+  socket by the kernel with ``socket.sendfile`` (``os.sendfile``); servers
+  offering ``wsgi.file_wrapper`` (gunicorn sync/gthread workers, uWSGI,
+  mod_wsgi) get the file handed over and do the same.  Otherwise it is
+  read in blocks.  Note that with eventlet or gevent installed (as pinned
+  in requirements.txt) ``socketio.run`` serves through their WSGI servers,
+  which offer neither, so zero-copy then needs
+  ``SocketIO(async_mode='threading')`` or one of the proxy modes.
+- ``'x-sendfile'``: behind Apache (mod_xsendfile) or lighttpd, only an
+  ``X-Sendfile`` header naming the file is sent and the server delivers it.
+- ``'x-accel-redirect'``: behind nginx, an ``X-Accel-Redirect`` to the
+  internal location ``settings.X_ACCEL_REDIRECT_PREFIX`` is sent instead.
+- ``'python'``: always read in blocks.
+
+Conditional requests are answered with 304 before the file is opened, and
+single byte ranges (``Range``, ``If-Range``) with 206.  Behind a proxy the
+proxy serves the ranges.
+"""
+import os
+from urllib.parse import quote
+from flask import request, Response
+from config import settings
+from .conditional import is_fresh, not_modified, set_validators, REVALIDATE
+from ..utils import file_fingerprint
+
+DELIVERY_MODES = ('auto', 'x-sendfile', 'x-accel-redirect', 'python')
+
+AUDIO_MIMETYPES = {
+    'mp3': 'audio/mpeg',
+    'wav': 'audio/wav',
+    'ogg': 'audio/ogg',
+    'opus': 'audio/ogg',
+    'flac': 'audio/flac',
+    'aac': 'audio/aac',
+    'm4a': 'audio/mp4',
+}
+
+
+def audio_mimetype(path: str) -> str:
+    """Media type of an audio file from its extension."""
+    return AUDIO_MIMETYPES.get(path.rsplit('.', 1)[-1].lower(), 'application/octet-stream')
+
+
+class FileSlice:
+    """
+    WSGI body sending ``length`` bytes of an open file from ``offset``.
+
+    With the server socket at hand, the bytes are copied by the kernel after
+    the headers are flushed; otherwise they are read in blocks.
+    """
+
+    def __init__(self, file, offset: int, length: int, sock=None):
+        self.file = file
+        self.offset = offset
+        self.length = length
+        self.sock = sock
+
+    def __iter__(self):
+        if self.sock is not None:
+            # The empty chunk makes the server send the status line and headers
+            yield b''
+            if self.length:
+                self.sock.sendfile(self.file, self.offset, self.length)
+            return
+        self.file.seek(self.offset)
+        remaining = self.length
+        while remaining > 0:
+            data = self.file.read(min(settings.FILE_DELIVERY_BLOCK_SIZE, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield data
+
+    def close(self):
+        self.file.close()
+
+
+def _requested_range(size: int, etag: str, last_modified: float):
+    """
+    The byte range to send, following ``Range`` and ``If-Range``.
+
+    Returns:
+        ``(start, stop)``, None for the whole file, or False if unsatisfiable
+    """
+    byte_range = request.range
+    if request.method != 'GET' or byte_range is None or byte_range.units != 'bytes':
+        return None
+    if len(byte_range.ranges) != 1:
+        # Multipart responses are not worth it for media; send everything
+        return None
+    if_range = request.if_range
+    if if_range.etag is not None and if_range.etag != etag.strip('"'):
+        return None
+    if if_range.date is not None and int(last_modified) != if_range.date.timestamp():
+        return None
+    start, stop = byte_range.ranges[0]
+    if stop is None:
+        # Open (bytes=N-) or suffix (bytes=-N) range
+        stop = size
+        if start < 0:
+            start = max(0, size + start)
+    stop = min(stop, size)
+    if start >= stop:
+        return False
+    return start, stop
+
+
+def _proxy_response(path: str, mimetype: str) -> Response:
+    """Empty response asking the reverse proxy to deliver the file."""
+    response = Response(mimetype=mimetype)
+    if settings.FILE_DELIVERY == 'x-sendfile':
+        response.headers['X-Sendfile'] = path
+    else:
+        response.headers['X-Accel-Redirect'] = settings.X_ACCEL_REDIRECT_PREFIX.rstrip('/') + quote(path)
+    return response
+
+
+def send_media(path: str, mimetype: str, etag: str = None, cache_control: str = REVALIDATE) -> Response:
+    """
+    Send a file with validators, range support and the configured delivery.
+
+    Args:
+        path: Path of the file
+        mimetype: Media type of the file
+        etag: Entity tag, by default the file version (path, mtime and size)
+        cache_control: Cache-Control header value
+
+    Returns:
+        Flask response (200, 206, 304 or 416)
+
+    Raises:
+        OSError: If the file cannot be read
+        ValueError: If ``settings.FILE_DELIVERY`` is unknown
+    """
+    if settings.FILE_DELIVERY not in DELIVERY_MODES:
+        raise ValueError(f"Unknown file delivery: {settings.FILE_DELIVERY} (expected one of {', '.join(DELIVERY_MODES)})")
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    etag = etag or file_fingerprint(path)
+    if is_fresh(etag, stat.st_mtime):
+        return not_modified(etag, stat.st_mtime, cache_control)
+
+    if settings.FILE_DELIVERY in ('x-sendfile', 'x-accel-redirect'):
+        return set_validators(_proxy_response(path, mimetype), etag, stat.st_mtime, cache_control)
+
+    size = stat.st_size
+    selected = _requested_range(size, etag, stat.st_mtime)
+    if selected is False:
+        response = Response(status=416)
+        response.headers['Content-Range'] = f"bytes */{size}"
+        response.headers['Accept-Ranges'] = 'bytes'
+        return response
+    start, stop = selected or (0, size)
+
+    if request.method == 'HEAD':
+        body = []
+    else:
+        file = open(path, 'rb')
+        environ = request.environ
+        sock = environ.get('werkzeug.socket')
+        file_wrapper = environ.get('wsgi.file_wrapper')
+        if settings.FILE_DELIVERY == 'python':
+            body = FileSlice(file, start, stop - start)
+        elif sock is not None:
+            body = FileSlice(file, start, stop - start, sock)
+        elif file_wrapper is not None and stop == size:
+            # The server sends from the current position to the end of the file
+            file.seek(start)
+            body = file_wrapper(file, settings.FILE_DELIVERY_BLOCK_SIZE)
+        else:
+            body = FileSlice(file, start, stop - start)
+
+    response = Response(body, status=206 if selected else 200, mimetype=mimetype, direct_passthrough=True)
+    response.headers['Content-Length'] = str(stop - start)
+    response.headers['Accept-Ranges'] = 'bytes'
+    if selected:
+        response.headers['Content-Range'] = f"bytes {start}-{stop - 1}/{size}"
+    return set_validators(response, etag, stat.st_mtime, cache_control)
@@ -2,11 +2,20 @@
 Library API Endpoints
 This module defines the API routes for library management.
 """
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify, make_response, url_for
 from ..models.library import LibraryManager
-from .serializers import library_tracks_schema
-from ..ws.events import emit_library_update
+from .serializers import TRACK_ROW_COLUMNS, track_row_schema
+from .streaming import stream_rows
+from .file_delivery import send_media, audio_mimetype
+from .conditional import conditional, make_etag, is_fresh, not_modified, set_validators, IMMUTABLE, REVALIDATE
+from ..ws.events import emit_library_update, emit_scan_job
+from ..loudness import loudness_analyzer
+from ..models.changes import change_log
+from ..models.database import art_content_hash
+from ..sprites import SpriteSheet, parse_track_ids
+from ..utils import file_fingerprint
 import os
+import hashlib
 
 # Create Blueprint
 library_api = Blueprint('library_api', __name__)
@@ -15,15 +24,18 @@ library_api = Blueprint('library_api', __name__)
 library_manager = LibraryManager()
 
 @library_api.route('/tracks', methods=['GET'])
+@conditional()
 def get_tracks():
-    """Get all tracks in the library with optional sorting/filtering."""
+    """Get all tracks in the library with optional sorting/filtering, streamed (JSON array or NDJSON)."""
     # Get query parameters
     sort_by = request.args.get('sort_by', 'title')
     filter_term = request.args.get('filter', '')
     
     try:
-        tracks = library_manager.get_tracks(sort_by=sort_by, filter=filter_term)
-        return jsonify(library_tracks_schema(tracks))
+        tracks = library_manager.iter_tracks(sort_by=sort_by, filter=filter_term, columns=TRACK_ROW_COLUMNS)
+        return stream_rows(tracks, track_row_schema)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -39,39 +51,95 @@ def scan_directory():
         return jsonify({'error': 'Invalid directory path'}), 400
     
     try:
+        emit_scan_job('library_scan', 'started', path=path)
+        since = change_log.current_version()
         result = library_manager.scan_directory(path)
-        # Emit WebSocket event
-        emit_library_update()
+        emit_scan_job('library_scan', 'completed', path=path, **result)
+        # Emit WebSocket event with the changes of this scan
+        emit_library_update(since)
         return jsonify({
             'message': 'Library scan completed',
             'tracks_added': result.get('tracks_added', 0),
             'tracks_updated': result.get('tracks_updated', 0)
         })
     except Exception as e:
+        emit_scan_job('library_scan', 'failed', path=path, error=str(e))
         return jsonify({'error': str(e)}), 500
 
 @library_api.route('/search', methods=['GET'])
+@conditional()
 def search_tracks():
-    """Search for tracks in the library."""
+    """Search for tracks in the library, streamed (JSON array or NDJSON)."""
     query = request.args.get('query', '')
     if not query:
         return jsonify({'error': 'Query parameter is required'}), 400
     
     try:
-        tracks = library_manager.search_tracks(query)
-        return jsonify(library_tracks_schema(tracks))
+        tracks = library_manager.iter_search_tracks(query, columns=TRACK_ROW_COLUMNS)
+        return stream_rows(tracks, track_row_schema)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@library_api.route('/loudness/analyze', methods=['POST'])
+def analyze_loudness():
+    """Start loudness analysis of new or changed tracks in the background."""
+    data = request.get_json(silent=True) or {}
+    started = loudness_analyzer.start(force=bool(data.get('force', False)))
+    if not started:
+        return jsonify({'error': 'Loudness analysis already running'}), 409
+    return jsonify({'message': 'Loudness analysis started'}), 202
+
+@library_api.route('/loudness/stop', methods=['POST'])
+def stop_loudness_analysis():
+    """Interrupt the running loudness analysis; it resumes on the next start."""
+    loudness_analyzer.stop()
+    return jsonify({'message': 'Loudness analysis stopping'})
+
+@library_api.route('/loudness/status', methods=['GET'])
+def get_loudness_status():
+    """Get progress of the loudness analysis."""
+    return jsonify(loudness_analyzer.status)
+
 @library_api.route('/art/<track_id>', methods=['GET'])
 def get_album_art(track_id):
-    """Get album art for a track."""
+    """
+    Get album art for a track.
+
+    Art files are content-addressed (``Track.art_hash``); requested with a
+    matching ``v=<art_hash>`` the image is sent as immutable.
+    """
     try:
         art_path = library_manager.get_album_art(track_id)
         if not art_path:
             return jsonify({'error': 'No album art available'}), 404
-        
-        return send_file(art_path, mimetype='image/jpeg')
+
+        art_hash = art_content_hash(art_path)
+        # Art saved by older versions is validated by its file version instead
+        etag = art_hash or file_fingerprint(art_path)
+        versioned = art_hash is not None and request.args.get('v') == art_hash
+        return send_media(art_path, 'image/jpeg', etag=etag, cache_control=IMMUTABLE if versioned else REVALIDATE)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@library_api.route('/tracks/<int:track_id>/audio', methods=['GET'])
+def get_track_audio(track_id):
+    """
+    Get the audio file of a track.
+
+    Supports byte ranges, so players can seek and resume, and conditional
+    requests validated by the file version.
+    """
+    try:
+        track = library_manager.get_track_by_id(track_id)
+        if not track:
+            return jsonify({'error': 'Track not found'}), 404
+
+        if not os.path.isfile(track.path):
+            return jsonify({'error': 'Audio file not found'}), 404
+
+        return send_media(track.path, audio_mimetype(track.path))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -82,16 +150,101 @@ def get_track_thumbnail(track_id):
     
     Returns the thumbnail as a base64-encoded data URL.
     If the track has no thumbnail, returns a 404 error.
+    ``/tracks/<id>/thumbnail.jpg`` sends the image itself.
+    The ETag is the thumbnail's content hash.
     """
     try:
         track = library_manager.get_track_by_id(track_id)
         if not track:
             return jsonify({'error': 'Track not found'}), 404
         
-        thumbnail = track.get_thumbnail_base64()
-        if not thumbnail:
+        if not track.album_art_thumbnail:
             return jsonify({'error': 'No thumbnail available for this track'}), 404
-        
-        return jsonify({'thumbnail': thumbnail})
+
+        etag = make_etag(hashlib.sha1(track.album_art_thumbnail).hexdigest())
+        if is_fresh(etag):
+            return not_modified(etag)
+        return set_validators(jsonify({'thumbnail': track.get_thumbnail_base64()}), etag)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
+
+@library_api.route('/tracks/<int:track_id>/thumbnail.jpg', methods=['GET'])
+def get_track_thumbnail_image(track_id):
+    """
+    Get the album art thumbnail for a track as a JPEG image.
+
+    The ETag is the thumbnail's content hash.  The thumbnail is made from
+    the album art, so requested with a matching ``v=<art_hash>`` it is sent
+    as immutable.
+    """
+    try:
+        track = library_manager.get_track_by_id(track_id)
+        if not track:
+            return jsonify({'error': 'Track not found'}), 404
+
+        if not track.album_art_thumbnail:
+            return jsonify({'error': 'No thumbnail available for this track'}), 404
+
+        etag = make_etag(hashlib.sha1(track.album_art_thumbnail).hexdigest())
+        versioned = track.art_hash is not None and request.args.get('v') == track.art_hash
+        cache_control = IMMUTABLE if versioned else REVALIDATE
+        if is_fresh(etag):
+            return not_modified(etag, cache_control=cache_control)
+        response = make_response(track.album_art_thumbnail)
+        response.mimetype = 'image/jpeg'
+        return set_validators(response, etag, cache_control=cache_control)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@library_api.route('/thumbnails/sprite', methods=['GET'])
+def get_thumbnail_sprite():
+    """
+    Get the sprite sheet layout of the thumbnails of several tracks.
+
+    ``ids`` is a comma-separated list of track IDs.  The atlas is built (and
+    cached) here; its ``url`` is versioned by the sheet key, so the image
+    itself can be cached as immutable.
+    """
+    try:
+        track_ids = parse_track_ids(request.args.get('ids'))
+        sheet = SpriteSheet(library_manager.get_thumbnails(track_ids), track_ids)
+        etag = make_etag('sprite', sheet.key)
+        if is_fresh(etag):
+            return not_modified(etag)
+        layout = sheet.to_dict()
+        if sheet.tiles:
+            sheet.image()
+            layout['url'] = url_for('library_api.get_thumbnail_sprite_image', ids=request.args.get('ids'), v=sheet.key)
+        else:
+            layout['url'] = None
+        return set_validators(jsonify(layout), etag)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@library_api.route('/thumbnails/sprite.jpg', methods=['GET'])
+def get_thumbnail_sprite_image():
+    """
+    Get the sprite sheet atlas of the thumbnails of several tracks as a JPEG image.
+
+    Tiles are placed as described by ``/thumbnails/sprite`` for the same
+    ``ids``.  Requested with a ``v`` matching the sheet key it is immutable.
+    """
+    try:
+        track_ids = parse_track_ids(request.args.get('ids'))
+        sheet = SpriteSheet(library_manager.get_thumbnails(track_ids), track_ids)
+        if not sheet.tiles:
+            return jsonify({'error': 'No thumbnails available for these tracks'}), 404
+
+        etag = f'"{sheet.key}"'
+        cache_control = IMMUTABLE if request.args.get('v') == sheet.key else REVALIDATE
+        if is_fresh(etag):
+            return not_modified(etag, cache_control=cache_control)
+        response = make_response(sheet.image())
+        response.mimetype = 'image/jpeg'
+        return set_validators(response, etag, cache_control=cache_control)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -2,12 +2,27 @@
 Lyrics API Endpoints
 This module defines the API routes for lyrics retrieval.
 """
-from flask import Blueprint, jsonify
-from ..lyrics import get_lyrics_for_track
+from flask import Blueprint, request, jsonify
+from ..lyrics import get_lyrics_for_track, lyrics_manager
 
 # Create Blueprint
 lyrics_api = Blueprint('lyrics_api', __name__)
 
+@lyrics_api.route('/search', methods=['GET'])
+def search_lyrics():
+    """Search tracks by a lyric line."""
+    query = request.args.get('q', '')
+    if not query.strip():
+        return jsonify({'error': 'Query parameter q is required'}), 400
+    limit = request.args.get('limit', 20, type=int)
+    if not 1 <= limit <= 100:
+        return jsonify({'error': 'limit must be between 1 and 100'}), 400
+
+    try:
+        return jsonify(lyrics_manager.search(query, limit))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @lyrics_api.route('/<track_id>', methods=['GET'])
 def get_lyrics(track_id):
     """Get lyrics for a track."""
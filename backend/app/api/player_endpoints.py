@@ -7,12 +7,16 @@ from flask import Blueprint, request, jsonify
 from ..services.audio_service import AudioService
 from .serializers import player_status_schema
 from ..ws.events import emit_player_status
+from ..ws.clock import player_clock
+from ..ws.dispatcher import dispatcher
+from ..ws.spectrum import spectrum_streamer
 
 # Create Blueprint
 player_api = Blueprint('player_api', __name__)
 
 # Initialize global audio service instance
 audio_service = AudioService()
+player_clock.attach(audio_service.player)
 
 @player_api.route('/status', methods=['GET'])
 def get_status():
@@ -20,6 +24,11 @@ def get_status():
     status = audio_service.status()
     return jsonify(player_status_schema(status))
 
+@player_api.route('/clock', methods=['GET'])
+def get_clock():
+    """Get the last player clock anchor without querying libvlc."""
+    return jsonify(player_clock.anchor)
+
 @player_api.route('/play', methods=['POST'])
 def play_track():
     """Play a track from given path."""
@@ -96,4 +105,74 @@ def set_volume():
         emit_player_status(status)
         return jsonify(player_status_schema(status))
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
+
+@player_api.route('/next', methods=['POST'])
+def queue_next_track():
+    """Preload the track that should follow the current one."""
+    data = request.json
+    if not data or 'path' not in data:
+        return jsonify({'error': 'Path is required'}), 400
+
+    try:
+        return jsonify(audio_service.queue_next(data['path']))
+    except FileNotFoundError as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@player_api.route('/next', methods=['DELETE'])
+def clear_next_track():
+    """Drop the preloaded next track."""
+    try:
+        return jsonify(audio_service.clear_next())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@player_api.route('/gapless', methods=['POST'])
+def set_gapless():
+    """Enable or disable gapless switching to the preloaded track."""
+    data = request.json
+    if not data or 'enabled' not in data:
+        return jsonify({'error': 'Enabled flag is required'}), 400
+
+    try:
+        return jsonify(audio_service.set_gapless(data['enabled']))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@player_api.route('/crossfade', methods=['POST'])
+def set_crossfade():
+    """Configure the crossfade length (0-12 s) and curve."""
+    data = request.json
+    if not data or ('seconds' not in data and 'curve' not in data):
+        return jsonify({'error': 'Seconds or curve is required'}), 400
+
+    try:
+        return jsonify(audio_service.set_crossfade(data.get('seconds'), data.get('curve')))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@player_api.route('/normalization', methods=['POST'])
+def set_normalization():
+    """Select loudness normalization mode (off, track or album)."""
+    data = request.json
+    if not data or 'mode' not in data:
+        return jsonify({'error': 'Mode is required'}), 400
+
+    try:
+        return jsonify(audio_service.set_normalization(data['mode']))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@player_api.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Get playback metrics such as measured track transition gaps."""
+    metrics = audio_service.metrics()
+    metrics['event_dispatch'] = dispatcher.get_metrics()
+    metrics['spectrum'] = spectrum_streamer.get_stats()
+    return jsonify(metrics)
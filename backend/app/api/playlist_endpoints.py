@@ -4,8 +4,10 @@ This module defines the API routes for playlist management.
 """
 from flask import Blueprint, request, jsonify
 from ..models.playlist import PlaylistManager
-from .serializers import playlist_schema, playlist_tracks_schema
+from .serializers import playlist_schema, TRACK_ROW_COLUMNS, track_row_schema
+from .streaming import stream_rows
 from ..ws.events import emit_playlist_changed
+from .conditional import conditional
 
 # Create Blueprint
 playlist_api = Blueprint('playlist_api', __name__)
@@ -14,6 +16,7 @@ playlist_api = Blueprint('playlist_api', __name__)
 playlist_manager = PlaylistManager()
 
 @playlist_api.route('', methods=['GET'])
+@conditional()
 def get_playlists():
     """Get all playlists."""
     try:
@@ -52,11 +55,14 @@ def delete_playlist(playlist_id):
         return jsonify({'error': str(e)}), 500
 
 @playlist_api.route('/<playlist_id>/tracks', methods=['GET'])
+@conditional()
 def get_playlist_tracks(playlist_id):
-    """Get all tracks in a playlist."""
+    """Get all tracks in a playlist in order, streamed (JSON array or NDJSON)."""
     try:
-        tracks = playlist_manager.get_playlist_tracks(playlist_id)
-        return jsonify(playlist_tracks_schema(tracks))
+        tracks = playlist_manager.iter_playlist_tracks(playlist_id, columns=TRACK_ROW_COLUMNS)
+        return stream_rows(tracks, track_row_schema)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -5,6 +5,8 @@ into JSON-friendly dictionaries for API responses.
 """
 
 import os
+import base64
+from ..models.database import Track, art_content_hash
 
 def player_status_schema(player_status):
     """
@@ -50,6 +52,7 @@ def track_schema(track):
             'track_num': 0,
             'genre': '',
             'album_art_path': None,
+            'art_hash': None,
             'has_thumbnail': False
         }
         
@@ -65,6 +68,7 @@ def track_schema(track):
         'track_num': track.get('track_num') if isinstance(track, dict) else getattr(track, 'track_num', 0),
         'genre': track.get('genre') if isinstance(track, dict) else getattr(track, 'genre', ''),
         'album_art_path': track.get('album_art_path') if isinstance(track, dict) else getattr(track, 'album_art_path', None),
+        'art_hash': track.get('art_hash') if isinstance(track, dict) else getattr(track, 'art_hash', None),
         'has_thumbnail': track.get('has_thumbnail') if isinstance(track, dict) else getattr(track, 'has_thumbnail', False)
     }
     
@@ -117,4 +121,40 @@ def library_tracks_schema(tracks):
     Returns:
         List of serialized tracks
     """
-    return [track_schema(track) for track in tracks]
\ No newline at end of file
+    return [track_schema(track) for track in tracks]
+
+# Columns read by ``track_row_schema``, in unpacking order; selecting them
+# instead of Track entities skips ORM object construction
+TRACK_ROW_COLUMNS = (
+    Track.id, Track.path, Track.title, Track.artist, Track.album, Track.duration,
+    Track.track_num, Track.genre, Track.album_art_path, Track.album_art_thumbnail,
+)
+
+def track_row_schema(row):
+    """
+    Serialize a track from a ``TRACK_ROW_COLUMNS`` tuple.
+
+    Produces the same fields as ``track_schema`` for a Track object, without
+    per-field type checks.
+
+    Args:
+        row: Tuple of ``TRACK_ROW_COLUMNS`` values
+
+    Returns:
+        Dictionary with standardized track fields
+    """
+    track_id, path, title, artist, album, duration, track_num, genre, art_path, thumbnail = row
+    return {
+        'id': track_id,
+        'path': path,
+        'title': title,
+        'artist': artist,
+        'album': album,
+        'duration': duration,
+        'track_num': track_num,
+        'genre': genre,
+        'album_art_path': art_path,
+        'art_hash': art_content_hash(art_path),
+        'has_thumbnail': thumbnail is not None,
+        'thumbnail': f"data:image/jpeg;base64,{base64.b64encode(thumbnail).decode('ascii')}" if thumbnail else None,
+    }
@@ -0,0 +1,66 @@
+"""
+Streaming Responses
+This module streams large listings without building them in memory.
+
+Rows come from a batched query iterator (``Query.yield_per``) and are
+serialized and sent a batch at a time, so memory stays flat and the first
+bytes leave as soon as the first batch is read.  The wire format is
+negotiated (see app/api/encoders.py): a JSON array by default, NDJSON (one
+object per line) for ``application/x-ndjson`` or ``format=ndjson``, and
+MessagePack or CBOR when installed.
+"""
+from flask import Response, stream_with_context
+from config import settings
+from .encoders import negotiate, JSON_FORMAT
+
+
+def iter_encoded(rows, schema, fmt=JSON_FORMAT, batch_size: int = None):
+    """
+    Yield a listing of serialized rows in chunks of ``batch_size`` rows.
+
+    Args:
+        rows: Iterator of rows
+        schema: Callable serializing one row to a dictionary
+        fmt: WireFormat
+        batch_size: Rows per yielded chunk
+    """
+    batch_size = batch_size or settings.STREAM_BATCH_ROWS
+    encode, suffix, separator = fmt.encode, fmt.suffix, fmt.separator
+    if fmt.open:
+        yield fmt.open
+    lead = b''
+    batch = []
+    for row in rows:
+        batch.append(encode(schema(row)) + suffix)
+        if len(batch) >= batch_size:
+            yield lead + separator.join(batch)
+            lead = separator
+            batch = []
+    if batch:
+        yield lead + separator.join(batch)
+    if fmt.close:
+        yield fmt.close
+
+
+def stream_rows(rows, schema) -> Response:
+    """
+    Stream rows in the negotiated wire format.
+
+    The query behind ``rows`` should already be running (see
+    ``LibraryManager.iter_tracks``) so database errors surface before the
+    response starts.
+
+    Args:
+        rows: Iterator of rows
+        schema: Callable serializing one row
+
+    Returns:
+        Streamed Flask response
+
+    Raises:
+        ValueError: If the requested format is unsupported
+    """
+    fmt = negotiate()
+    response = Response(stream_with_context(iter_encoded(rows, schema, fmt)), mimetype=fmt.mimetype)
+    response.vary.add('Accept')
+    return response
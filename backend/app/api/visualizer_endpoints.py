@@ -0,0 +1,180 @@
+"""
+Visualizer API Endpoints
+This module defines the API routes for waveform and audio visualization data.
+"""
+import numpy as np
+from flask import Blueprint, request, jsonify, Response
+from ..artifact_cache import artifact_cache
+from ..audio_io import UnsupportedAudioError
+from ..models.library import LibraryManager
+from ..peaks import get_peak_pyramid
+from ..spectrogram import get_spectrogram, get_spectrogram_png, DEFAULT_N_FFT, DEFAULT_HOP, DEFAULT_PNG_WIDTH
+from ..visualizer import AudioVisualizer
+
+# Create Blueprint
+visualizer_api = Blueprint('visualizer_api', __name__)
+
+# Initialize library manager and renderer
+library_manager = LibraryManager()
+visualizer = AudioVisualizer()
+
+# Upper bound of rendered image sizes, also bounds the number of cache keys per track
+MAX_IMAGE_WIDTH = 4096
+MAX_IMAGE_HEIGHT = 1024
+
+@visualizer_api.route('/<int:track_id>/peaks', methods=['GET'])
+def get_peaks(track_id):
+    """
+    Get the waveform peak pyramid of a track.
+
+    Query parameters:
+        level: Zoom level (0 is the finest); without it the level index is returned
+        start, end: Bucket range within the level
+        format: 'json' (default) or 'binary'
+
+    Binary responses contain int8 triples (min, max, rms) per bucket, or the
+    whole peak file when no level is given.
+    """
+    track = library_manager.get_track_by_id(track_id)
+    if not track:
+        return jsonify({'error': 'Track not found'}), 404
+
+    output = request.args.get('format', 'json')
+    try:
+        pyramid = get_peak_pyramid(track.path)
+    except FileNotFoundError:
+        return jsonify({'error': 'Audio file not found'}), 404
+    except UnsupportedAudioError as e:
+        return jsonify({'error': str(e)}), 415
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+    level = request.args.get('level', type=int)
+    if level is None:
+        if output == 'binary':
+            return Response(pyramid.to_bytes(), mimetype='application/octet-stream')
+        return jsonify(pyramid.info())
+
+    try:
+        lo, hi, rms = pyramid.range(
+            level,
+            request.args.get('start', 0, type=int),
+            request.args.get('end', type=int),
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    start = max(0, request.args.get('start', 0, type=int))
+    if output == 'binary':
+        interleaved = np.stack([lo, hi, rms], axis=1).tobytes()
+        response = Response(interleaved, mimetype='application/octet-stream')
+        response.headers['X-Peaks-Level'] = str(level)
+        response.headers['X-Peaks-Start'] = str(start)
+        response.headers['X-Peaks-Samples-Per-Bucket'] = str(pyramid.samples_per_bucket(level))
+        response.headers['X-Peaks-Sample-Rate'] = str(pyramid.sample_rate)
+        return response
+
+    return jsonify({
+        'level': level,
+        'samples_per_bucket': pyramid.samples_per_bucket(level),
+        'sample_rate': pyramid.sample_rate,
+        'start': start,
+        'min': lo.tolist(),
+        'max': hi.tolist(),
+        'rms': rms.tolist(),
+    })
+
+
+@visualizer_api.route('/<int:track_id>/spectrogram', methods=['GET'])
+def get_track_spectrogram(track_id):
+    """
+    Get the spectrogram of a track.
+
+    Query parameters:
+        n_fft: FFT size (power of two, default 1024)
+        hop: Hop size in samples (default 512)
+        mel_bins: Number of mel bands, 0 for linear frequency bins (default)
+        width: Maximum PNG width in pixels (default 1600)
+        format: 'png' (default) for a coloured heatmap, 'binary' for the raw
+            uint8 magnitude matrix (frames x bins, lowest frequency first),
+            'json' for the parameters and dimensions only
+    """
+    track = library_manager.get_track_by_id(track_id)
+    if not track:
+        return jsonify({'error': 'Track not found'}), 404
+
+    n_fft = request.args.get('n_fft', DEFAULT_N_FFT, type=int)
+    hop = request.args.get('hop', DEFAULT_HOP, type=int)
+    mel_bins = request.args.get('mel_bins', 0, type=int)
+    output = request.args.get('format', 'png')
+    try:
+        if output == 'png':
+            width = request.args.get('width', DEFAULT_PNG_WIDTH, type=int)
+            if not 1 <= width <= MAX_IMAGE_WIDTH:
+                raise ValueError(f"width must be between 1 and {MAX_IMAGE_WIDTH}")
+            png = get_spectrogram_png(track.path, n_fft, hop, mel_bins, width)
+            return Response(png, mimetype='image/png')
+        spectrogram = get_spectrogram(track.path, n_fft, hop, mel_bins)
+    except FileNotFoundError:
+        return jsonify({'error': 'Audio file not found'}), 404
+    except UnsupportedAudioError as e:
+        return jsonify({'error': str(e)}), 415
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+    if output == 'binary':
+        response = Response(spectrogram.data.tobytes(), mimetype='application/octet-stream')
+        for key, value in spectrogram.info().items():
+            response.headers['X-Spectrogram-' + key.replace('_', '-').title()] = str(value)
+        return response
+    return jsonify(spectrogram.info())
+
+
+@visualizer_api.route('/<int:track_id>/waveform', methods=['GET'])
+def get_waveform_image(track_id):
+    """
+    Get a waveform PNG of a track.
+
+    Query parameters:
+        width: Image width in pixels (default 800)
+        height: Image height in pixels (default 200)
+    """
+    track = library_manager.get_track_by_id(track_id)
+    if not track:
+        return jsonify({'error': 'Track not found'}), 404
+
+    width = request.args.get('width', AudioVisualizer.WAVEFORM_WIDTH, type=int)
+    height = request.args.get('height', AudioVisualizer.WAVEFORM_HEIGHT, type=int)
+    if not 1 <= width <= MAX_IMAGE_WIDTH or not 1 <= height <= MAX_IMAGE_HEIGHT:
+        return jsonify({'error': f'Image size must be at most {MAX_IMAGE_WIDTH}x{MAX_IMAGE_HEIGHT}'}), 400
+    try:
+        png = visualizer.waveform_bytes(track.path, width, height)
+    except FileNotFoundError:
+        return jsonify({'error': 'Audio file not found'}), 404
+    except UnsupportedAudioError as e:
+        return jsonify({'error': str(e)}), 415
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    return Response(png, mimetype='image/png')
+
+
+@visualizer_api.route('/cache', methods=['GET'])
+def get_cache_stats():
+    """Get statistics of the visualization artifact cache."""
+    return jsonify(artifact_cache.get_stats())
+
+
+@visualizer_api.route('/cache', methods=['DELETE'])
+def clear_cache():
+    """Remove every cached visualization artifact."""
+    try:
+        artifact_cache.clear()
+        return jsonify(artifact_cache.get_stats())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
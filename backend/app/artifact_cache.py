@@ -0,0 +1,211 @@
+"""
+Visualization Artifact Cache
+This module stores computed visualization artifacts (peak files,
+spectrograms, rendered images) on disk with a size budget.
+
+Entries are keyed by the version of the source file (path, mtime, size), the
+artifact kind and its parameters, so editing a file invalidates its entries
+automatically.  The least recently used entries are evicted once the
+budget is exceeded; access order is mirrored into file mtimes so it survives
+restarts.  Artifacts built from content rather than one file (thumbnail
+sprite sheets) are keyed by a digest of that content instead.  Concurrent
+requests for a missing entry are coalesced: one thread builds it while the
+others wait for its result.
+"""
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from config import settings
+from .utils import file_fingerprint, write_bytes_atomic
+
+SUFFIX = '.artifact'
+
+
+class _Build:
+    """An in-flight build other threads can wait for."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.data = None
+        self.error = None
+
+
+class ArtifactCache:
+    """Size-bounded LRU cache of artifact files."""
+
+    def __init__(self, directory: str = None, max_bytes: int = None):
+        self.directory = directory or settings.ARTIFACT_CACHE_DIR
+        self.max_bytes = max_bytes if max_bytes is not None else settings.ARTIFACT_CACHE_MAX_MB * 1024 * 1024
+        self._entries = None            # file name -> size, least recently used first
+        self._size = 0
+        self._building = {}             # file name -> _Build
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'coalesced': 0, 'evictions': 0, 'errors': 0}
+
+    def _load_index(self):
+        """Index existing entries by modification time (called with the lock held)."""
+        if self._entries is not None:
+            return
+        found = []
+        if os.path.isdir(self.directory):
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(SUFFIX) and entry.is_file():
+                    stat = entry.stat()
+                    found.append((stat.st_mtime, entry.name, stat.st_size))
+        found.sort()
+        self._entries = OrderedDict((name, size) for _, name, size in found)
+        self._size = sum(self._entries.values())
+
+    def entry_name(self, file_path: str, kind: str, params: dict = None) -> str:
+        """File name of an artifact of a given source file version."""
+        extra = [kind] + [f"{key}={value}" for key, value in sorted((params or {}).items())]
+        return f"{file_fingerprint(file_path, *extra)}{SUFFIX}"
+
+    def get_or_create(self, file_path: str, kind: str, params: dict, build) -> bytes:
+        """
+        Get an artifact, building and storing it if needed.
+
+        Args:
+            file_path: Source audio file (its version is part of the key)
+            kind: Artifact kind, e.g. 'peaks'
+            params: Parameters the artifact depends on
+            build: Callable returning the artifact bytes
+
+        Returns:
+            Artifact bytes
+        """
+        return self._get_or_build(self.entry_name(file_path, kind, params), build)
+
+    def get_or_create_content(self, kind: str, key: str, build) -> bytes:
+        """
+        Get an artifact derived from content rather than from one source file.
+
+        Args:
+            kind: Artifact kind, e.g. 'sprite'
+            key: Digest of everything the artifact depends on
+            build: Callable returning the artifact bytes
+
+        Returns:
+            Artifact bytes
+        """
+        name = hashlib.sha1(f"{kind}|{key}".encode('utf-8')).hexdigest()
+        return self._get_or_build(f"{name}{SUFFIX}", build)
+
+    def _get_or_build(self, name: str, build) -> bytes:
+        path = os.path.join(self.directory, name)
+
+        while True:
+            with self._lock:
+                self._load_index()
+                cached = name in self._entries
+                if cached:
+                    self._entries.move_to_end(name)
+                else:
+                    pending = self._building.get(name)
+                    leader = pending is None
+                    if leader:
+                        pending = self._building[name] = _Build()
+                        self._stats['misses'] += 1
+                    else:
+                        self._stats['coalesced'] += 1
+            if not cached:
+                break
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+            except OSError:
+                # Evicted or deleted behind our back; build it again
+                with self._lock:
+                    self._forget(name)
+                continue
+            with self._lock:
+                self._stats['hits'] += 1
+            self._touch(path)
+            return data
+
+        if not leader:
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.data
+
+        try:
+            data = build()
+            write_bytes_atomic(path, data)
+            pending.data = data
+        except Exception as e:
+            pending.error = e
+            with self._lock:
+                self._stats['errors'] += 1
+            raise
+        finally:
+            with self._lock:
+                del self._building[name]
+                if pending.error is None:
+                    self._forget(name)
+                    self._entries[name] = len(pending.data)
+                    self._size += len(pending.data)
+                    self._evict()
+            pending.done.set()
+        return data
+
+    def discard(self, file_path: str, kind: str, params: dict = None):
+        """Remove one artifact, e.g. after it turned out to be unreadable."""
+        name = self.entry_name(file_path, kind, params)
+        with self._lock:
+            self._load_index()
+            self._forget(name)
+            self._remove(name)
+
+    def clear(self):
+        """Remove every artifact."""
+        with self._lock:
+            self._load_index()
+            for name in list(self._entries):
+                self._remove(name)
+            self._entries.clear()
+            self._size = 0
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            self._load_index()
+            stats = dict(self._stats)
+            stats.update({
+                'entries': len(self._entries),
+                'bytes': self._size,
+                'max_bytes': self.max_bytes,
+                'building': len(self._building),
+            })
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = round(stats['hits'] / lookups, 4) if lookups else None
+        return stats
+
+    def _touch(self, path: str):
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _forget(self, name: str):
+        size = self._entries.pop(name, None)
+        if size is not None:
+            self._size -= size
+
+    def _remove(self, name: str):
+        try:
+            os.remove(os.path.join(self.directory, name))
+        except OSError:
+            pass
+
+    def _evict(self):
+        # The newest entry is kept even if it alone exceeds the budget
+        while self._size > self.max_bytes and len(self._entries) > 1:
+            name, size = self._entries.popitem(last=False)
+            self._size -= size
+            self._remove(name)
+            self._stats['evictions'] += 1
+
+
+# Create a singleton instance for the application
+artifact_cache = ArtifactCache()
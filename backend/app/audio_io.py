@@ -0,0 +1,377 @@
+"""
+PCM block reading for audio analysis.
+
+Audio is read in fixed-size blocks of float32 samples shaped
+``(frames, channels)`` and scaled to [-1, 1], so analysis memory stays bounded
+by the block size rather than the file length.
+
+WAV files are parsed directly and memory-mapped: blocks are converted from
+views into the mapping, so the operating system pages the file in and out as
+needed instead of it being read into RAM.
+
+Other formats go through the first available decoder of :data:`DECODERS`:
+libsndfile (``soundfile``, if installed) or an ``ffmpeg`` binary on the
+PATH.  :func:`open_audio` picks the decoder.  libvlc is not used: its audio
+callbacks are paced by the playback clock, far too slow for analysis and
+for computing the live spectrum ahead of the playhead.
+"""
+import abc
+import mmap
+import shutil
+import struct
+import subprocess
+import numpy as np
+import mutagen
+from .utils import is_supported_format
+
+try:
+    import soundfile
+except ImportError:  # Optional, libsndfile based decoder
+    soundfile = None
+
+DEFAULT_BLOCK_FRAMES = 65536
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# Mono downmix weights by channel count (WAV channel order L, R, C, LFE, Ls, Rs)
+DOWNMIX_WEIGHTS = {
+    1: (1.0,),
+    2: (0.5, 0.5),
+    6: (0.5, 0.5, 0.7071, 0.0, 0.3536, 0.3536),
+}
+
+
+def downmix(block: np.ndarray) -> np.ndarray:
+    """
+    Downmix a ``(frames, channels)`` block to mono.
+
+    Stereo is averaged, 5.1 follows the ITU-R BS.775 coefficients (LFE is
+    dropped) and any other layout is averaged over all channels.
+    """
+    channels = block.shape[1]
+    if channels == 1:
+        return block[:, 0]
+    weights = DOWNMIX_WEIGHTS.get(channels)
+    if weights is None:
+        return block.mean(axis=1)
+    return block @ np.asarray(weights, dtype=np.float32)
+
+
+class UnsupportedAudioError(ValueError):
+    """Raised when no available decoder handles a file's format."""
+
+
+class AudioReader(abc.ABC):
+    """
+    Base class of the decoders.
+
+    Subclasses set ``sample_rate``, ``channels`` and ``frames`` when opened
+    and implement :meth:`blocks`.  ``frames`` is exact for WAV and libsndfile
+    and estimated from the container metadata otherwise.
+    """
+
+    extensions = None   # File extensions handled, or None for any supported format
+
+    sample_rate = 0
+    channels = 0
+    frames = 0
+
+    @classmethod
+    def available(cls) -> bool:
+        """Whether the decoder can be used on this system."""
+        return True
+
+    @classmethod
+    def handles(cls, file_path: str) -> bool:
+        if cls.extensions is None:
+            return True
+        return file_path.rsplit('.', 1)[-1].lower() in cls.extensions
+
+    @abc.abstractmethod
+    def blocks(self, block_frames: int = DEFAULT_BLOCK_FRAMES, start_frame: int = 0):
+        """Yield float32 ``(frames, channels)`` blocks from ``start_frame`` on."""
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class WavReader(AudioReader):
+    """
+    Memory-mapped reader for RIFF/WAVE files.
+
+    Supports 8-bit unsigned, 16/24/32-bit signed integer and 32/64-bit float
+    samples, including WAVE_FORMAT_EXTENSIBLE headers.
+
+    Attributes:
+        sample_rate: Frames per second
+        channels: Number of interleaved channels
+        sample_width: Bytes per sample
+        is_float: True for IEEE float samples
+        frames: Total number of frames
+    """
+
+    extensions = ('wav',)
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self._file = open(file_path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._parse_header()
+        except Exception:
+            self.close()
+            raise
+
+    def _parse_header(self):
+        data = self._map
+        if len(data) < 12 or data[0:4] != b'RIFF' or data[8:12] != b'WAVE':
+            raise ValueError(f"Not a WAV file: {self.file_path}")
+
+        fmt = None
+        offset = 12
+        while offset + 8 <= len(data):
+            chunk_id = data[offset:offset + 4]
+            chunk_size, = struct.unpack_from('<I', data, offset + 4)
+            body = offset + 8
+            if chunk_id == b'fmt ':
+                fmt = struct.unpack_from('<HHIIHH', data, body)
+                format_tag = fmt[0]
+                if format_tag == WAVE_FORMAT_EXTENSIBLE and chunk_size >= 40:
+                    # The first two bytes of the sub-format GUID hold the format tag
+                    format_tag, = struct.unpack_from('<H', data, body + 24)
+                fmt = (format_tag,) + fmt[1:]
+            elif chunk_id == b'data':
+                if fmt is None:
+                    raise ValueError(f"WAV data chunk before fmt chunk: {self.file_path}")
+                # Streamed files may leave the size unset; use the rest of the file
+                if chunk_size in (0, 0xFFFFFFFF) or body + chunk_size > len(data):
+                    chunk_size = len(data) - body
+                self._data_offset = body
+                self._data_size = chunk_size
+                break
+            offset = body + chunk_size + (chunk_size & 1)
+        else:
+            raise ValueError(f"WAV file has no data chunk: {self.file_path}")
+
+        format_tag, channels, sample_rate, _, block_align, bits = fmt
+        self.channels = channels
+        self.sample_rate = sample_rate
+        self.sample_width = block_align // channels if channels else 0
+        self.is_float = format_tag == WAVE_FORMAT_IEEE_FLOAT
+
+        if format_tag not in (WAVE_FORMAT_PCM, WAVE_FORMAT_IEEE_FLOAT) or not channels:
+            raise ValueError(f"Unsupported WAV format tag: {format_tag:#06x}")
+        if self.is_float and self.sample_width not in (4, 8):
+            raise ValueError(f"Unsupported float sample width: {bits}-bit")
+        if not self.is_float and self.sample_width not in (1, 2, 3, 4):
+            raise ValueError(f"Unsupported sample width: {bits}-bit")
+
+        self._block_align = block_align
+        self.frames = self._data_size // block_align
+
+    def _convert(self, raw) -> np.ndarray:
+        """Convert raw interleaved sample bytes to float32 in [-1, 1]."""
+        width = self.sample_width
+        if self.is_float:
+            data = np.frombuffer(raw, dtype='<f4' if width == 4 else '<f8').astype(np.float32)
+        elif width == 1:
+            data = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+        elif width == 2:
+            data = np.frombuffer(raw, dtype='<i2').astype(np.float32) / 32768.0
+        elif width == 3:
+            # Place the 3 bytes in the top of an int32 to keep the sign
+            packed = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3)
+            widened = np.zeros((len(packed), 4), dtype=np.uint8)
+            widened[:, 1:] = packed
+            data = widened.view('<i4').ravel().astype(np.float32) / 2147483648.0
+        else:
+            data = np.frombuffer(raw, dtype='<i4').astype(np.float32) / 2147483648.0
+        return data.reshape(-1, self.channels)
+
+    def blocks(self, block_frames: int = DEFAULT_BLOCK_FRAMES, start_frame: int = 0):
+        """Yield float32 ``(frames, channels)`` blocks from ``start_frame`` on."""
+        view = memoryview(self._map)
+        try:
+            frame = max(0, start_frame)
+            while frame < self.frames:
+                count = min(block_frames, self.frames - frame)
+                begin = self._data_offset + frame * self._block_align
+                yield self._convert(view[begin:begin + count * self._block_align])
+                frame += count
+        finally:
+            view.release()
+
+    def close(self):
+        if getattr(self, '_map', None) is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                pass  # A block generator is still alive; closed with the file
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def probe_stream(file_path: str):
+    """
+    Read the stream parameters of a compressed file from its metadata.
+
+    Returns:
+        Tuple of (sample_rate, channels, estimated frames)
+
+    Raises:
+        ValueError: If the file cannot be parsed
+    """
+    try:
+        audio = mutagen.File(file_path)
+    except Exception as e:
+        raise ValueError(f"Cannot read audio metadata of {file_path}: {e}") from e
+    if audio is None or audio.info is None:
+        raise ValueError(f"Unrecognized audio file: {file_path}")
+    info = audio.info
+    # Opus always decodes at 48 kHz and does not report a sample rate
+    sample_rate = int(getattr(info, 'sample_rate', 0) or 48000)
+    channels = int(getattr(info, 'channels', 0) or 2)
+    frames = int(round((getattr(info, 'length', 0) or 0) * sample_rate))
+    return sample_rate, channels, frames
+
+
+class SoundFileReader(AudioReader):
+    """Reader for the formats of libsndfile (FLAC, Ogg Vorbis/Opus, MP3...)."""
+
+    extensions = ('wav', 'flac', 'ogg', 'opus', 'mp3')
+
+    @classmethod
+    def available(cls) -> bool:
+        return soundfile is not None
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        try:
+            self._file = soundfile.SoundFile(file_path)
+        except Exception as e:  # soundfile.LibsndfileError and friends
+            raise ValueError(f"libsndfile cannot open {file_path}: {e}") from e
+        self.sample_rate = self._file.samplerate
+        self.channels = self._file.channels
+        self.frames = self._file.frames
+
+    def blocks(self, block_frames: int = DEFAULT_BLOCK_FRAMES, start_frame: int = 0):
+        self._file.seek(max(0, start_frame))
+        yield from self._file.blocks(blocksize=block_frames, dtype='float32', always_2d=True)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class FFmpegReader(AudioReader):
+    """
+    Reader piping float32 PCM out of an ``ffmpeg`` process.
+
+    The output is resampled/remixed by ffmpeg to the parameters found in the
+    file metadata, so the reported format always matches the samples.
+    """
+
+    @classmethod
+    def available(cls) -> bool:
+        return shutil.which('ffmpeg') is not None
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.sample_rate, self.channels, self.frames = probe_stream(file_path)
+        self._process = None
+
+    def blocks(self, block_frames: int = DEFAULT_BLOCK_FRAMES, start_frame: int = 0):
+        self.close()
+        command = ['ffmpeg', '-nostdin', '-v', 'error']
+        if start_frame > 0:
+            command += ['-ss', f'{start_frame / self.sample_rate:.6f}']
+        command += [
+            '-i', self.file_path, '-map', '0:a:0',
+            '-f', 'f32le', '-ac', str(self.channels), '-ar', str(self.sample_rate), '-',
+        ]
+        self._process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        frame_bytes = 4 * self.channels
+        try:
+            while True:
+                raw = self._process.stdout.read(block_frames * frame_bytes)
+                usable = len(raw) - len(raw) % frame_bytes
+                if usable:
+                    yield np.frombuffer(raw[:usable], dtype='<f4').reshape(-1, self.channels)
+                if len(raw) < block_frames * frame_bytes:
+                    break
+        finally:
+            self.close()
+
+    def close(self):
+        process, self._process = self._process, None
+        if process is not None:
+            if process.poll() is None:
+                process.kill()
+            process.stdout.close()
+            process.wait()
+
+
+# Decoders in order of preference
+DECODERS = (WavReader, SoundFileReader, FFmpegReader)
+
+
+def open_audio(file_path: str) -> AudioReader:
+    """
+    Open an audio file with the first decoder able to read it.
+
+    Args:
+        file_path: Path to an audio file of a supported format
+
+    Raises:
+        UnsupportedAudioError: If the format is unsupported or no decoder for it is available
+        ValueError: If the available decoders fail to read the file
+    """
+    if not is_supported_format(file_path):
+        raise UnsupportedAudioError(f"Unsupported audio format: {file_path}")
+    error = None
+    for decoder in DECODERS:
+        if not decoder.handles(file_path) or not decoder.available():
+            continue
+        try:
+            return decoder(file_path)
+        except (ValueError, OSError) as e:
+            error = e
+    if error is None:
+        raise UnsupportedAudioError(
+            f"No decoder available for {file_path} (compressed formats need soundfile or ffmpeg)"
+        )
+    raise ValueError(f"No decoder can read {file_path}: {error}")
+
+
+def read_audio_blocks(file_path: str, block_frames: int = DEFAULT_BLOCK_FRAMES):
+    """
+    Open an audio file for block reading.
+
+    Args:
+        file_path: Path to an audio file of a supported format
+        block_frames: Number of frames per yielded block
+
+    Returns:
+        Tuple of (sample_rate, channels, block generator)
+
+    Raises:
+        ValueError: If no decoder can read the file
+    """
+    reader = open_audio(file_path)
+
+    def _blocks():
+        with reader:
+            yield from reader.blocks(block_frames)
+
+    return reader.sample_rate, reader.channels, _blocks()
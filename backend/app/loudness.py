@@ -0,0 +1,245 @@
+"""
+Loudness Analysis
+This module measures integrated loudness and peak of tracks (EBU R128 style,
+see loudness_meter.py) in worker processes, stores them with the tracks and
+derives ReplayGain-style gain offsets used by the player.
+"""
+import os
+import math
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from sqlalchemy.exc import SQLAlchemyError
+from config import settings
+from .loudness_meter import analyze_file
+from .models.database import Track, get_db_session, close_db_session
+
+NORMALIZATION_MODES = ('off', 'track', 'album')
+
+# Tag values the scanner fills in when a file has none
+PLACEHOLDER_TAGS = (None, '', 'Unknown Album', 'Unknown Artist')
+
+
+def compute_gain(loudness_lufs, peak, target_lufs: float = None):
+    """
+    Compute the gain (dB) bringing a loudness to the target without clipping.
+
+    Returns:
+        Gain in dB, or None if the loudness is unknown
+    """
+    if loudness_lufs is None:
+        return None
+    if target_lufs is None:
+        target_lufs = settings.LOUDNESS_TARGET_LUFS
+    gain = target_lufs - loudness_lufs
+    if peak and peak > 0:
+        gain = min(gain, -20 * math.log10(peak))
+    return round(gain, 2)
+
+
+def album_loudness(tracks):
+    """Duration-weighted energy mean of the loudness of an album's tracks."""
+    energy = 0.0
+    total = 0.0
+    for track in tracks:
+        weight = track.duration or 1.0
+        energy += weight * 10 ** (track.loudness_lufs / 10)
+        total += weight
+    return 10 * math.log10(energy / total) if total else None
+
+
+def _file_mtime(path: str):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+class LoudnessAnalyzer:
+    """
+    Batch loudness analysis over the library in a process pool.
+
+    Only tracks whose file changed since their last analysis are measured,
+    and every result is committed as soon as it arrives, so an interrupted
+    run resumes where it stopped the next time it is started.
+    """
+    # Number of results committed at once
+    COMMIT_EVERY = 20
+
+    def __init__(self, workers: int = None):
+        self.workers = workers or settings.LOUDNESS_WORKERS or os.cpu_count() or 1
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._listeners = []
+        self.status = {
+            'running': False,
+            'total': 0,
+            'done': 0,
+            'failed': 0,
+            'errors': [],
+        }
+
+    def add_listener(self, callback):
+        """Register a callable receiving (state, status) on start, progress and end."""
+        self._listeners.append(callback)
+
+    def _notify(self, state: str):
+        for callback in self._listeners:
+            try:
+                callback(state, self.status)
+            except Exception as e:
+                print(f"Error in loudness analysis listener: {e}")
+
+    def pending_tracks(self, force: bool = False):
+        """
+        Return tracks that have never been analyzed or changed on disk.
+
+        Tracks whose file is missing are skipped; tracks whose analysis
+        failed are retried only once their file changes (or with ``force``).
+        """
+        db_session = get_db_session()
+        pending = []
+        for track in db_session.query(Track):
+            mtime = _file_mtime(track.path)
+            if mtime is None:
+                continue
+            if force or track.loudness_mtime != mtime:
+                pending.append(track)
+        return pending
+
+    def start(self, force: bool = False) -> bool:
+        """
+        Start the analysis in a background thread.
+
+        Returns:
+            False if an analysis is already running
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            self._stop_event.clear()
+            self._thread = threading.Thread(
+                target=self._run, args=(force,), name='loudness-analysis', daemon=True
+            )
+            self.status.update({'running': True, 'total': 0, 'done': 0, 'failed': 0, 'errors': []})
+            self._thread.start()
+            return True
+
+    def stop(self):
+        """Interrupt the running analysis; finished results are kept."""
+        self._stop_event.set()
+
+    def _run(self, force: bool):
+        state = 'failed'
+        try:
+            self.run(force)
+            state = 'stopped' if self._stop_event.is_set() else 'completed'
+        finally:
+            self.status['running'] = False
+            close_db_session()
+            self._notify(state)
+
+    def run(self, force: bool = False):
+        """Analyze pending tracks and update album gains (blocking)."""
+        db_session = get_db_session()
+        tracks = {track.path: track for track in self.pending_tracks(force)}
+        self.status['total'] = len(tracks)
+        self._notify('started')
+
+        if tracks:
+            # Forking a multithreaded server (Socket.IO, libvlc event threads)
+            # can deadlock the children on locks held by other threads
+            executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'))
+            try:
+                futures = [executor.submit(analyze_file, path) for path in tracks]
+                uncommitted = 0
+                for future in as_completed(futures):
+                    if self._stop_event.is_set():
+                        break
+                    result = future.result()
+                    track = tracks[result['path']]
+                    if result['error'] or result['integrated_lufs'] is None:
+                        self.status['failed'] += 1
+                        self.status['errors'].append({'path': result['path'], 'error': result['error']})
+                        # Record the attempt so the file is not retried until it changes
+                        track.loudness_lufs = track.track_peak = track.track_gain_db = None
+                        track.loudness_mtime = _file_mtime(track.path)
+                        uncommitted += 1
+                    else:
+                        track.loudness_lufs = round(result['integrated_lufs'], 2)
+                        track.track_peak = round(result['peak'], 6)
+                        track.track_gain_db = compute_gain(track.loudness_lufs, track.track_peak)
+                        track.loudness_mtime = _file_mtime(track.path)
+                        uncommitted += 1
+                    self.status['done'] += 1
+                    if uncommitted >= self.COMMIT_EVERY:
+                        self._commit(db_session)
+                        uncommitted = 0
+                        self._notify('progress')
+                self._commit(db_session)
+            finally:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+        if not self._stop_event.is_set():
+            self.update_album_gains()
+
+    def update_album_gains(self):
+        """
+        Recompute album gain and peak from the analyzed tracks of each album.
+
+        Albums are told apart by directory and name, so same-named albums of
+        different artists are not pooled while compilations stay together;
+        tracks with placeholder tags get no album gain.
+        """
+        db_session = get_db_session()
+        albums = {}
+        for track in db_session.query(Track).filter(Track.loudness_lufs.isnot(None)):
+            if track.album in PLACEHOLDER_TAGS or track.artist in PLACEHOLDER_TAGS:
+                track.album_gain_db = track.album_peak = None
+                continue
+            key = (os.path.dirname(os.path.abspath(track.path)), track.album)
+            albums.setdefault(key, []).append(track)
+
+        for album_tracks in albums.values():
+            loudness = album_loudness(album_tracks)
+            peak = max(track.track_peak or 0 for track in album_tracks)
+            gain = compute_gain(loudness, peak)
+            for track in album_tracks:
+                track.album_gain_db = gain
+                track.album_peak = peak
+        self._commit(db_session)
+
+    @staticmethod
+    def _commit(db_session):
+        try:
+            db_session.commit()
+        except SQLAlchemyError as e:
+            db_session.rollback()
+            raise RuntimeError(f"Database error: {str(e)}")
+
+
+def lookup_gain(file_path: str, mode: str = None):
+    """
+    Get the normalization gain for a file path.
+
+    Args:
+        file_path: Path of the track being loaded
+        mode: 'track', 'album' or 'off' (default: settings.LOUDNESS_NORMALIZATION)
+
+    Returns:
+        Gain in dB, or None if normalization is off or the track is unanalyzed
+    """
+    mode = mode or settings.LOUDNESS_NORMALIZATION
+    if mode == 'off':
+        return None
+    track = get_db_session().query(Track).filter_by(path=file_path).first()
+    if track is None:
+        return None
+    if mode == 'album' and track.album_gain_db is not None:
+        return track.album_gain_db
+    return track.track_gain_db
+
+
+# Create a singleton instance for the application
+loudness_analyzer = LoudnessAnalyzer()
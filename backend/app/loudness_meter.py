@@ -0,0 +1,135 @@
+"""
+Loudness Meter
+This module measures integrated loudness and sample peak of audio files
+(EBU R128 style).
+
+It is the entry point of the analysis worker processes, so it imports
+nothing beyond the audio decoders: no database, player or web layers.
+"""
+import math
+import numpy as np
+from .audio_io import read_audio_blocks
+
+# BS.1770 constants
+STEP_SECONDS = 0.1          # Gating blocks are built from 100 ms steps
+STEPS_PER_BLOCK = 4         # 400 ms blocks with 75% overlap
+ABSOLUTE_GATE_LUFS = -70.0
+RELATIVE_GATE_LU = -10.0
+CHANNEL_WEIGHTS = (1.0, 1.0, 1.0, 1.41, 1.41)
+
+
+def _biquad_power(b, a, omega):
+    """Squared magnitude response of a biquad at angular frequencies omega."""
+    z = np.exp(-1j * omega)
+    num = b[0] + b[1] * z + b[2] * z * z
+    den = a[0] + a[1] * z + a[2] * z * z
+    return np.abs(num / den) ** 2
+
+
+def k_weighting_power(n_fft: int, sample_rate: int) -> np.ndarray:
+    """
+    Squared K-weighting response for the bins of an ``rfft`` of size n_fft.
+
+    Coefficients are derived for any sample rate the same way libebur128
+    does (pre-filter high shelf followed by the RLB high-pass).
+    """
+    omega = 2 * np.pi * np.fft.rfftfreq(n_fft)
+
+    # Stage 1: high shelf
+    f0, gain, q = 1681.974450955533, 3.999843853973347, 0.7071752369554196
+    k = math.tan(math.pi * f0 / sample_rate)
+    vh = 10 ** (gain / 20)
+    vb = vh ** 0.4996667741545416
+    a0 = 1 + k / q + k * k
+    shelf_b = ((vh + vb * k / q + k * k) / a0, 2 * (k * k - vh) / a0, (vh - vb * k / q + k * k) / a0)
+    shelf_a = (1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0)
+
+    # Stage 2: high-pass
+    f0, q = 38.13547087602444, 0.5003270373238773
+    k = math.tan(math.pi * f0 / sample_rate)
+    a0 = 1 + k / q + k * k
+    hp_b = (1.0, -2.0, 1.0)
+    hp_a = (1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0)
+
+    return _biquad_power(shelf_b, shelf_a, omega) * _biquad_power(hp_b, hp_a, omega)
+
+
+def measure_loudness(file_path: str) -> dict:
+    """
+    Measure integrated loudness and sample peak of an audio file.
+
+    Audio is decoded in blocks. Every 100 ms step is transformed with a
+    single vectorized ``rfft`` and weighted in the frequency domain, which
+    by Parseval's theorem yields the K-weighted mean square of the step.
+    Overlapping 400 ms blocks are then gated as in EBU R128.
+
+    Args:
+        file_path: Path to the audio file
+
+    Returns:
+        Dictionary with integrated_lufs, peak and duration
+    """
+    sample_rate, channels, blocks = read_audio_blocks(file_path)
+    step = int(round(sample_rate * STEP_SECONDS))
+
+    # Bin weights including the factor 2 for the mirrored half of the spectrum
+    weights = k_weighting_power(step, sample_rate)
+    weights[1:(step + 1) // 2] *= 2
+    weights /= step * step
+
+    channel_weights = np.array(
+        [CHANNEL_WEIGHTS[c] if c < len(CHANNEL_WEIGHTS) else 1.0 for c in range(channels)]
+    )
+
+    step_power = []
+    peak = 0.0
+    total_frames = 0
+    carry = np.empty((0, channels), dtype=np.float32)
+    for block in blocks:
+        total_frames += len(block)
+        if len(block):
+            peak = max(peak, float(np.abs(block).max()))
+        data = np.concatenate([carry, block]) if len(carry) else block
+        usable = len(data) - len(data) % step
+        carry = data[usable:]
+        if not usable:
+            continue
+        # (steps, step, channels) -> spectrum along the time axis of each step
+        steps = data[:usable].reshape(-1, step, channels)
+        spectrum = np.fft.rfft(steps, axis=1)
+        power = (spectrum.real ** 2 + spectrum.imag ** 2)
+        mean_square = np.einsum('sfc,f->sc', power, weights)
+        step_power.append(mean_square @ channel_weights)
+
+    duration = total_frames / sample_rate if sample_rate else 0.0
+    result = {'integrated_lufs': None, 'peak': peak, 'duration': duration}
+    if not step_power:
+        return result
+
+    power = np.concatenate(step_power)
+    if len(power) < STEPS_PER_BLOCK:
+        block_power = np.array([power.mean()])
+    else:
+        kernel = np.ones(STEPS_PER_BLOCK) / STEPS_PER_BLOCK
+        block_power = np.convolve(power, kernel, mode='valid')
+
+    with np.errstate(divide='ignore'):
+        block_loudness = -0.691 + 10 * np.log10(block_power)
+    gated = block_power[block_loudness > ABSOLUTE_GATE_LUFS]
+    if not len(gated):
+        return result
+    relative_gate = -0.691 + 10 * np.log10(gated.mean()) + RELATIVE_GATE_LU
+    gated = block_power[(block_loudness > ABSOLUTE_GATE_LUFS) & (block_loudness > relative_gate)]
+    result['integrated_lufs'] = float(-0.691 + 10 * np.log10(gated.mean()))
+    return result
+
+
+def analyze_file(file_path: str) -> dict:
+    """Worker entry point: measure a single file, never raising."""
+    try:
+        result = measure_loudness(file_path)
+        result['error'] = None
+    except Exception as e:
+        result = {'integrated_lufs': None, 'peak': None, 'error': str(e)}
+    result['path'] = file_path
+    return result
@@ -0,0 +1,116 @@
+"""
+LRC Parser
+This module parses LRC lyrics into a compact columnar structure.
+
+The content is scanned with precompiled, multi-line regular expressions:
+one for lines starting with time tags (``[mm:ss]``, ``[mm:ss.xx]``,
+``[mm:ss.xxx]`` or ``[mm:ss:xx]``) and one for ``[key:value]`` metadata tags,
+so the line splitting and matching happen inside the regex engine.  Timed
+lines end up in two parallel columns (a ``times`` array and a ``texts``
+list) instead of one dictionary per line.  ``[offset:]`` is applied
+to all times, a line with several time tags yields one entry per tag, and a
+leading byte order mark is ignored.  Lines matching neither form are skipped.
+"""
+import re
+import numpy as np
+
+# A timed line: the first time tag, then the rest of the line (more tags and text)
+TIMED_LINE = re.compile(r'^[ \t]*\[(\d+):(\d+)(?:[.:](\d{1,3}))?\]([^\n]*)', re.M)
+# Further time tags at the start of the rest of a line
+TIME_TAG = re.compile(r'[ \t]*\[(\d+):(\d+)(?:[.:](\d{1,3}))?\]')
+# Metadata such as [ar:Artist] or [offset:+250]; keys never start with a digit
+META_TAG = re.compile(r'^[ \t]*\[([A-Za-z#][\w#-]*)[ \t]*:([^\n]*)\][ \t]*$', re.M)
+
+
+class LrcDocument:
+    """
+    Parsed LRC lyrics.
+
+    Attributes:
+        times: float64 array of line times in milliseconds, sorted, offset applied
+        texts: Line texts, parallel to ``times``
+        metadata: Metadata tags (``ar``, ``ti``, ``offset``...) as strings, keys as written
+    """
+
+    __slots__ = ('times', 'texts', 'metadata')
+
+    def __init__(self, times, texts, metadata):
+        self.times = times
+        self.texts = texts
+        self.metadata = metadata
+
+    def __len__(self):
+        return len(self.times)
+
+    def to_dict(self) -> dict:
+        """Dictionary form served by the lyrics API (``metadata`` and ``lines``)."""
+        return {
+            'metadata': self.metadata,
+            'lines': [{'time': time, 'text': text} for time, text in zip(self.times.tolist(), self.texts)],
+        }
+
+
+def _offset_ms(value: str) -> int:
+    try:
+        return int(value.strip())
+    except ValueError:
+        return 0
+
+
+def parse_lrc(content: str) -> LrcDocument:
+    """
+    Parse LRC content.
+
+    Args:
+        content: LRC file content
+
+    Returns:
+        LrcDocument with lines sorted by time
+    """
+    times = []
+    texts = []
+    if not content:
+        return LrcDocument(np.zeros(0), texts, {})
+
+    # Whole-content scans keep the per-line work in the regex engine
+    content = content.lstrip('\ufeff').replace('\r\n', '\n').replace('\r', '\n')
+    # Keys keep their spelling, as served before; only the offset lookup ignores case
+    metadata = {key: value.strip() for key, value in META_TAG.findall(content)}
+    next_tag = TIME_TAG.match
+    for minutes, seconds, fraction, text in TIMED_LINE.findall(content):
+        ms = int(minutes) * 60000 + int(seconds) * 1000
+        if fraction:
+            # .x is tenths, .xx hundredths and .xxx milliseconds
+            ms += int(fraction.ljust(3, '0'))
+        if '[' not in text[:2]:
+            times.append(ms)
+            texts.append(text.strip())
+            continue
+        # Several time tags share the text, e.g. [00:12.00][01:30.00]Chorus
+        stamps = [ms]
+        match = next_tag(text)
+        while match is not None:
+            minutes, seconds, fraction = match.groups()
+            stamp = int(minutes) * 60000 + int(seconds) * 1000
+            if fraction:
+                stamp += int(fraction.ljust(3, '0'))
+            stamps.append(stamp)
+            text = text[match.end():]
+            match = next_tag(text)
+        text = text.strip()
+        for stamp in stamps:
+            times.append(stamp)
+            texts.append(text)
+
+    times = np.array(times, dtype=np.float64)
+    # A positive offset makes lyrics appear sooner
+    offset = next((_offset_ms(value) for key, value in metadata.items() if key.lower() == 'offset'), 0)
+    if offset:
+        times = np.maximum(times - offset, 0.0)
+
+    if len(times) > 1 and (np.diff(times) < 0).any():
+        # Stable, so lines sharing a time keep their file order
+        order = np.argsort(times, kind='stable')
+        times = times[order]
+        texts = [texts[i] for i in order.tolist()]
+    return LrcDocument(times, texts, metadata)
@@ -5,8 +5,106 @@ Lyrics Management
 This module handles finding and parsing lyrics for music tracks.
 """
 import os
+import re
 import json
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from config import settings
 from .models.metadata import MetadataManager
+from .models.library import LYRICS_SIDECAR_EXTENSIONS
+from .lrc import parse_lrc
+
+# Word timestamps of enhanced LRC, e.g. "<00:12.34>word"
+WORD_TIME_TAG = re.compile(r'<(\d+):(\d+(?:[.:]\d+)?)>')
+
+
+def _tag_seconds(minutes, seconds):
+    return int(minutes) * 60 + float(seconds.replace(':', '.'))
+
+
+def lyrics_search_text(source, content):
+    """
+    Plain text of lyrics for full-text search (LRC timestamps and tags removed).
+
+    Args:
+        source: 'embedded', 'lrc_file' or 'txt_file'
+        content: Raw lyrics
+
+    Returns:
+        Lyric lines separated by newlines
+    """
+    if source != 'lrc_file':
+        return content
+    texts = []
+    for text in parse_lrc(content).texts:
+        text = WORD_TIME_TAG.sub('', text).strip()
+        if text:
+            texts.append(text)
+    # Repeated lines (e.g. a chorus) are indexed once
+    return '\n'.join(dict.fromkeys(texts))
+
+
+class LyricTimeline:
+    """
+    Synchronized lyric lines ordered by time, for playhead lookups.
+
+    Attributes:
+        times: Sorted line start times in seconds
+        texts: Line texts with word timestamps removed
+        words: Per line, a list of (time, word) pairs from enhanced LRC tags,
+            or None for lines without word timing
+    """
+
+    def __init__(self, times, texts, words=None):
+        self.times = times
+        self.texts = texts
+        self.words = words or [None] * len(times)
+
+    @classmethod
+    def from_lyrics(cls, lyrics):
+        """
+        Build a timeline from lyrics data of the lyrics manager.
+
+        Returns:
+            LyricTimeline, or None for missing or unsynchronized lyrics
+        """
+        if not lyrics or lyrics.get('type') != 'synchronized':
+            return None
+        times, texts, words = [], [], []
+        for line in lyrics['content']['lines']:
+            times.append(line['time'] / 1000)
+            pieces = WORD_TIME_TAG.split(line['text'])
+            # pieces: leading text, then (minutes, seconds, word) triples
+            if len(pieces) == 1:
+                texts.append(line['text'])
+                words.append(None)
+                continue
+            timed = [
+                (_tag_seconds(pieces[i], pieces[i + 1]), pieces[i + 2])
+                for i in range(1, len(pieces), 3)
+            ]
+            texts.append((pieces[0] + ''.join(word for _, word in timed)).strip())
+            words.append([[time, word.strip()] for time, word in timed if word.strip()])
+        return cls(times, texts, words)
+
+    def __len__(self):
+        return len(self.times)
+
+    def index_at(self, position: float) -> int:
+        """Index of the line active at ``position`` seconds, -1 before the first line."""
+        return bisect_right(self.times, position) - 1
+
+    def line(self, index: int):
+        """Line at an index as a dictionary, or None if out of range."""
+        if not 0 <= index < len(self.times):
+            return None
+        return {
+            'index': index,
+            'time': self.times[index],
+            'text': self.texts[index],
+            'words': self.words[index],
+        }
 
 class LyricsManager:
     """
@@ -37,35 +135,84 @@ class LyricsManager:
         """
         self.lyrics_dir = lyrics_dir
         self.metadata_manager = MetadataManager()
+        self._library = None
+        # track id or path -> (audio path, indexed, validation key, lyrics data),
+        # least recently used first
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    @property
+    def library(self):
+        """Library manager shared by all lookups (created on first use)."""
+        if self._library is None:
+            from .models.library import LibraryManager
+            self._library = LibraryManager()
+        return self._library
+
+    @staticmethod
+    def _mtime(path):
+        try:
+            return os.stat(path).st_mtime
+        except OSError:
+            return None
+
+    def _validation_key(self, audio_path, sidecar):
+        """File versions the parsed lyrics of a track depend on."""
+        return (
+            self._mtime(audio_path),
+            sidecar,
+            self._mtime(sidecar) if sidecar else None,
+        )
+
+    def invalidate(self, track_id=None, track_path=None):
+        """
+        Drop cached lyrics, e.g. after a scan recorded new ones.
+
+        Args:
+            track_id: Track whose entry (looked up by id) is dropped
+            track_path: Audio file whose entry (looked up by path) is dropped
+
+        Without arguments, every entry is dropped.
+        """
+        with self._cache_lock:
+            if track_id is None and track_path is None:
+                self._cache.clear()
+                return
+            if track_id is not None:
+                self._cache.pop(str(track_id), None)
+            if track_path is not None:
+                self._cache.pop(track_path, None)
     
-    def find_lrc_file(self, audio_path):
+    def find_lyrics_file(self, audio_path):
         """
-        Find a LRC file for the given audio file.
-        
+        Find a lyrics sidecar file (LRC, then plain text) for the given audio file.
+
+        The extensions are tried in the order the library scan uses, so a file
+        is found whether or not a scan has indexed it yet.
+
         Args:
             audio_path: Path to the audio file
-            
+
         Returns:
-            Path to the LRC file if found, None otherwise
+            Path to the lyrics file if found, None otherwise
         """
         if not audio_path:
             return None
-            
-        # Try looking for a file with the same name but .lrc extension
+
+        # Try looking for a file with the same name next to the audio file
         base_path = os.path.splitext(audio_path)[0]
-        lrc_path = base_path + '.lrc'
-        
-        if os.path.exists(lrc_path):
-            return lrc_path
-            
+        for ext in LYRICS_SIDECAR_EXTENSIONS:
+            if os.path.exists(base_path + ext):
+                return base_path + ext
+
         # If lyrics_dir is specified, look there using the audio filename
         if self.lyrics_dir:
             audio_filename = os.path.basename(base_path)
-            potential_lrc = os.path.join(self.lyrics_dir, audio_filename + '.lrc')
-            
-            if os.path.exists(potential_lrc):
-                return potential_lrc
-                
+            for ext in LYRICS_SIDECAR_EXTENSIONS:
+                potential_path = os.path.join(self.lyrics_dir, audio_filename + ext)
+                if os.path.exists(potential_path):
+                    return potential_path
+
         return None
     
     def parse_lrc(self, lrc_content):
@@ -78,66 +225,8 @@ class LyricsManager:
         Returns:
             Dictionary with metadata and timed lyrics
         """
-        if not lrc_content:
-            return {'metadata': {}, 'lines': []}
-            
-        lines = lrc_content.strip().split('\n')
-        result = {
-            'metadata': {},
-            'lines': []
-        }
-        
-        for line in lines:
-            line = line.strip()
-            
-            # Skip empty lines
-            if not line:
-                continue
-                
-            # Parse metadata tags (e.g., [ar:Artist])
-            if line.startswith('[') and ':' in line and ']' in line:
-                tag_end = line.find(']')
-                tag = line[1:line.find(':')]
-                value = line[line.find(':')+1:tag_end]
-                
-                if tag not in ['00', '01', '02'] and not tag.replace('.', '').isdigit():
-                    result['metadata'][tag] = value
-                    continue
-            
-            # Parse timed lyrics
-            time_tags = []
-            remaining_line = line
-            
-            while remaining_line.startswith('[') and ']' in remaining_line:
-                tag_end = remaining_line.find(']')
-                potential_time = remaining_line[1:tag_end]
-                
-                # Check if this tag looks like a timestamp
-                if ':' in potential_time and potential_time.replace(':', '').replace('.', '').isdigit():
-                    try:
-                        # Parse time format [mm:ss.xx]
-                        minutes, seconds = potential_time.split(':')
-                        total_seconds = int(minutes) * 60 + float(seconds)
-                        time_tags.append(total_seconds * 1000)  # Convert to milliseconds
-                        
-                        remaining_line = remaining_line[tag_end+1:]
-                    except ValueError:
-                        break
-                else:
-                    break
-            
-            # If we found timestamps and have text remaining, add as a lyric line
-            if time_tags and remaining_line:
-                for time_ms in time_tags:
-                    result['lines'].append({
-                        'time': time_ms,
-                        'text': remaining_line.strip()
-                    })
-        
-        # Sort lines by timestamp
-        result['lines'].sort(key=lambda x: x['time'])
-        
-        return result
+        return parse_lrc(lrc_content).to_dict()
+
     def get_lyrics_for_track(self, track_id):
         """
         Get lyrics for a track.
@@ -148,23 +237,153 @@ class LyricsManager:
         Returns:
             Dictionary with lyrics data or None if not found
         """
-        from .models.library import LibraryManager
-        
-        # Get track details from library
-        library = LibraryManager()
-        track = library.get_track_details(track_id)
-        
-        if not track:
-            return None
-            
-        track_path = track.get('path') if isinstance(track, dict) else getattr(track, 'path', None)
-        
+        cache_id = str(track_id)
+        with self._cache_lock:
+            cached = self._cache.get(cache_id)
+        if cached is not None:
+            track_path = cached[0]
+        else:
+            # Get track details from library
+            track = self.library.get_track_details(track_id)
+            if not track:
+                return None
+            track_path = track.get('path') if isinstance(track, dict) else getattr(track, 'path', None)
+            if not track_path:
+                return None
+        return self._cached_lyrics(cache_id, track_path)
+
+    def get_lyrics_for_path(self, track_path):
+        """
+        Get lyrics for an audio file path (e.g. the playing track).
+
+        Returns:
+            Dictionary with lyrics data or None if not found
+        """
         if not track_path:
             return None
-            
+        return self._cached_lyrics(track_path, track_path)
+
+    def _cached_lyrics(self, cache_id, track_path):
+        """Serve parsed lyrics from the cache while the files are unchanged."""
+        with self._cache_lock:
+            cached = self._cache.get(cache_id)
+        if cached is not None and cached[0] == track_path:
+            _, indexed, cached_key, lyrics = cached
+            # Indexed tracks know their sidecar; others have to probe for one
+            sidecar = cached_key[1] if indexed else self.find_lyrics_file(track_path)
+            if self._validation_key(track_path, sidecar) == cached_key:
+                with self._cache_lock:
+                    if cache_id in self._cache:
+                        self._cache.move_to_end(cache_id)
+                return lyrics
+
+        record = self._index_record(track_path)
+        if record is not None and (record.path is None or self._mtime(record.path) is not None):
+            indexed = True
+            key = self._validation_key(track_path, record.path)
+            lyrics = self._load_indexed_lyrics(record, track_path, key)
+        else:
+            indexed = False
+            key = self._validation_key(track_path, self.find_lyrics_file(track_path))
+            lyrics = self._load_lyrics(track_path, key[1])
+
+        with self._cache_lock:
+            self._cache[cache_id] = (track_path, indexed, key, lyrics)
+            self._cache.move_to_end(cache_id)
+            while len(self._cache) > settings.LYRICS_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return lyrics
+
+    def _index_record(self, track_path):
+        """Lyrics recorded by the library scan for a file, if any."""
+        from .models.database import Track, TrackLyrics
+        session = self.library.db_session
+        try:
+            return session.query(TrackLyrics).join(Track).filter(Track.path == track_path).first()
+        except Exception as e:
+            session.rollback()
+            print(f"Error reading lyrics index: {e}")
+            return None
+
+    def _load_indexed_lyrics(self, record, track_path, key):
+        """Build lyrics data from an index record, re-reading only changed files."""
+        audio_mtime, sidecar, sidecar_mtime = key
+        current = sidecar_mtime if sidecar else audio_mtime
+        content = record.content
+        if current != record.mtime:
+            # Changed since the scan
+            if record.source == 'embedded':
+                return self._load_lyrics(track_path, self.find_lyrics_file(track_path))
+            with open(sidecar, 'r', encoding='utf-8', errors='replace') as f:
+                content = f.read()
+        if record.source == 'lrc_file':
+            return {
+                'type': 'synchronized',
+                'source': 'lrc_file',
+                'content': self.parse_lrc(content)
+            }
+        return {
+            'type': 'plain',
+            'source': record.source,
+            'content': content
+        }
+
+    def search(self, query, limit=20):
+        """
+        Search the lyrics index for a phrase.
+
+        Args:
+            query: Words to search for; the last word may be a prefix
+            limit: Maximum number of results
+
+        Returns:
+            List of dictionaries with the track and a highlighted snippet
+        """
+        from .models.database import Track, TrackLyrics, has_lyrics_index
+        from sqlalchemy import text
+
+        words = query.split()
+        if not words:
+            return []
+        session = self.library.db_session
+        if has_lyrics_index():
+            # Quote every word so user input never acts as FTS syntax
+            terms = ['"' + word.replace('"', '""') + '"' for word in words]
+            terms[-1] += '*'
+            rows = session.execute(text(
+                "SELECT rowid, snippet(lyrics_fts, 0, '[', ']', '...', 12) FROM lyrics_fts "
+                "WHERE lyrics_fts MATCH :match ORDER BY rank LIMIT :limit"
+            ), {'match': ' '.join(terms), 'limit': limit}).all()
+            snippets = dict(rows)
+            records = session.query(TrackLyrics).filter(TrackLyrics.id.in_(snippets)).all()
+            order = {lyrics_id: position for position, lyrics_id in enumerate(snippets)}
+            records.sort(key=lambda record: order[record.id])
+        else:
+            pattern = f"%{' '.join(words)}%"
+            records = session.query(TrackLyrics).filter(TrackLyrics.search_text.ilike(pattern)).limit(limit).all()
+            snippets = {}
+
+        results = []
+        for record in records:
+            snippet = snippets.get(record.id)
+            if snippet is None:
+                # First matching line
+                snippet = next(
+                    (line for line in record.search_text.split('\n') if words[0].lower() in line.lower()),
+                    ''
+                )
+            results.append({
+                'track': record.track.to_dict(),
+                'source': record.source,
+                'snippet': snippet,
+            })
+        return results
+
+    def _load_lyrics(self, track_path, lyrics_path):
+        """Read and parse the lyrics of an audio file (embedded first, then a sidecar file)."""
         # First, check if the audio file has embedded lyrics
         try:
-            embedded_lyrics = self.metadata_manager.read_tags(track_path).get('lyrics')
+            embedded_lyrics = self.metadata_manager.read_lyrics(track_path)
             if embedded_lyrics:
                 return {
                     'type': 'plain',
@@ -174,21 +393,26 @@ class LyricsManager:
         except Exception as e:
             print(f"Error reading embedded lyrics: {e}")
             
-        # Next, look for an LRC file
-        lrc_path = self.find_lrc_file(track_path)
-        if lrc_path:
+        # Next, look for a sidecar file
+        if lyrics_path:
             try:
-                with open(lrc_path, 'r', encoding='utf-8') as f:
-                    lrc_content = f.read()
-                    
-                parsed_lrc = self.parse_lrc(lrc_content)
+                with open(lyrics_path, 'r', encoding='utf-8') as f:
+                    content = f.read()
+
+                source = LYRICS_SIDECAR_EXTENSIONS[os.path.splitext(lyrics_path)[1]]
+                if source != 'lrc_file':
+                    return {
+                        'type': 'plain',
+                        'source': source,
+                        'content': content
+                    }
                 return {
                     'type': 'synchronized',
                     'source': 'lrc_file',
-                    'content': parsed_lrc
+                    'content': self.parse_lrc(content)
                 }
             except Exception as e:
-                print(f"Error reading LRC file: {e}")
+                print(f"Error reading lyrics file: {e}")
                 
         # TODO: If no local lyrics found, could try fetching from an online service
                 
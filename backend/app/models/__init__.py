@@ -4,6 +4,8 @@ This is the model package.
 
 from . import database
 from . import library
+from .changes import ChangeLog
 from .metadata import MetadataManager
 from .player import MusicPlayer
+from .crossfade import CrossfadeScheduler
 from .playlist import PlaylistManager
\ No newline at end of file
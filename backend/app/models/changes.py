@@ -0,0 +1,143 @@
+"""
+Change Log module for versioned delta sync of tracks and playlists.
+
+Every mutation of a track or playlist appends an entry to the ``changes``
+table in the same transaction as the mutation itself.  Entry versions only
+ever grow, so a client that remembers the last version it saw can ask for
+everything after it and patch its local copy of the library instead of
+reloading it.  Entries only reference the changed rows; the current state of
+each row is attached when the feed is read.
+"""
+import time
+from typing import Dict, Any, List, Tuple
+from sqlalchemy import func
+from config import settings
+from .database import Change, Track, Playlist, get_db_session
+
+ENTITIES = ('track', 'playlist')
+
+# SQLite limits the number of bound parameters of an IN clause
+LOOKUP_CHUNK = 500
+
+class ChangeLog:
+    """
+    Append-only log of track and playlist mutations.
+    """
+    def __init__(self):
+        self.db_session = get_db_session()
+
+    def record(self, entity: str, entity_id: int, op: str = 'upsert'):
+        """
+        Add a change to the current transaction; the caller commits.
+
+        Args:
+            entity: 'track' or 'playlist'
+            entity_id: ID of the changed row (flushed, so it is assigned)
+            op: 'upsert' or 'delete'
+
+        Raises:
+            ValueError: If the entity is unknown
+        """
+        if entity not in ENTITIES:
+            raise ValueError(f"Unknown entity: {entity}")
+        self.db_session.add(Change(entity=entity, entity_id=entity_id, op=op, created_at=time.time()))
+
+    def current_version(self) -> int:
+        """Version of the latest change, 0 if nothing changed yet."""
+        return self.db_session.query(func.max(Change.version)).scalar() or 0
+
+    def latest(self) -> Tuple[int, float]:
+        """Version and time of the latest change, (0, None) if nothing changed yet."""
+        row = (
+            self.db_session.query(Change.version, Change.created_at)
+            .order_by(Change.version.desc())
+            .first()
+        )
+        return (row[0], row[1]) if row else (0, None)
+
+    def prune(self, retention: int = None):
+        """
+        Drop entries older than the newest ``retention`` ones; the caller commits.
+
+        Clients whose version is older than the remaining entries get a
+        reset from ``changes_since`` and reload everything.
+        """
+        retention = retention or settings.CHANGE_LOG_RETENTION
+        floor = self.current_version() - retention
+        if floor > 0:
+            self.db_session.query(Change).filter(Change.version <= floor).delete(synchronize_session=False)
+
+    def changes_since(self, version: int, limit: int = None) -> Dict[str, Any]:
+        """
+        Get the changes after a version, one per changed row.
+
+        Args:
+            version: Last version the client has applied
+            limit: Maximum number of log entries read; ``more`` tells if the
+                client has to ask again from the returned version
+
+        Returns:
+            Dictionary with ``since``, ``version`` (the version to ask from
+            next), ``more``, ``reset`` (the client is too far behind or ahead
+            and has to reload everything) and ``changes``.  A change has
+            ``entity``, ``id``, ``op`` and, for upserts, the row as ``data``.
+        """
+        limit = limit or settings.CHANGE_FEED_PAGE_SIZE
+        current = self.current_version()
+        oldest = self.db_session.query(func.min(Change.version)).scalar()
+        result = {'since': version, 'version': current, 'more': False, 'reset': False, 'changes': []}
+        if version > current or (oldest is not None and version < oldest - 1):
+            result['reset'] = True
+            return result
+        if version == current:
+            return result
+
+        entries = (
+            self.db_session.query(Change)
+            .filter(Change.version > version)
+            .order_by(Change.version)
+            .limit(limit)
+            .all()
+        )
+        # The latest entry per row wins; dicts keep the order of first change
+        latest = {}
+        for entry in entries:
+            latest.pop((entry.entity, entry.entity_id), None)
+            latest[(entry.entity, entry.entity_id)] = entry
+        result['version'] = entries[-1].version
+        result['more'] = result['version'] < current
+        result['changes'] = self._with_rows(list(latest.values()))
+        return result
+
+    def _with_rows(self, entries: List[Change]) -> List[Dict[str, Any]]:
+        """Attach the current state of upserted rows."""
+        rows = {}
+        for entity, model in (('track', Track), ('playlist', Playlist)):
+            ids = [entry.entity_id for entry in entries if entry.entity == entity and entry.op == 'upsert']
+            for start in range(0, len(ids), LOOKUP_CHUNK):
+                for row in self.db_session.query(model).filter(model.id.in_(ids[start:start + LOOKUP_CHUNK])):
+                    rows[(entity, row.id)] = self._row_dict(entity, row)
+
+        changes = []
+        for entry in entries:
+            change = {'entity': entry.entity, 'id': entry.entity_id, 'op': entry.op}
+            if entry.op == 'upsert':
+                data = rows.get((entry.entity, entry.entity_id))
+                if data is None:
+                    # Deleted by a change that is not in this page yet
+                    change['op'] = 'delete'
+                else:
+                    change['data'] = data
+            changes.append(change)
+        return changes
+
+    @staticmethod
+    def _row_dict(entity: str, row) -> Dict[str, Any]:
+        data = row.to_dict()
+        if entity == 'playlist':
+            data['track_ids'] = [track.id for track in row.tracks]
+        return data
+
+
+# Create a singleton instance for the application
+change_log = ChangeLog()
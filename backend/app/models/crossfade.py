@@ -0,0 +1,173 @@
+"""
+Crossfade scheduler for overlapping consecutive tracks.
+
+The scheduler runs on its own thread with a fixed tick, independent of any
+HTTP polling.  Near the end of the current track it starts the preloaded next
+track on the standby VLC player of :class:`MusicPlayer` and ramps both volumes
+with ``audio_set_volume`` until the outgoing track is done.
+"""
+import math
+import threading
+import time
+
+import vlc
+
+MAX_CROSSFADE_SECONDS = 12.0
+
+
+def linear_curve(progress: float) -> tuple:
+    """Return (outgoing, incoming) gains for a linear fade."""
+    return 1.0 - progress, progress
+
+
+def equal_power_curve(progress: float) -> tuple:
+    """Return (outgoing, incoming) gains keeping the summed power constant."""
+    angle = progress * math.pi / 2
+    return math.cos(angle), math.sin(angle)
+
+
+CURVES = {
+    'linear': linear_curve,
+    'equal_power': equal_power_curve,
+}
+
+
+class CrossfadeScheduler:
+    """
+    Drive crossfades between the active and standby players of a MusicPlayer.
+
+    Attributes:
+        seconds: Fade length in seconds (0 disables crossfading)
+        curve: Name of the fade curve, one of ``CURVES``
+        tick_ms: Volume ramp resolution in milliseconds
+    """
+    # Upper bound for the poll interval while no fade is imminent
+    IDLE_POLL_SECONDS = 0.25
+
+    def __init__(self, player, seconds: float = 0.0, curve: str = 'equal_power', tick_ms: int = 20):
+        self.player = player
+        self.tick_ms = max(5, int(tick_ms))
+        self.seconds = 0.0
+        self.curve = 'equal_power'
+
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._stats = {
+            'fades_completed': 0,
+            'fades_cancelled': 0,
+            'max_tick_lag_ms': 0.0,
+        }
+        self.configure(seconds, curve)
+
+    def configure(self, seconds: float = None, curve: str = None):
+        """
+        Update the fade settings, starting or stopping the scheduler thread.
+
+        Raises:
+            ValueError: If the length is out of range or the curve is unknown
+        """
+        if seconds is not None:
+            if isinstance(seconds, bool) or not isinstance(seconds, (int, float)):
+                raise ValueError(f"Data type {type(seconds)} not supported.")
+            if not 0 <= seconds <= MAX_CROSSFADE_SECONDS:
+                raise ValueError(f"Crossfade must be between 0 and {MAX_CROSSFADE_SECONDS:g} seconds")
+            self.seconds = float(seconds)
+        if curve is not None:
+            if curve not in CURVES:
+                raise ValueError(f"Unknown crossfade curve: {curve}")
+            self.curve = curve
+
+        if self.seconds > 0:
+            self.start()
+        else:
+            self.stop()
+
+    def start(self):
+        """Start the scheduler thread if it is not running yet."""
+        if self.player.player is None:
+            return
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='crossfade', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the scheduler thread and abort any running fade."""
+        self._stop_event.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1)
+        self._thread = None
+        self.player.cancel_transition()
+
+    def get_stats(self):
+        """Return the current settings and fade counters."""
+        stats = dict(self._stats)
+        stats.update({
+            'seconds': self.seconds,
+            'curve': self.curve,
+            'tick_ms': self.tick_ms,
+            'active': self.player.transition_active,
+        })
+        return stats
+
+    def _remaining(self) -> float:
+        """Seconds left in the active track, or None if unknown."""
+        duration = self.player.duration
+        if duration <= 0:
+            return None
+        return duration - self.player.at
+
+    def _run(self):
+        tick = self.tick_ms / 1000
+        while not self._stop_event.is_set():
+            remaining = self._remaining()
+            if (
+                remaining is None
+                or self.player.next_track is None
+                or self.player.player.get_state() != vlc.State.Playing
+                or remaining > self.seconds
+            ):
+                # Poll less often while the fade point is still far away
+                wait = tick if remaining is None else (remaining - self.seconds) / 2
+                self._stop_event.wait(min(self.IDLE_POLL_SECONDS, max(tick, wait)))
+                continue
+
+            if self.player.begin_transition():
+                self._fade(max(tick, remaining))
+
+    def _fade(self, length: float):
+        """Ramp both players over ``length`` seconds at a fixed tick."""
+        curve = CURVES[self.curve]
+        tick = self.tick_ms / 1000
+        started = time.monotonic()
+        deadline = started
+        outgoing = self.player.player
+
+        while not self._stop_event.is_set():
+            now = time.monotonic()
+            self._stats['max_tick_lag_ms'] = max(
+                self._stats['max_tick_lag_ms'], round((now - deadline) * 1000, 2)
+            )
+            if (
+                not self.player.transition_active
+                or self.player.player is not outgoing
+                or outgoing.get_state() == vlc.State.Paused
+            ):
+                self.player.cancel_transition()
+                self._stats['fades_cancelled'] += 1
+                return
+
+            progress = min(1.0, (now - started) / length)
+            out_gain, in_gain = curve(progress)
+            self.player.apply_transition_gains(out_gain, in_gain)
+            if progress >= 1.0:
+                break
+
+            # Schedule against absolute deadlines so the ramp does not drift
+            deadline += tick
+            self._stop_event.wait(max(0.0, deadline - time.monotonic()))
+
+        if not self._stop_event.is_set():
+            self.player.complete_transition()
+            self._stats['fades_completed'] += 1
@@ -1,14 +1,19 @@
 """
 Database models and configuration for the Acoustic Player application.
-This module sets up SQLAlchemy ORM models for tracks, playlists, and playlist tracks.
+This module sets up SQLAlchemy ORM models for tracks, playlists, playlist tracks,
+track lyrics and the change log.
 """
 # NOTE: This file is reviewed
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, Table, create_engine, event, LargeBinary
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Table, create_engine, event, LargeBinary, Text, inspect, text
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship, sessionmaker, scoped_session
 import os
+import re
 from config import settings
 
+ART_HASH = re.compile(r'^[0-9a-f]{40}$')
+
 # Create database engine
 engine = create_engine(settings.DATABASE_URI, connect_args={"check_same_thread": False})
 db_session = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind=engine))
@@ -16,6 +21,18 @@ db_session = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind
 Base = declarative_base()
 Base.query = db_session.query_property()
 
+def art_content_hash(art_path):
+    """
+    Get the content hash of an album art file named after it (``<sha1>.jpg``).
+
+    Returns:
+        The hex digest, or None for art saved under its track name by older versions
+    """
+    if not art_path:
+        return None
+    stem = os.path.splitext(os.path.basename(art_path))[0]
+    return stem if ART_HASH.match(stem) else None
+
 # Define many-to-many relationship between playlists and tracks
 playlist_tracks = Table(
     'playlist_tracks',
@@ -39,6 +56,13 @@ class Track(Base):
     year = Column(Integer, nullable=True)
     album_art_path = Column(String(255), nullable=True)
     album_art_thumbnail = Column(LargeBinary, nullable=True)
+    # Loudness analysis results (see app/loudness.py)
+    loudness_lufs = Column(Float, nullable=True)
+    track_gain_db = Column(Float, nullable=True)
+    track_peak = Column(Float, nullable=True)
+    album_gain_db = Column(Float, nullable=True)
+    album_peak = Column(Float, nullable=True)
+    loudness_mtime = Column(Float, nullable=True)  # File mtime at analysis time
     
     # Relationship: a track can be in multiple playlists
     playlists = relationship(
@@ -46,6 +70,13 @@ class Track(Base):
         secondary=playlist_tracks,
         back_populates="tracks"
     )
+    # Lyrics found while scanning (embedded tags or a sidecar file)
+    lyrics = relationship(
+        "TrackLyrics",
+        uselist=False,
+        back_populates="track",
+        cascade="all, delete-orphan"
+    )
     def to_dict(self):
         """Convert track to dictionary for serialization."""
         return {
@@ -59,9 +90,15 @@ class Track(Base):
             'genre': self.genre,
             'year': self.year,
             'album_art_path': self.album_art_path,
+            'art_hash': self.art_hash,
             'has_thumbnail': self.album_art_thumbnail is not None
         }
         
+    @property
+    def art_hash(self):
+        """Content hash of the full-size album art, None if it is not content-addressed."""
+        return art_content_hash(self.album_art_path)
+
     def get_thumbnail_base64(self):
         """
         Get the album art thumbnail as a base64-encoded string.
@@ -76,6 +113,20 @@ class Track(Base):
             return f"data:image/jpeg;base64,{b64_data}"
         return None
 
+class TrackLyrics(Base):
+    """Lyrics of a track as recorded by the library scan."""
+    __tablename__ = 'lyrics'
+
+    id = Column(Integer, primary_key=True)
+    track_id = Column(Integer, ForeignKey('tracks.id'), unique=True, nullable=False)
+    source = Column(String(20), nullable=False)     # 'embedded', 'lrc_file' or 'txt_file'
+    path = Column(String(255), nullable=True)       # Sidecar file, None for embedded lyrics
+    mtime = Column(Float, nullable=True)            # Mtime of the source file when scanned
+    content = Column(Text, nullable=False)          # Raw lyrics (LRC markup kept)
+    search_text = Column(Text, nullable=False)      # Plain text indexed for full-text search
+
+    track = relationship("Track", back_populates="lyrics")
+
 class Playlist(Base):
     """Playlist model representing a collection of tracks."""
     __tablename__ = 'playlists'
@@ -104,9 +155,77 @@ class Playlist(Base):
             'track_count': self.track_count
         }
 
+class Change(Base):
+    """One entry of the change log of tracks and playlists (see app/models/changes.py)."""
+    __tablename__ = 'changes'
+    # AUTOINCREMENT so versions are never reused after old entries are pruned
+    __table_args__ = {'sqlite_autoincrement': True}
+
+    version = Column(Integer, primary_key=True)
+    entity = Column(String(20), nullable=False)     # 'track' or 'playlist'
+    entity_id = Column(Integer, nullable=False)
+    op = Column(String(10), nullable=False)         # 'upsert' or 'delete'
+    created_at = Column(Float, nullable=True)       # Unix time of the change (Last-Modified of the feed)
+
 def init_db():
     """Initialize the database by creating all tables."""
     Base.metadata.create_all(bind=engine)
+    _add_missing_columns()
+    _create_lyrics_index()
+
+# SQLite FTS5 index over lyrics.search_text, kept in sync by triggers
+LYRICS_FTS_STATEMENTS = (
+    "CREATE VIRTUAL TABLE lyrics_fts USING fts5(search_text, content='lyrics', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS lyrics_fts_insert AFTER INSERT ON lyrics BEGIN "
+    "INSERT INTO lyrics_fts(rowid, search_text) VALUES (new.id, new.search_text); END",
+    "CREATE TRIGGER IF NOT EXISTS lyrics_fts_delete AFTER DELETE ON lyrics BEGIN "
+    "INSERT INTO lyrics_fts(lyrics_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text); END",
+    "CREATE TRIGGER IF NOT EXISTS lyrics_fts_update AFTER UPDATE ON lyrics BEGIN "
+    "INSERT INTO lyrics_fts(lyrics_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text); "
+    "INSERT INTO lyrics_fts(rowid, search_text) VALUES (new.id, new.search_text); END",
+    "INSERT INTO lyrics_fts(lyrics_fts) VALUES ('rebuild')",
+)
+
+def _create_lyrics_index():
+    """Create the lyrics full-text index if the database supports it."""
+    if engine.dialect.name != 'sqlite' or inspect(engine).has_table('lyrics_fts'):
+        return
+    try:
+        with engine.begin() as connection:
+            for statement in LYRICS_FTS_STATEMENTS:
+                connection.execute(text(statement))
+    except OperationalError as e:
+        # SQLite built without FTS5; lyrics search falls back to LIKE
+        print(f"Lyrics full-text index unavailable: {e}")
+
+_lyrics_index = None
+
+def has_lyrics_index() -> bool:
+    """Whether the lyrics full-text index exists (checked once)."""
+    global _lyrics_index
+    if _lyrics_index is None:
+        _lyrics_index = engine.dialect.name == 'sqlite' and inspect(engine).has_table('lyrics_fts')
+    return _lyrics_index
+
+def _add_missing_columns():
+    """
+    Add columns introduced after a table was first created.
+
+    ``create_all`` only creates missing tables, so databases created by an
+    older version would otherwise lack newly added (nullable) columns.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    connection.execute(text(
+                        f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'
+                    ))
 
 def get_db_session():
     """Get a database session."""
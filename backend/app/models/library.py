@@ -3,11 +3,15 @@ Library Manager module for managing audio track library.
 """
 import os
 import glob
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator
 from sqlalchemy.exc import SQLAlchemyError
 from config import settings
-from .database import Track, get_db_session
+from .database import Track, TrackLyrics, get_db_session
 from .metadata import MetadataManager
+from .changes import change_log
+
+# Lyrics sidecar extensions in order of preference, with their source name
+LYRICS_SIDECAR_EXTENSIONS = {'.lrc': 'lrc_file', '.txt': 'txt_file'}
 
 class LibraryManager:
     """
@@ -38,6 +42,16 @@ class LibraryManager:
             "tracks_added": 0,
             "tracks_updated": 0
         }
+
+        # Added or modified tracks, recorded in the change log
+        changed = []
+        # Tracks whose served lyrics changed, dropped from the lyrics cache
+        lyrics_changed = []
+
+        # Collect lyrics sidecars once instead of probing for every track
+        sidecars = set()
+        for ext in LYRICS_SIDECAR_EXTENSIONS:
+            sidecars.update(glob.glob(os.path.join(path, f"**/*{ext}"), recursive=True))
         
         # Scan directory recursively for audio files
         for ext in extensions:
@@ -67,7 +81,11 @@ class LibraryManager:
                             existing_track.album_art_path = album_art_path
                         if thumbnail_data:
                             existing_track.album_art_thumbnail = thumbnail_data
-                            
+
+                        if self._record_lyrics(existing_track, metadata.get('lyrics'), sidecars):
+                            lyrics_changed.append(existing_track)
+                        if self.db_session.is_modified(existing_track):
+                            changed.append(existing_track)
                         stats["tracks_updated"] += 1
                     else:
                         # Create new track
@@ -83,7 +101,10 @@ class LibraryManager:
                             album_art_path=album_art_path,
                             album_art_thumbnail=thumbnail_data
                         )
+                        if self._record_lyrics(track, metadata.get('lyrics'), sidecars):
+                            lyrics_changed.append(track)
                         self.db_session.add(track)
+                        changed.append(track)
                         stats["tracks_added"] += 1
                 except Exception as e:
                     print(f"Error processing file {file_path}: {str(e)}")
@@ -91,12 +112,70 @@ class LibraryManager:
         
         # Commit changes to database
         try:
+            self.db_session.flush()
+            for track in changed:
+                change_log.record('track', track.id)
+            change_log.prune()
             self.db_session.commit()
         except SQLAlchemyError as e:
             self.db_session.rollback()
             raise RuntimeError(f"Database error: {str(e)}")
+
+        # Cached lyrics of rescanned tracks may be stale, or may now come
+        # from the index instead of probing
+        from ..lyrics import lyrics_manager
+        for track in lyrics_changed:
+            lyrics_manager.invalidate(track.id, track.path)
         
         return stats
+
+    def _record_lyrics(self, track: Track, embedded: str, sidecars: set):
+        """
+        Record the lyrics a track is served with: embedded lyrics first, then
+        a sidecar file next to the audio file (.lrc before .txt).
+
+        Args:
+            track: Track being scanned
+            embedded: Embedded lyrics from the tags, if any
+            sidecars: Sidecar file paths found by the scan
+
+        Returns:
+            True if the recorded lyrics changed
+        """
+        from ..lyrics import lyrics_search_text
+
+        source, sidecar = None, None
+        if embedded:
+            source = 'embedded'
+        else:
+            base_path = os.path.splitext(track.path)[0]
+            for ext in LYRICS_SIDECAR_EXTENSIONS:
+                if base_path + ext in sidecars:
+                    source, sidecar = LYRICS_SIDECAR_EXTENSIONS[ext], base_path + ext
+                    break
+        if source is None:
+            changed = track.lyrics is not None
+            track.lyrics = None
+            return changed
+
+        mtime = os.path.getmtime(sidecar or track.path)
+        record = track.lyrics
+        if record is not None and (record.source, record.path, record.mtime) == (source, sidecar, mtime):
+            return False  # Unchanged, keep the index untouched
+        if sidecar:
+            with open(sidecar, 'r', encoding='utf-8', errors='replace') as f:
+                content = f.read()
+        else:
+            content = embedded
+        if record is None:
+            record = TrackLyrics()
+            track.lyrics = record
+        record.source = source
+        record.path = sidecar
+        record.mtime = mtime
+        record.content = content
+        record.search_text = lyrics_search_text(source, content)
+        return True
     
     def get_tracks(self, sort_by: str = 'title', filter: str = '') -> List[Track]:
         """
@@ -109,7 +188,28 @@ class LibraryManager:
         Returns:
             List of Track objects
         """
-        query = self.db_session.query(Track)
+        return self._tracks_query(sort_by, filter).all()
+
+    def iter_tracks(self, sort_by: str = 'title', filter: str = '', batch_size: int = None,
+                    columns: tuple = None) -> Iterator[Any]:
+        """
+        Iterate over tracks like ``get_tracks`` without loading them all at once.
+
+        Rows are fetched ``batch_size`` at a time, so memory stays flat for
+        any library size.
+
+        Args:
+            columns: Track columns to select; rows are then plain tuples
+                instead of Track objects
+
+        Returns:
+            Iterator of Track objects or tuples; the query runs when this is called
+        """
+        query = self._tracks_query(sort_by, filter, columns)
+        return iter(query.yield_per(batch_size or settings.STREAM_BATCH_ROWS))
+
+    def _tracks_query(self, sort_by: str, filter: str, columns: tuple = None):
+        query = self.db_session.query(*columns) if columns else self.db_session.query(Track)
         
         # Apply filter if provided
         if filter:
@@ -130,7 +230,7 @@ class LibraryManager:
         elif sort_by == 'duration':
             query = query.order_by(Track.duration)
         
-        return query.all()
+        return query
     
     def search_tracks(self, query: str) -> List[Track]:
         """
@@ -144,15 +244,22 @@ class LibraryManager:
         """
         if not query:
             return []
-        
+        return self._search_query(query).all()
+
+    def iter_search_tracks(self, query: str, batch_size: int = None, columns: tuple = None) -> Iterator[Any]:
+        """Iterate over ``search_tracks`` results in batches (see ``iter_tracks``)."""
+        if not query:
+            return iter(())
+        return iter(self._search_query(query, columns).yield_per(batch_size or settings.STREAM_BATCH_ROWS))
+
+    def _search_query(self, query: str, columns: tuple = None):
         search_query = f"%{query}%"
-        results = self.db_session.query(Track).filter(
+        base = self.db_session.query(*columns) if columns else self.db_session.query(Track)
+        return base.filter(
             (Track.title.ilike(search_query)) |
             (Track.artist.ilike(search_query)) |
             (Track.album.ilike(search_query))
-        ).all()
-        
-        return results
+        )
     
     def get_album_art(self, track_id: int) -> Optional[str]:
         """
@@ -175,9 +282,10 @@ class LibraryManager:
         
         # Try to extract album art from the audio file
         try:
-            art_path = self.metadata_manager.extract_embedded_art(track.path)
+            art_path, _ = self.metadata_manager.extract_embedded_art(track.path)
             if art_path:
                 track.album_art_path = art_path
+                change_log.record('track', track.id)
                 self.db_session.commit()
                 return art_path
         except Exception as e:
@@ -225,6 +333,8 @@ class LibraryManager:
         )
         
         self.db_session.add(track)
+        self.db_session.flush()
+        change_log.record('track', track.id)
         self.db_session.commit()
         
         return track
@@ -239,4 +349,19 @@ class LibraryManager:
         Returns:
             Track object or None if not found
         """
-        return self.db_session.query(Track).filter_by(id=track_id).first()
\ No newline at end of file
+        return self.db_session.query(Track).filter_by(id=track_id).first()
+
+    def get_thumbnails(self, track_ids: List[int]) -> Dict[int, bytes]:
+        """
+        Get the album art thumbnails of several tracks in one query.
+
+        Args:
+            track_ids: IDs of the tracks
+
+        Returns:
+            Dictionary of track ID to thumbnail bytes, for tracks that have one
+        """
+        rows = self.db_session.query(Track.id, Track.album_art_thumbnail).filter(
+            Track.id.in_(track_ids), Track.album_art_thumbnail.isnot(None)
+        )
+        return {track_id: thumbnail for track_id, thumbnail in rows}
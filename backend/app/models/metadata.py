@@ -10,6 +10,7 @@ Use in the Acoustic Player Application:
 import os
 import logging
 import io
+import hashlib
 from PIL import Image
 from mutagen import File
 import base64
@@ -119,6 +120,40 @@ class MetadataManager:
         duration = float(getattr(audio.info, 'length', 0.0))
         return info, duration, album_art
 
+    @staticmethod
+    def read_lyrics(file_path: str) -> str:
+        """
+        Read only the embedded lyrics of an audio file.
+
+        Unlike :meth:`read_tags` this neither normalizes every tag nor
+        extracts album art.
+
+        Returns:
+            Lyrics text, or an empty string if there are none
+        """
+        audio = File(file_path)
+        if audio is None:
+            raise ValueError(f"Unsupported or unrecognized file format: {file_path}")
+        return MetadataManager.find_lyrics((audio.tags or {}).items())
+
+    @staticmethod
+    def find_lyrics(items) -> str:
+        """
+        Pick the lyrics out of (key, value) tag pairs.
+
+        Handles Vorbis comments, ID3 USLT frames and the MP4 lyrics atom,
+        both as raw mutagen values and as normalized strings.
+        """
+        for key, value in items:
+            key_lower = key.lower()
+            if key_lower in ('lyrics', 'unsyncedlyrics', '\xa9lyr') or key_lower.startswith('uslt'):
+                text = getattr(value, 'text', value)
+                if isinstance(text, (list, tuple)):
+                    text = '\n'.join(map(str, text))
+                if text:
+                    return str(text)
+        return ''
+
     @staticmethod
     def get_duration(file_path: str, is_formatted=True) -> str:
         """
@@ -185,14 +220,18 @@ class MetadataManager:
             image = self.get_album_art(file_path)
             if not image:
                 return None, None
-            base_name = os.path.splitext(os.path.basename(file_path))[0]
-            art_filename = f"{base_name}_cover.jpg"
-            art_path = os.path.join(self.album_art_dir, art_filename)
             # Save the full-size image as JPEG (convert to RGB if needed)
             if image.mode != 'RGB':
                 image = image.convert('RGB')
+            buffer = io.BytesIO()
+            image.save(buffer, "JPEG")
+            data = buffer.getvalue()
 
-            image.save(art_path, "JPEG")
+            # Content-addressed: tracks of an album share one file, and the
+            # name changes whenever the picture does, so it can be cached forever
+            art_path = os.path.join(self.album_art_dir, f"{hashlib.sha1(data).hexdigest()}.jpg")
+            if not os.path.exists(art_path):
+                utils.write_bytes_atomic(art_path, data)
 
             thumbnail_data = self.generate_thumbnail(image)
             return art_path, thumbnail_data
@@ -226,7 +265,7 @@ class MetadataManager:
                 'track_num': int(metadata.get('tracknumber', '0').split('/')[0]) if metadata.get('tracknumber') else 0,
                 'genre': metadata.get('genre', ''),
                 'year': int(metadata.get('date', '0')[:4]) if metadata.get('date') else None,
-                'lyrics': metadata.get('lyrics', '')
+                'lyrics': self.find_lyrics(metadata.items())
             }
             
             return result
@@ -4,10 +4,15 @@ This is the core playback engine.
 # NOTE: This code has been reviewed by Zihao
 import vlc
 import os
+import threading
+import time
+
+# VLC accepts volumes above 100% (software amplification)
+MAX_VOLUME = 200
 
 class MusicPlayer:
     """Core playback engine."""
-    def __init__(self):
+    def __init__(self, gapless: bool = True):
         """Initialize the VLC player instance.
 
         On systems where the native ``libvlc`` library is not available,
@@ -15,6 +20,14 @@ class MusicPlayer:
         unit tests runnable in such environments we catch the error and put the
         player into a disabled state.  All playback related methods will then
         raise a ``RuntimeError`` explaining the situation.
+
+        When ``gapless`` is enabled, a second (standby) media player holds the
+        next queued track, already opened and parsed, so that switching over
+        at end-of-track only costs a ``play()`` call.
+
+        ``gain_provider`` may be set to a callable returning a loudness
+        normalization gain (dB) for a file path; the gain is applied on top of
+        the user volume whenever a track is loaded.
         """
         try:
             self.instance = vlc.Instance()
@@ -27,18 +40,85 @@ class MusicPlayer:
 
         self.media = None
         self.current_track = None   # A file path string
+        self.volume = 100           # User volume, before any fade is applied
+        self.gain_provider = None   # Callable: file path -> gain in dB or None
+        self.gain_db = 0.0          # Normalization gain of the current track
+        self._next_gain_db = 0.0
+        self._listeners = []        # Callables notified of state changes
+
+        # Gapless playback state
+        self.gapless = gapless
+        self.next_track = None      # File path preloaded on the standby player
+        self._next_media = None
+        self._standby = None
+        self._switch_lock = threading.Lock()
+        self._end_reached_at = None
+        self._transition_active = False  # Crossfade in progress
+        self._gap_stats = {
+            "transitions": 0,
+            "last_gap_ms": None,
+            "avg_gap_ms": None,
+            "max_gap_ms": None,
+        }
 
         if self.player is not None:
-            self.events = self.player.event_manager()
-            self.events.event_attach(
-                vlc.EventType.MediaPlayerEndReached, self._on_end
-            )
-            self.events.event_attach(
-                vlc.EventType.MediaPlayerEncounteredError, self._on_error
-            )
+            self.events = self._attach_events(self.player)
+            self._standby = self.instance.media_player_new()
+            self._attach_events(self._standby)
         else:
             self.events = None
 
+    def _attach_events(self, player):
+        """Attach the end/error/playing callbacks to a VLC media player.
+
+        The player is passed along to the callbacks so events coming from the
+        standby player (or a player that was just swapped out) can be told
+        apart from events of the active one.
+        """
+        events = player.event_manager()
+        events.event_attach(
+            vlc.EventType.MediaPlayerEndReached, self._on_end, player
+        )
+        events.event_attach(
+            vlc.EventType.MediaPlayerEncounteredError, self._on_error, player
+        )
+        events.event_attach(
+            vlc.EventType.MediaPlayerPlaying, self._on_playing, player
+        )
+        events.event_attach(
+            vlc.EventType.MediaPlayerPaused, self._on_state_event, player
+        )
+        events.event_attach(
+            vlc.EventType.MediaPlayerStopped, self._on_state_event, player
+        )
+        return events
+
+    def add_listener(self, callback):
+        """Register a callable notified with an event name on state changes.
+
+        Callables receive ``(event_name, position)``; ``position`` is the
+        target position in seconds for seeks (libvlc applies ``set_time``
+        asynchronously, so ``get_time`` may still return the old position)
+        and None otherwise.
+
+        Listeners may be called from libvlc's event thread and must return
+        quickly without calling back into the player's VLC objects; the
+        WebSocket layer only queues the event for its dispatcher.
+        """
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self, event_name: str, position: float = None):
+        for callback in list(self._listeners):
+            try:
+                callback(event_name, position)
+            except Exception as e:
+                print(f"Error in player listener: {e}")
+
     def load_music(self, file_path: str):
         if self.player is None:
             raise RuntimeError(
@@ -46,9 +126,48 @@ class MusicPlayer:
             )
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"File not found: {file_path}")
+        if self._transition_active:
+            self.cancel_transition()
         self.media = self.instance.media_new(file_path)
         self.player.set_media(self.media)
         self.current_track = file_path
+        self.gain_db = self._gain_for(file_path)
+        self.player.audio_set_volume(self._scaled_volume(self.gain_db))
+
+    def preload(self, file_path: str):
+        """Open and parse the next track on the standby player.
+
+        The media is parsed asynchronously by VLC, so by the time the current
+        track ends its demuxer information is available and the switch-over
+        does not wait on (possibly network) storage.
+
+        Args:
+            file_path: Path of the track that should follow the current one
+        """
+        if self.player is None:
+            raise RuntimeError(
+                f"VLC backend not available: {self._init_error}"
+            )
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"File not found: {file_path}")
+        media = self.instance.media_new(file_path)
+        media.parse_with_options(
+            vlc.MediaParseFlag.local | vlc.MediaParseFlag.network, 0
+        )
+        gain_db = self._gain_for(file_path)
+        with self._switch_lock:
+            self._next_gain_db = gain_db
+            self._standby.set_media(media)
+            self._next_media = media
+            self.next_track = file_path
+
+    def clear_preload(self):
+        """Drop the track queued on the standby player, if any."""
+        with self._switch_lock:
+            if self._standby is not None:
+                self._standby.stop()
+            self._next_media = None
+            self.next_track = None
 
     def play(self, file_path: str):
         """Convenience method to load a track and start playback."""
@@ -97,14 +216,40 @@ class MusicPlayer:
         duration_ms = self.duration * 1000
         if 0 <= position_ms <= duration_ms:
             self.player.set_time(int(position_ms))
+            self._notify("seek", position_ms / 1000)
+
+    def set_rate(self, rate: float):
+        if not isinstance(rate, (int, float)) or rate <= 0:
+            raise ValueError(f"Invalid playback rate: {rate}")
+        if self.player is not None:
+            self.player.set_rate(float(rate))
+            self._notify("rate")
 
     def set_volume(self, level: int):
         if not isinstance(level, (int, float)):
             raise ValueError(f"Data type {type(level)} not supported.")
         level = int(level)
         level = max(0, min(100, level))
-        if self.player is not None:
-            self.player.audio_set_volume(level)
+        self.volume = level
+        if self.player is not None and not self._transition_active:
+            self.player.audio_set_volume(self._scaled_volume(self.gain_db))
+
+    def refresh_gain(self) -> float:
+        """
+        Look up the normalization gains again (e.g. after the mode changed)
+        and apply the current track's gain to the volume.
+
+        Returns:
+            The current track's gain in dB
+        """
+        gain_db = self._gain_for(self.current_track) if self.current_track else 0.0
+        with self._switch_lock:
+            self.gain_db = gain_db
+            if self.next_track:
+                self._next_gain_db = self._gain_for(self.next_track)
+        if self.player is not None and not self._transition_active:
+            self.player.audio_set_volume(self._scaled_volume(self.gain_db))
+        return self.gain_db
 
     @property
     def duration(self):
@@ -117,19 +262,32 @@ class MusicPlayer:
             dur = self.media.get_duration()
         return dur / 1000 if dur > 0 else 0
 
+    @property
+    def rate(self):
+        if self.player is None:
+            return 1.0
+        return self.player.get_rate()
+
     @property
     def at(self):
         if self.player is None:
             return 0
         return self.player.get_time() / 1000
 
+    def get_gap_stats(self):
+        """Return measured end-of-track to next-track-playing gaps (ms)."""
+        stats = dict(self._gap_stats)
+        stats["gapless"] = self.gapless
+        stats["next_track"] = self.next_track
+        return stats
+
     def get_status(self):
         if self.player is None:
             state = "unavailable"
             volume = 0
         else:
             state = str(self.player.get_state())
-            volume = self.player.audio_get_volume()
+            volume = self.volume
         return {
             "state": state,
             "current_track": self.current_track,
@@ -144,25 +302,144 @@ class MusicPlayer:
     TODO: Automatic next track
     TODO: Better error handling
     """
-    def _on_end(self, event):
+    def _gain_for(self, file_path: str) -> float:
+        """Look up the normalization gain of a track, 0 dB if unknown."""
+        if self.gain_provider is None:
+            return 0.0
+        try:
+            gain_db = self.gain_provider(file_path)
+        except Exception as e:
+            print(f"Error looking up gain for {file_path}: {e}")
+            return 0.0
+        return gain_db or 0.0
+
+    def _scaled_volume(self, gain_db: float, fraction: float = 1.0) -> int:
+        """VLC volume for the user volume with a gain and fade applied."""
+        level = self.volume * fraction * 10 ** (gain_db / 20)
+        return max(0, min(MAX_VOLUME, int(round(level))))
+
+    @property
+    def transition_active(self):
+        return self._transition_active
+
+    def begin_transition(self) -> bool:
+        """Start the preloaded track, silent, on the standby player.
+
+        Used by the crossfade scheduler; the two players then run side by side
+        until :meth:`complete_transition` or :meth:`cancel_transition`.
+
+        Returns:
+            True if a transition was started, False if nothing is preloaded
+        """
+        with self._switch_lock:
+            if self._next_media is None or self._transition_active:
+                return False
+            self._standby.audio_set_volume(0)
+            self._standby.play()
+            self._transition_active = True
+            return True
+
+    def apply_transition_gains(self, out_gain: float, in_gain: float):
+        """Set outgoing/incoming volumes as fractions of the user volume."""
+        with self._switch_lock:
+            if not self._transition_active:
+                return
+            self.player.audio_set_volume(self._scaled_volume(self.gain_db, out_gain))
+            self._standby.audio_set_volume(self._scaled_volume(self._next_gain_db, in_gain))
+
+    def complete_transition(self):
+        """Make the incoming (already playing) track the active one."""
+        if self._transition_active:
+            self._switch_to_next(start=False)
+
+    def cancel_transition(self):
+        """Abort a running transition and keep the next track preloaded."""
+        with self._switch_lock:
+            if not self._transition_active:
+                return
+            self._transition_active = False
+            self._standby.stop()
+            self.player.audio_set_volume(self._scaled_volume(self.gain_db))
+
+    def _switch_to_next(self, start: bool = True):
+        """Swap the standby player in, starting the preloaded track if needed."""
+        with self._switch_lock:
+            if self._next_media is None:
+                return
+            finished = self.player
+            self.player, self._standby = self._standby, finished
+            self.media = self._next_media
+            self.current_track = self.next_track
+            self._next_media = None
+            self.next_track = None
+            self._transition_active = False
+            self.gain_db = self._next_gain_db
+            self.player.audio_set_volume(self._scaled_volume(self.gain_db))
+            if start:
+                self.player.play()
+        finished.stop()
+        self._notify("track_changed")
+
+    def _record_gap(self):
+        """Record the gap between the previous end and the current start."""
+        gap_ms = (time.monotonic() - self._end_reached_at) * 1000
+        self._end_reached_at = None
+        stats = self._gap_stats
+        count = stats["transitions"]
+        stats["transitions"] = count + 1
+        stats["last_gap_ms"] = round(gap_ms, 2)
+        stats["avg_gap_ms"] = round(
+            ((stats["avg_gap_ms"] or 0) * count + gap_ms) / (count + 1), 2
+        )
+        stats["max_gap_ms"] = round(max(stats["max_gap_ms"] or 0, gap_ms), 2)
+
+    def _on_playing(self, event, player=None):
+        """Handle playback start, measuring the gap after a switch-over."""
+        if player is not self.player:
+            return
+        if self._end_reached_at is not None:
+            self._record_gap()
+        self._notify("playing")
+
+    def _on_state_event(self, event, player=None):
+        """Forward pause/stop of the active player to the listeners."""
+        if player is self.player:
+            self._notify("paused" if event.type == vlc.EventType.MediaPlayerPaused else "stopped")
+
+    def _on_end(self, event, player=None):
         """Handle track end event."""
+        if player is not None and player is not self.player:
+            return  # Stale event from a player that was already swapped out
+        if self._transition_active:
+            return  # The crossfade scheduler completes the switch-over
         print("Track finished.")
-        # Emit WebSocket event when track ends
-        try:
-            from ..ws.events import emit_player_status
-            emit_player_status(self.get_status())
-        except ImportError:
-            pass  # WebSocket not available
+        if self.gapless and self._next_media is not None:
+            self._end_reached_at = time.monotonic()
+            # libvlc must not be re-entered from its own event thread
+            threading.Thread(target=self._switch_to_next, daemon=True).start()
+            return
+        self._notify("ended")
 
-    def _on_error(self, event):
+    def _on_error(self, event, player=None):
         """Handle playback error event."""
-        print("Playback error occurred.")
-        # Emit WebSocket event on error
-        try:
-            from ..ws.events import emit_player_status  
-            emit_player_status(self.get_status())
-        except ImportError:
-            pass  # WebSocket not available
+        if player is not None and player is self._standby:
+            # The preloaded track is unusable, fall back to a regular stop.
+            # The lock may be held by a thread waiting on libvlc, which must
+            # not be blocked from its own event thread
+            threading.Thread(
+                target=self._drop_failed_preload, args=(player, player.get_media()), daemon=True
+            ).start()
+            return
+        self._notify("error")
+
+    def _drop_failed_preload(self, player, media):
+        """Forget a preload whose standby player reported an error."""
+        with self._switch_lock:
+            if player is not self._standby or self._next_media is not media:
+                return  # Swapped in or replaced in the meantime
+            self._next_media = None
+            self.next_track = None
+        self._notify("preload_failed")
 
     
 
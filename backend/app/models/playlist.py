@@ -3,13 +3,16 @@ Playlist model for managing playlists in the application.
 
 - Create and manage playlists.
 - Add, remove, and reorder tracks in playlists.
+- Record every mutation in the change log for delta sync.
 - Use the MetadataManager to extract metadata and album art for tracks.
 - Use the MusicPlayer to play tracks from the playlist.
 """
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy import and_, func
+from config import settings
 from .database import Playlist, Track, playlist_tracks, get_db_session
+from .changes import change_log
 
 class PlaylistManager:
     """
@@ -32,6 +35,8 @@ class PlaylistManager:
         
         try:
             self.db_session.add(playlist)
+            self.db_session.flush()
+            change_log.record('playlist', playlist.id)
             self.db_session.commit()
             return playlist
         except SQLAlchemyError as e:
@@ -55,6 +60,7 @@ class PlaylistManager:
         
         try:
             self.db_session.delete(playlist)
+            change_log.record('playlist', playlist.id, 'delete')
             self.db_session.commit()
             return True
         except SQLAlchemyError as e:
@@ -104,6 +110,7 @@ class PlaylistManager:
                 position=next_position
             )
             self.db_session.execute(stmt)
+            change_log.record('playlist', playlist.id)
             self.db_session.commit()
             return True
         except SQLAlchemyError as e:
@@ -168,6 +175,7 @@ class PlaylistManager:
                 ).values(position=track.position - 1)
                 self.db_session.execute(update_stmt)
             
+            change_log.record('playlist', playlist.id)
             self.db_session.commit()
             return True
         except SQLAlchemyError as e:
@@ -191,6 +199,27 @@ class PlaylistManager:
         
         return playlist.tracks
     
+    def iter_playlist_tracks(self, playlist_id: int, batch_size: int = None, columns: tuple = None) -> Iterator[Any]:
+        """
+        Iterate over the tracks of a playlist in order, fetched in batches.
+
+        Args:
+            playlist_id: ID of the playlist
+            batch_size: Rows fetched at a time
+            columns: Track columns to select; rows are then plain tuples
+
+        Returns:
+            Iterator of Track objects or tuples (empty for an unknown playlist)
+        """
+        base = self.db_session.query(*columns) if columns else self.db_session.query(Track)
+        query = (
+            base
+            .join(playlist_tracks, playlist_tracks.c.track_id == Track.id)
+            .filter(playlist_tracks.c.playlist_id == playlist_id)
+            .order_by(playlist_tracks.c.position)
+        )
+        return iter(query.yield_per(batch_size or settings.STREAM_BATCH_ROWS))
+    
     def list_playlists(self) -> List[Playlist]:
         """
         List all playlists.
@@ -0,0 +1,188 @@
+"""
+Waveform Peak Pyramid
+This module computes multi-resolution min/max/RMS waveform summaries.
+
+The finest level is computed in a single streaming pass over the decoded
+audio; every coarser level is reduced from the level below it, so a client
+can zoom from the whole track down to a few hundred samples per bucket
+without touching the audio again.
+
+Binary file layout (little endian)::
+
+    header   4s magic 'APPK', B version, B level count, H reduction factor,
+             I sample rate, I samples per bucket of level 0, d duration
+    index    I bucket count for every level
+    data     per level: int8 min[n], int8 max[n], int8 rms[n]
+"""
+import struct
+import numpy as np
+from .artifact_cache import artifact_cache
+from .audio_io import read_audio_blocks, downmix
+
+MAGIC = b'APPK'
+VERSION = 1
+HEADER = struct.Struct('<4sBBHIId')
+
+# Samples per bucket of the finest level and reduction factor between levels
+BASE_BUCKET = 256
+REDUCTION_FACTOR = 4
+# Coarsest level is reached once a level has at most this many buckets
+MIN_BUCKETS = 512
+
+
+def _quantize(values: np.ndarray) -> np.ndarray:
+    return np.clip(np.round(values * 127), -127, 127).astype(np.int8)
+
+
+class PeakPyramid:
+    """
+    Min/max/RMS buckets of a track at several zoom levels.
+
+    Attributes:
+        sample_rate: Sample rate of the source audio
+        duration: Duration of the source audio in seconds
+        levels: List of (min, max, rms) int8 arrays, finest level first
+    """
+
+    def __init__(self, sample_rate: int, duration: float, levels, base_bucket: int = BASE_BUCKET,
+                 factor: int = REDUCTION_FACTOR):
+        self.sample_rate = sample_rate
+        self.duration = duration
+        self.levels = levels
+        self.base_bucket = base_bucket
+        self.factor = factor
+
+    @classmethod
+    def from_file(cls, file_path: str, base_bucket: int = BASE_BUCKET, factor: int = REDUCTION_FACTOR):
+        """Build the pyramid of an audio file in one streaming pass."""
+        sample_rate, channels, blocks = read_audio_blocks(file_path)
+        mins, maxs, squares = [], [], []
+        carry = np.empty(0, dtype=np.float32)
+        total = 0
+        for block in blocks:
+            total += len(block)
+            mono = downmix(block)
+            data = np.concatenate([carry, mono]) if len(carry) else mono
+            usable = len(data) - len(data) % base_bucket
+            carry = data[usable:]
+            if usable:
+                buckets = data[:usable].reshape(-1, base_bucket)
+                mins.append(buckets.min(axis=1))
+                maxs.append(buckets.max(axis=1))
+                squares.append(np.square(buckets).mean(axis=1))
+        if len(carry):
+            mins.append(carry.min(keepdims=True))
+            maxs.append(carry.max(keepdims=True))
+            squares.append(np.square(carry).mean(keepdims=True))
+
+        empty = np.zeros(0, dtype=np.float32)
+        level_min = np.concatenate(mins) if mins else empty
+        level_max = np.concatenate(maxs) if maxs else empty
+        level_sq = np.concatenate(squares) if squares else empty
+
+        # Samples per bucket; only the last one may be partial
+        counts = np.full(len(level_sq), base_bucket, dtype=np.float64)
+        if len(carry):
+            counts[-1] = len(carry)
+        sums = level_sq * counts
+
+        levels = [(level_min, level_max, level_sq)]
+        while len(level_min) > MIN_BUCKETS:
+            pad = (-len(level_min)) % factor
+            # Edge padding keeps min/max of the last partial bucket intact;
+            # sums and counts are zero-padded so its mean square only covers
+            # the samples it really has
+            level_min = np.pad(level_min, (0, pad), mode='edge').reshape(-1, factor).min(axis=1)
+            level_max = np.pad(level_max, (0, pad), mode='edge').reshape(-1, factor).max(axis=1)
+            sums = np.pad(sums, (0, pad)).reshape(-1, factor).sum(axis=1)
+            counts = np.pad(counts, (0, pad)).reshape(-1, factor).sum(axis=1)
+            level_sq = (sums / counts).astype(np.float32)
+            levels.append((level_min, level_max, level_sq))
+
+        quantized = [
+            (_quantize(lo), _quantize(hi), _quantize(np.sqrt(sq)))
+            for lo, hi, sq in levels
+        ]
+        duration = total / sample_rate if sample_rate else 0.0
+        return cls(sample_rate, duration, quantized, base_bucket, factor)
+
+    def samples_per_bucket(self, level: int) -> int:
+        return self.base_bucket * self.factor ** level
+
+    def info(self) -> dict:
+        """Describe the available levels."""
+        return {
+            'sample_rate': self.sample_rate,
+            'duration': self.duration,
+            'levels': [
+                {
+                    'level': index,
+                    'samples_per_bucket': self.samples_per_bucket(index),
+                    'buckets': len(lo),
+                }
+                for index, (lo, _, _) in enumerate(self.levels)
+            ],
+        }
+
+    def range(self, level: int, start: int = 0, end: int = None):
+        """
+        Get a bucket range of one level.
+
+        Raises:
+            ValueError: If the level does not exist
+        """
+        if not 0 <= level < len(self.levels):
+            raise ValueError(f"Invalid level: {level}")
+        lo, hi, rms = self.levels[level]
+        start = max(0, start)
+        end = len(lo) if end is None else min(len(lo), end)
+        return lo[start:end], hi[start:end], rms[start:end]
+
+    def to_bytes(self) -> bytes:
+        parts = [
+            HEADER.pack(MAGIC, VERSION, len(self.levels), self.factor,
+                        self.sample_rate, self.base_bucket, self.duration),
+            struct.pack(f'<{len(self.levels)}I', *(len(lo) for lo, _, _ in self.levels)),
+        ]
+        for lo, hi, rms in self.levels:
+            parts.extend((lo.tobytes(), hi.tobytes(), rms.tobytes()))
+        return b''.join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes):
+        """
+        Parse a serialized pyramid.
+
+        Raises:
+            ValueError: If the data is not a supported peak file
+        """
+        magic, version, count, factor, sample_rate, base_bucket, duration = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Unsupported peak file")
+        offset = HEADER.size
+        sizes = struct.unpack_from(f'<{count}I', data, offset)
+        offset += 4 * count
+        levels = []
+        for size in sizes:
+            arrays = []
+            for _ in range(3):
+                arrays.append(np.frombuffer(data, dtype=np.int8, count=size, offset=offset))
+                offset += size
+            levels.append(tuple(arrays))
+        return cls(sample_rate, duration, levels, base_bucket, factor)
+
+
+def get_peak_pyramid(file_path: str) -> PeakPyramid:
+    """Load the cached pyramid of a file, building and storing it if needed."""
+    params = {'version': VERSION, 'base': BASE_BUCKET, 'factor': REDUCTION_FACTOR}
+
+    def build():
+        return PeakPyramid.from_file(file_path).to_bytes()
+
+    data = artifact_cache.get_or_create(file_path, 'peaks', params, build)
+    try:
+        return PeakPyramid.from_bytes(data)
+    except (ValueError, struct.error):
+        # Rebuild corrupt entries
+        artifact_cache.discard(file_path, 'peaks', params)
+        return PeakPyramid.from_bytes(artifact_cache.get_or_create(file_path, 'peaks', params, build))
@@ -0,0 +1,92 @@
+"""
+Image Rasterizer
+This module draws visualizations straight into NumPy RGB arrays and encodes
+them with Pillow.
+
+It replaces full plotting figures for the images served to clients: a
+waveform is a column mask computed in one vectorized comparison and a
+heatmap is a palette lookup, so rendering costs a few milliseconds and no
+plotting library has to be imported.
+"""
+import io
+import numpy as np
+from PIL import Image
+
+WAVEFORM_COLOR = (31, 119, 180)
+WAVEFORM_BACKGROUND = (255, 255, 255)
+AXIS_COLOR = (200, 200, 200)
+
+# Anchor colours of the heatmap palette (dark violet -> yellow)
+PALETTE_ANCHORS = (
+    (0, 0, 4), (40, 11, 84), (101, 21, 110), (159, 42, 99),
+    (212, 72, 66), (245, 125, 21), (250, 193, 39), (252, 255, 164),
+)
+
+
+def palette() -> np.ndarray:
+    """256 x 3 uint8 colour lookup table interpolated from the anchors."""
+    anchors = np.asarray(PALETTE_ANCHORS, dtype=np.float32)
+    positions = np.linspace(0, 255, len(anchors))
+    steps = np.arange(256)
+    return np.stack(
+        [np.interp(steps, positions, anchors[:, c]) for c in range(3)], axis=1
+    ).astype(np.uint8)
+
+
+def max_pool(data: np.ndarray, size: int) -> np.ndarray:
+    """Reduce the first axis of ``data`` to at most ``size`` rows by max-pooling."""
+    if not size or len(data) <= size:
+        return data
+    group = -(-len(data) // size)
+    pad = (-len(data)) % group
+    if pad:
+        filler = np.full((pad,) + data.shape[1:], data.min(), dtype=data.dtype)
+        data = np.concatenate([data, filler])
+    return data.reshape((-1, group) + data.shape[1:]).max(axis=1)
+
+
+def render_waveform(lows: np.ndarray, highs: np.ndarray, height: int = 200,
+                    color=WAVEFORM_COLOR, background=WAVEFORM_BACKGROUND) -> np.ndarray:
+    """
+    Draw a min/max envelope as filled columns, one column per value.
+
+    Args:
+        lows: Minimum sample of every column, in [-1, 1]
+        highs: Maximum sample of every column, in [-1, 1]
+        height: Image height in pixels
+
+    Returns:
+        uint8 RGB array of shape (height, len(lows), 3)
+    """
+    width = len(lows)
+    image = np.empty((height, max(width, 1), 3), dtype=np.uint8)
+    image[:] = background
+    if not width:
+        return image
+    middle = (height - 1) / 2.0
+    # Row 0 is the top of the image, i.e. +1.0
+    top = np.floor(middle - np.clip(highs, -1, 1) * middle).astype(np.int32)
+    bottom = np.ceil(middle - np.clip(lows, -1, 1) * middle).astype(np.int32)
+    rows = np.arange(height, dtype=np.int32)[:, None]
+    image[int(round(middle))] = AXIS_COLOR
+    image[(rows >= top) & (rows <= bottom)] = color
+    return image
+
+
+def render_heatmap(data: np.ndarray, width: int = 0) -> np.ndarray:
+    """
+    Colour a uint8 ``(time, bins)`` matrix, time left to right and the first
+    bin at the bottom.  Time is max-pooled to at most ``width`` columns so
+    transients stay visible.
+    """
+    data = max_pool(data, width)
+    if not data.size:
+        return np.zeros((1, 1, 3), dtype=np.uint8)
+    return palette()[data.T[::-1]]
+
+
+def encode_png(image: np.ndarray) -> bytes:
+    """Encode an RGB array as PNG."""
+    buffer = io.BytesIO()
+    Image.fromarray(image, 'RGB').save(buffer, format='PNG')
+    return buffer.getvalue()
@@ -1,13 +1,24 @@
 """Abstraction layer for audio playback."""
 
+from config import settings
 from ..models.player import MusicPlayer
+from ..models.crossfade import CrossfadeScheduler
+from ..loudness import lookup_gain, NORMALIZATION_MODES
 
 
 class AudioService:
     """Simple wrapper around :class:`MusicPlayer` used by API handlers."""
 
     def __init__(self):
-        self.player = MusicPlayer()
+        self.player = MusicPlayer(gapless=settings.GAPLESS_PLAYBACK)
+        self.normalization = settings.LOUDNESS_NORMALIZATION
+        self.player.gain_provider = self._lookup_gain
+        self.crossfade = CrossfadeScheduler(
+            self.player,
+            seconds=settings.CROSSFADE_SECONDS,
+            curve=settings.CROSSFADE_CURVE,
+            tick_ms=settings.CROSSFADE_TICK_MS,
+        )
 
     # Expose a subset of player methods with some basic error handling
     def play(self, path: str):
@@ -34,5 +45,37 @@ class AudioService:
         self.player.set_volume(level)
         return self.player.get_status()
 
+    def queue_next(self, path: str):
+        self.player.preload(path)
+        return self.player.get_gap_stats()
+
+    def clear_next(self):
+        self.player.clear_preload()
+        return self.player.get_gap_stats()
+
+    def set_gapless(self, enabled: bool):
+        self.player.gapless = bool(enabled)
+        return self.player.get_gap_stats()
+
+    def set_crossfade(self, seconds: float = None, curve: str = None):
+        self.crossfade.configure(seconds, curve)
+        return self.crossfade.get_stats()
+
+    def set_normalization(self, mode: str):
+        if mode not in NORMALIZATION_MODES:
+            raise ValueError(f"Unknown normalization mode: {mode}")
+        self.normalization = mode
+        gain_db = self.player.refresh_gain()
+        return {"normalization": mode, "gain_db": gain_db}
+
+    def _lookup_gain(self, path: str):
+        return lookup_gain(path, self.normalization)
+
+    def metrics(self):
+        return {
+            "gapless": self.player.get_gap_stats(),
+            "crossfade": self.crossfade.get_stats(),
+        }
+
     def status(self):
         return self.player.get_status()
@@ -0,0 +1,194 @@
+"""
+Spectrogram Engine
+This module computes windowed STFT spectrograms with NumPy.
+
+Audio is streamed in blocks; each block is framed with a strided view,
+windowed and transformed with a single ``rfft`` call.  Magnitudes are
+converted to dB relative to full scale and quantized to uint8 right away, so
+the result is compact and independent of any plotting library.  Results are
+kept in the artifact cache per file version and parameter set.
+
+Binary file layout (little endian)::
+
+    header   4s magic 'APSG', B version, I sample rate, H n_fft, H hop,
+             H mel bins (0 = linear), B dB range, I frames, H bins
+    data     uint8[frames][bins], lowest frequency first
+"""
+import struct
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from .artifact_cache import artifact_cache
+from .audio_io import open_audio, downmix
+from .rasterizer import render_heatmap, encode_png
+
+MAGIC = b'APSG'
+VERSION = 1
+HEADER = struct.Struct('<4sBIHHHBIH')
+
+DEFAULT_N_FFT = 1024
+DEFAULT_HOP = 512
+DEFAULT_DB_RANGE = 80
+DEFAULT_PNG_WIDTH = 1600
+
+
+def validate_params(n_fft: int, hop: int, mel_bins: int):
+    """
+    Check STFT parameters.
+
+    Raises:
+        ValueError: If a parameter is out of range
+    """
+    if n_fft < 64 or n_fft > 16384 or n_fft & (n_fft - 1):
+        raise ValueError("n_fft must be a power of two between 64 and 16384")
+    if not 1 <= hop <= n_fft:
+        raise ValueError("hop must be between 1 and n_fft")
+    if mel_bins and not 8 <= mel_bins <= n_fft // 2:
+        raise ValueError("mel_bins must be 0 (linear) or between 8 and n_fft/2")
+
+
+def _hz_to_mel(hz):
+    return 2595.0 * np.log10(1.0 + np.asarray(hz) / 700.0)
+
+
+def _mel_to_hz(mel):
+    return 700.0 * (10 ** (np.asarray(mel) / 2595.0) - 1.0)
+
+
+def mel_filterbank(sample_rate: int, n_fft: int, mel_bins: int) -> np.ndarray:
+    """Triangular mel filters as a ``(mel_bins, n_fft // 2 + 1)`` matrix."""
+    freqs = np.fft.rfftfreq(n_fft, 1.0 / sample_rate)
+    edges = _mel_to_hz(np.linspace(0, _hz_to_mel(sample_rate / 2), mel_bins + 2))
+    lower, center, upper = edges[:-2, None], edges[1:-1, None], edges[2:, None]
+    rising = (freqs - lower) / np.maximum(center - lower, 1e-9)
+    falling = (upper - freqs) / np.maximum(upper - center, 1e-9)
+    bank = np.maximum(0.0, np.minimum(rising, falling))
+    # Normalize each filter to unit area so bands are comparable
+    return (bank / np.maximum(bank.sum(axis=1, keepdims=True), 1e-9)).astype(np.float32)
+
+
+def quantize_db(power: np.ndarray, db_range: int = DEFAULT_DB_RANGE) -> np.ndarray:
+    """Map power to uint8, 0 being ``-db_range`` dBFS and 255 being 0 dBFS."""
+    db = 10.0 * np.log10(np.maximum(power, 1e-20))
+    scaled = (db + db_range) * (255.0 / db_range)
+    return np.clip(scaled, 0, 255).astype(np.uint8)
+
+
+class Spectrogram:
+    """
+    Quantized magnitude spectrogram.
+
+    Attributes:
+        data: uint8 array of shape (frames, bins); 0 is ``-db_range`` dBFS
+            and 255 is 0 dBFS
+    """
+
+    def __init__(self, data: np.ndarray, sample_rate: int, n_fft: int, hop: int,
+                 mel_bins: int = 0, db_range: int = DEFAULT_DB_RANGE):
+        self.data = data
+        self.sample_rate = sample_rate
+        self.n_fft = n_fft
+        self.hop = hop
+        self.mel_bins = mel_bins
+        self.db_range = db_range
+
+    @classmethod
+    def from_file(cls, file_path: str, n_fft: int = DEFAULT_N_FFT, hop: int = DEFAULT_HOP,
+                  mel_bins: int = 0, db_range: int = DEFAULT_DB_RANGE):
+        """Compute the spectrogram of an audio file block by block."""
+        validate_params(n_fft, hop, mel_bins)
+        window = np.hanning(n_fft).astype(np.float32)
+        # Scale so a full-scale sine peaks at 0 dB
+        scale = (2.0 / window.sum()) ** 2
+
+        with open_audio(file_path) as reader:
+            sample_rate = reader.sample_rate
+            bank = mel_filterbank(sample_rate, n_fft, mel_bins) if mel_bins else None
+            # Blocks hold a whole number of hops to keep frames aligned
+            block_frames = hop * max(1, 65536 // hop)
+            rows = []
+            buffer = np.zeros(0, dtype=np.float32)
+            for block in reader.blocks(block_frames):
+                buffer = np.concatenate([buffer, downmix(block)])
+                if len(buffer) < n_fft:
+                    continue
+                frames = sliding_window_view(buffer, n_fft)[::hop]
+                spectrum = np.fft.rfft(frames * window, axis=1)
+                power = (spectrum.real ** 2 + spectrum.imag ** 2) * scale
+                if bank is not None:
+                    power = power @ bank.T
+                rows.append(quantize_db(power, db_range))
+                buffer = buffer[len(frames) * hop:]
+
+        bins = mel_bins or n_fft // 2 + 1
+        data = np.concatenate(rows) if rows else np.zeros((0, bins), dtype=np.uint8)
+        return cls(data, sample_rate, n_fft, hop, mel_bins, db_range)
+
+    def info(self) -> dict:
+        frames, bins = self.data.shape
+        return {
+            'sample_rate': self.sample_rate,
+            'n_fft': self.n_fft,
+            'hop': self.hop,
+            'mel_bins': self.mel_bins,
+            'db_range': self.db_range,
+            'frames': frames,
+            'bins': bins,
+        }
+
+    def to_bytes(self) -> bytes:
+        frames, bins = self.data.shape
+        header = HEADER.pack(MAGIC, VERSION, self.sample_rate, self.n_fft, self.hop,
+                             self.mel_bins, self.db_range, frames, bins)
+        return header + np.ascontiguousarray(self.data).tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes):
+        """
+        Parse a serialized spectrogram.
+
+        Raises:
+            ValueError: If the data is not a supported spectrogram file
+        """
+        magic, version, sample_rate, n_fft, hop, mel_bins, db_range, frames, bins = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Unsupported spectrogram file")
+        matrix = np.frombuffer(data, dtype=np.uint8, count=frames * bins, offset=HEADER.size)
+        return cls(matrix.reshape(frames, bins), sample_rate, n_fft, hop, mel_bins, db_range)
+
+    def to_png(self, width: int = DEFAULT_PNG_WIDTH) -> bytes:
+        """
+        Render a heatmap PNG (time left to right, low frequencies at the bottom).
+
+        Frames are max-pooled down to at most ``width`` columns so that long
+        tracks render quickly and transients stay visible.
+        """
+        return encode_png(render_heatmap(self.data, width))
+
+
+def get_spectrogram(file_path: str, n_fft: int = DEFAULT_N_FFT, hop: int = DEFAULT_HOP,
+                    mel_bins: int = 0) -> Spectrogram:
+    """Load a cached spectrogram, computing and storing it if needed."""
+    validate_params(n_fft, hop, mel_bins)
+    params = {'version': VERSION, 'n_fft': n_fft, 'hop': hop, 'mel_bins': mel_bins, 'db_range': DEFAULT_DB_RANGE}
+
+    def build():
+        return Spectrogram.from_file(file_path, n_fft, hop, mel_bins).to_bytes()
+
+    data = artifact_cache.get_or_create(file_path, 'spectrogram', params, build)
+    try:
+        return Spectrogram.from_bytes(data)
+    except (ValueError, struct.error):
+        # Recompute corrupt entries
+        artifact_cache.discard(file_path, 'spectrogram', params)
+        return Spectrogram.from_bytes(artifact_cache.get_or_create(file_path, 'spectrogram', params, build))
+
+
+def get_spectrogram_png(file_path: str, n_fft: int = DEFAULT_N_FFT, hop: int = DEFAULT_HOP,
+                        mel_bins: int = 0, width: int = DEFAULT_PNG_WIDTH) -> bytes:
+    """Get the cached heatmap PNG of a spectrogram."""
+    validate_params(n_fft, hop, mel_bins)
+    params = {'version': VERSION, 'n_fft': n_fft, 'hop': hop, 'mel_bins': mel_bins, 'width': width}
+    return artifact_cache.get_or_create(
+        file_path, 'spectrogram.png', params,
+        lambda: get_spectrogram(file_path, n_fft, hop, mel_bins).to_png(width),
+    )
@@ -0,0 +1,124 @@
+"""
+Thumbnail Sprite Sheets
+This module packs the album art thumbnails of a page of tracks into one
+JPEG atlas, so a grid view loads its artwork in one image request instead
+of one request per track.
+
+Tiles are laid out row by row in square cells of ``settings.SPRITE_CELL_SIZE``
+pixels; the layout lists the position and size of every thumbnail in the
+atlas.  The sheet is identified by a digest of its track IDs and thumbnail
+contents, and the encoded atlas is kept in the artifact cache under it.
+"""
+import io
+import hashlib
+from typing import Dict, List
+from PIL import Image, UnidentifiedImageError
+from config import settings
+from .artifact_cache import artifact_cache
+
+BACKGROUND = (0, 0, 0)
+
+
+class SpriteSheet:
+    """
+    Layout of a sprite sheet.
+
+    Attributes:
+        key: Digest of the track IDs and thumbnails the sheet is built from
+        columns: Cells per row
+        cell: Cell size in pixels
+        width, height: Atlas size in pixels
+        tiles: Dictionary of track ID to ``{'x', 'y', 'w', 'h'}`` in the atlas
+        missing: Requested track IDs without a (readable) thumbnail
+    """
+
+    def __init__(self, thumbnails: Dict[int, bytes], track_ids: List[int]):
+        self.cell = settings.SPRITE_CELL_SIZE
+        self._thumbnails = []
+        self.missing = []
+        sizes = {}
+        for track_id in track_ids:
+            data = thumbnails.get(track_id)
+            if data is None:
+                self.missing.append(track_id)
+                continue
+            try:
+                # Opening reads the image header only
+                sizes[track_id] = self._fit(Image.open(io.BytesIO(data)).size)
+            except (UnidentifiedImageError, OSError) as e:
+                print(f"Error reading thumbnail of track {track_id}: {e}")
+                self.missing.append(track_id)
+                continue
+            self._thumbnails.append((track_id, data))
+        self.columns = max(1, min(len(self._thumbnails), settings.SPRITE_COLUMNS))
+        rows = -(-len(self._thumbnails) // self.columns)
+        self.width, self.height = self.columns * self.cell, rows * self.cell
+
+        digest = hashlib.sha1(f"{self.cell}|{self.columns}|{settings.SPRITE_JPEG_QUALITY}".encode('utf-8'))
+        self.tiles = {}
+        for index, (track_id, data) in enumerate(self._thumbnails):
+            digest.update(f"|{track_id}:".encode('utf-8'))
+            digest.update(hashlib.sha1(data).digest())
+            width, height = sizes[track_id]
+            row, column = divmod(index, self.columns)
+            self.tiles[track_id] = {'x': column * self.cell, 'y': row * self.cell, 'w': width, 'h': height}
+        self.key = digest.hexdigest()
+
+    def _fit(self, size: tuple) -> tuple:
+        """Size of a thumbnail scaled down to fit in a cell."""
+        width, height = size
+        scale = min(1.0, self.cell / max(width, height))
+        return max(1, round(width * scale)), max(1, round(height * scale))
+
+    def render(self) -> bytes:
+        """Encode the atlas as JPEG."""
+        atlas = Image.new('RGB', (self.width, self.height), BACKGROUND)
+        for track_id, data in self._thumbnails:
+            tile = self.tiles[track_id]
+            try:
+                image = Image.open(io.BytesIO(data))
+                if image.mode != 'RGB':
+                    image = image.convert('RGB')
+                if image.size != (tile['w'], tile['h']):
+                    image = image.resize((tile['w'], tile['h']), Image.LANCZOS)
+            except OSError as e:
+                # A valid header over truncated data; leave the cell empty
+                print(f"Error decoding thumbnail of track {track_id}: {e}")
+                continue
+            atlas.paste(image, (tile['x'], tile['y']))
+        buffer = io.BytesIO()
+        atlas.save(buffer, format='JPEG', quality=settings.SPRITE_JPEG_QUALITY)
+        return buffer.getvalue()
+
+    def image(self) -> bytes:
+        """The encoded atlas, from the artifact cache or rendered now."""
+        return artifact_cache.get_or_create_content('sprite', self.key, self.render)
+
+    def to_dict(self) -> dict:
+        return {
+            'key': self.key,
+            'width': self.width,
+            'height': self.height,
+            'columns': self.columns,
+            'cell': self.cell,
+            'tiles': self.tiles,
+            'missing': self.missing,
+        }
+
+
+def parse_track_ids(value: str) -> List[int]:
+    """
+    Parse a comma-separated list of track IDs, keeping the first occurrence of each.
+
+    Raises:
+        ValueError: If the list is empty, malformed or longer than ``settings.SPRITE_MAX_TILES``
+    """
+    try:
+        track_ids = list(dict.fromkeys(int(part) for part in (value or '').split(',') if part.strip()))
+    except ValueError:
+        raise ValueError(f"Invalid track IDs: {value}")
+    if not track_ids:
+        raise ValueError("No track IDs given")
+    if len(track_ids) > settings.SPRITE_MAX_TILES:
+        raise ValueError(f"At most {settings.SPRITE_MAX_TILES} tracks per sprite sheet")
+    return track_ids
@@ -4,6 +4,8 @@ Utility functions for the music player app.
 import time
 import os
 import json
+import hashlib
+import threading
 from typing import Dict, List, Union, Optional
 
 def format_time(seconds: float) -> str:
@@ -99,3 +101,28 @@ def write_json(path, data) -> bool: # bool indicate success or failure
     except Exception as e:
         return False
 
+
+def file_fingerprint(file_path: str, *extra) -> str:
+    """
+    Get a digest identifying a file version (path, mtime and size).
+
+    Args:
+        file_path: Path to the file
+        extra: Additional values (e.g. parameters) mixed into the digest
+
+    Returns:
+        Hex digest that changes whenever the file is modified
+    """
+    stat = os.stat(file_path)
+    parts = [os.path.abspath(file_path), str(stat.st_mtime_ns), str(stat.st_size)]
+    parts.extend(str(value) for value in extra)
+    return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+
+
+def write_bytes_atomic(path: str, data: bytes):
+    """Write a file through a temporary file so readers never see partial data."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
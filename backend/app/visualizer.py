@@ -1,51 +1,108 @@
 import io
-import wave
 import numpy as np
-import matplotlib.pyplot as plt
+from .artifact_cache import artifact_cache
+from .audio_io import open_audio, downmix
+from .rasterizer import render_waveform, encode_png, max_pool
+from .spectrogram import get_spectrogram_png
 
 class AudioVisualizer:
     """Utility class to generate basic audio visualizations."""
 
-    def _read_wav(self, file_path):
-        """Read PCM data from a WAV file."""
-        with wave.open(file_path, 'rb') as wf:
-            sample_rate = wf.getframerate()
-            frames = wf.readframes(wf.getnframes())
-            channels = wf.getnchannels()
-            sample_width = wf.getsampwidth()
-
-        dtype = np.int16 if sample_width == 2 else np.uint8
-        data = np.frombuffer(frames, dtype=dtype)
-        if channels > 1:
-            data = data[::channels]
-        return sample_rate, data
-
-    def waveform_bytes(self, file_path):
-        """Return waveform image bytes (PNG). Only supports WAV files."""
-        sr, data = self._read_wav(file_path)
-        fig, ax = plt.subplots(figsize=(8, 2))
-        ax.plot(np.linspace(0, len(data)/sr, num=len(data)), data, linewidth=0.5)
+    # Default waveform image size; one envelope column per pixel
+    WAVEFORM_WIDTH = 800
+    WAVEFORM_HEIGHT = 200
+
+    def _waveform_envelope(self, file_path, points):
+        """
+        Stream an audio file into a min/max envelope of at most ``points`` columns.
+
+        Memory use depends on ``points`` only, not on the file length: the
+        frame count is only an estimate (zero or short for some compressed
+        files), so whenever more than twice ``points`` columns pile up,
+        neighbouring columns are merged and the column width doubles.
+        """
+        with open_audio(file_path) as reader:
+            sr = reader.sample_rate
+            per_point = max(1, -(-reader.frames // points))
+            lows, highs = np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.float32)
+            # Column being filled across blocks: (low, high, frames so far)
+            partial = None
+            for block in reader.blocks(65536):
+                mono = downmix(block)
+                if partial is not None:
+                    low, high, filled = partial
+                    head, mono = mono[:per_point - filled], mono[per_point - filled:]
+                    if len(head):
+                        low, high, filled = min(low, head.min()), max(high, head.max()), filled + len(head)
+                    partial = (low, high, filled)
+                    if filled < per_point:
+                        continue
+                    lows, highs = np.append(lows, low), np.append(highs, high)
+                    partial = None
+                whole = len(mono) - len(mono) % per_point
+                if whole:
+                    buckets = mono[:whole].reshape(-1, per_point)
+                    lows = np.concatenate([lows, buckets.min(axis=1)])
+                    highs = np.concatenate([highs, buckets.max(axis=1)])
+                if whole < len(mono):
+                    tail = mono[whole:]
+                    partial = (tail.min(), tail.max(), len(tail))
+                if len(lows) > 2 * points:
+                    if len(lows) % 2:
+                        # The odd column goes on filling at the doubled width
+                        partial = (lows[-1], highs[-1], per_point)
+                        lows, highs = lows[:-1], highs[:-1]
+                    lows = lows.reshape(-1, 2).min(axis=1)
+                    highs = highs.reshape(-1, 2).max(axis=1)
+                    per_point *= 2
+            if partial is not None:
+                lows, highs = np.append(lows, partial[0]), np.append(highs, partial[1])
+        lows, highs = lows.astype(np.float32), highs.astype(np.float32)
+        if len(lows) > points:
+            group = -(-len(lows) // points)
+            lows, highs = -max_pool(-lows, points), max_pool(highs, points)
+            per_point *= group
+        times = np.arange(len(lows)) * per_point / sr if sr else np.zeros(len(lows))
+        return times, lows, highs
+
+    def waveform_bytes(self, file_path, width=None, height=None, debug=False):
+        """
+        Return waveform image bytes (PNG), cached per file and size.
+
+        With ``debug`` the envelope is plotted with matplotlib, including
+        axes and labels; matplotlib is only imported in that case.
+        """
+        width = width or self.WAVEFORM_WIDTH
+        height = height or self.WAVEFORM_HEIGHT
+        if debug:
+            times, lows, highs = self._waveform_envelope(file_path, width)
+            return self._debug_plot(times, lows, highs, width, height)
+
+        def build():
+            _, lows, highs = self._waveform_envelope(file_path, width)
+            return encode_png(render_waveform(lows, highs, height))
+
+        return artifact_cache.get_or_create(
+            file_path, 'waveform.png', {'width': width, 'height': height}, build
+        )
+
+    def _debug_plot(self, times, lows, highs, width, height):
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+
+        dpi = 100
+        fig, ax = plt.subplots(figsize=(width / dpi, height / dpi), dpi=dpi)
+        ax.fill_between(times, lows, highs, linewidth=0.5)
         ax.set_xlabel('Time (s)')
         ax.set_ylabel('Amplitude')
         ax.set_title('Waveform')
         fig.tight_layout()
         buffer = io.BytesIO()
-        plt.savefig(buffer, format='png')
+        fig.savefig(buffer, format='png')
         plt.close(fig)
-        buffer.seek(0)
         return buffer.getvalue()
 
-    def spectrogram_bytes(self, file_path):
-        """Return spectrogram image bytes (PNG). Only supports WAV files."""
-        sr, data = self._read_wav(file_path)
-        fig, ax = plt.subplots(figsize=(8, 3))
-        ax.specgram(data, Fs=sr, NFFT=1024, noverlap=512)
-        ax.set_xlabel('Time (s)')
-        ax.set_ylabel('Frequency (Hz)')
-        ax.set_title('Spectrogram')
-        fig.tight_layout()
-        buffer = io.BytesIO()
-        plt.savefig(buffer, format='png')
-        plt.close(fig)
-        buffer.seek(0)
-        return buffer.getvalue()
+    def spectrogram_bytes(self, file_path, n_fft=1024, hop=512, mel_bins=0):
+        """Return spectrogram image bytes (PNG)."""
+        return get_spectrogram_png(file_path, n_fft, hop, mel_bins)
@@ -3,4 +3,11 @@ WebSocket Package
 This package contains websocket events and handlers.
 """
 
-from .events import socketio, emit_player_status, emit_library_update, emit_playlist_changed
\ No newline at end of file
+# The API endpoints import the modules below, which in turn import the API's
+# serializers; loading the API layer first resolves the cycle in that order
+from .. import api  # noqa: F401
+from .events import socketio, emit_player_status, emit_library_update, emit_playlist_changed, emit_scan_job
+from .clock import player_clock
+from .dispatcher import dispatcher
+from .spectrum import spectrum_streamer
+from .lyric_cursor import lyric_cursor
\ No newline at end of file
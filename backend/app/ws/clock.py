@@ -0,0 +1,188 @@
+"""
+Player Clock
+This module pushes anchored playback timestamps to clients over Socket.IO.
+
+Instead of polling ``/api/player/status``, clients receive an anchor
+(position, server monotonic time, rate, state) whenever the player state
+changes and interpolate the position locally::
+
+    position_now = position + (server_now - server_time) * rate
+
+``server_now`` is obtained by offsetting the client clock with the result of
+a ``clock_sync`` round trip. While playing, the anchor is re-checked at a low
+frequency and re-sent only if the interpolated position drifted.
+"""
+import time
+import threading
+from config import settings
+from .events import socketio, emit_player_status
+from .dispatcher import dispatcher
+
+# Player events after which clients also need the full status
+STATUS_EVENTS = {'ended', 'error', 'track_changed'}
+# Player events after which a pending seek target no longer applies
+POSITION_RESET_EVENTS = {'ended', 'error', 'track_changed', 'stopped'}
+
+
+class PlayerClock:
+    """Broadcast player clock anchors on state changes plus drift corrections."""
+
+    def __init__(self, socketio, drift_interval: float = None, drift_tolerance: float = None):
+        self.socketio = socketio
+        self.drift_interval = drift_interval or settings.PLAYER_CLOCK_DRIFT_SECONDS
+        self.drift_tolerance = drift_tolerance or settings.PLAYER_CLOCK_DRIFT_TOLERANCE
+        self.player = None
+        self._anchor = None
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._task = None
+        self._anchor_listeners = []
+
+    def add_anchor_listener(self, callback):
+        """Register a callable receiving every published anchor."""
+        self._anchor_listeners.append(callback)
+
+    def attach(self, player):
+        """
+        Follow the state changes of a MusicPlayer.
+
+        Player events (possibly raised on libvlc's event thread) are only
+        queued here; anchors are taken and emitted by the event dispatcher.
+        """
+        if self.player is not None:
+            self.player.remove_listener(self._on_player_event)
+        self.player = player
+        player.add_listener(self._on_player_event)
+        dispatcher.register('player', self.handle_player_events, merge=lambda old, new: old + new)
+
+    def snapshot(self, position: float = None) -> dict:
+        """
+        Read an anchor from the player (several libvlc calls).
+
+        Args:
+            position: Known position in seconds (the target of a seek), used
+                instead of reading the player's time
+        """
+        player = self.player
+        if player is None or player.player is None:
+            state, position, duration, rate, track = "unavailable", 0, 0, 1.0, None
+        else:
+            state = str(player.player.get_state())
+            position = player.at if position is None else position
+            duration = player.duration
+            rate = player.rate
+            track = player.current_track
+        return {
+            'state': state,
+            'current_track': track,
+            'position': position,
+            'duration': duration,
+            'rate': rate,
+            'server_time': time.monotonic(),
+        }
+
+    @property
+    def anchor(self):
+        """Last published anchor, or a fresh one if nothing was published yet."""
+        return self._anchor or self.publish(emit=False)
+
+    def publish(self, reason: str = 'state', emit: bool = True, to=None, position: float = None) -> dict:
+        """
+        Take a new anchor and send it to clients.
+
+        Args:
+            reason: Why the anchor is sent (state change, seek, drift, ...)
+            emit: If False, only update the stored anchor
+            to: Optional session id to address a single client instead of
+                the player room
+            position: Known position in seconds, see :meth:`snapshot`
+
+        Returns:
+            The anchor dictionary
+        """
+        with self._lock:
+            anchor = self.snapshot(position)
+            self._seq += 1
+            anchor['seq'] = self._seq
+            anchor['reason'] = reason
+            self._anchor = anchor
+        if emit:
+            self.socketio.emit('player_clock', anchor, to=to or 'player')
+            if to is None:
+                for callback in self._anchor_listeners:
+                    try:
+                        callback(anchor)
+                    except Exception as e:
+                        print(f"Error in player clock listener: {e}")
+        return anchor
+
+    def predicted_position(self, now: float = None) -> float:
+        """Position clients currently extrapolate from the last anchor."""
+        anchor = self._anchor
+        if anchor is None:
+            return 0.0
+        if not anchor['state'].endswith('Playing'):
+            return anchor['position']
+        now = time.monotonic() if now is None else now
+        return anchor['position'] + (now - anchor['server_time']) * anchor['rate']
+
+    def start(self):
+        """Start the drift correction loop (once)."""
+        with self._lock:
+            if self._task is None:
+                self._task = self.socketio.start_background_task(self._run)
+
+    def _on_player_event(self, event_name: str, position: float = None):
+        dispatcher.post('player', [(event_name, position)])
+
+    def handle_player_events(self, events):
+        """Dispatcher handler for a (coalesced) burst of ``(event_name, position)`` player events."""
+        event_names = [name for name, _ in events]
+        # The latest seek target wins over the player's (possibly stale)
+        # time, unless the track changed or stopped after it
+        position = None
+        for name, event_position in events:
+            if event_position is not None:
+                position = event_position
+            elif name in POSITION_RESET_EVENTS:
+                position = None
+        self.publish(event_names[-1], position=position)
+        if STATUS_EVENTS.intersection(event_names):
+            emit_player_status(self.player.get_status())
+
+    def check_drift(self):
+        """Re-send the anchor if the interpolated position drifted."""
+        if self.player is None or self.player.player is None:
+            return
+        anchor = self._anchor
+        current = self.snapshot()
+        if (
+            anchor is None
+            or anchor['state'] != current['state']
+            or anchor['current_track'] != current['current_track']
+            or anchor['rate'] != current['rate']
+        ):
+            self.publish('state')
+        elif current['state'].endswith('Playing'):
+            drift = current['position'] - self.predicted_position(current['server_time'])
+            if abs(drift) > self.drift_tolerance:
+                self.publish('drift')
+
+    def _run(self):
+        while True:
+            self.socketio.sleep(self.drift_interval)
+            try:
+                self.check_drift()
+            except Exception as e:
+                print(f"Error checking player clock drift: {e}")
+
+
+# Create a singleton instance for the application
+player_clock = PlayerClock(socketio)
+
+
+@socketio.on('clock_sync')
+def handle_clock_sync(data=None):
+    """Answer a clock sync request so clients can map server time."""
+    client_time = data.get('client_time') if isinstance(data, dict) else None
+    return {'client_time': client_time, 'server_time': time.monotonic()}
@@ -0,0 +1,169 @@
+"""
+Event Dispatcher
+This module decouples event producers (such as libvlc's event thread) from
+Socket.IO emission.
+
+Producers only append a lightweight tuple to a ``collections.deque`` (append
+and popleft are atomic) and bump the counters under a small lock held for a
+few increments only.  A worker thread
+drains the queue, coalesces events of the same kind and key, and runs the
+registered handler, which does the serialization and the actual emit.
+
+A kind can be registered with a coalescing window: its events are then held
+for that long after the first one and everything posted meanwhile is merged,
+so a burst (a dragged volume slider, bulk playlist edits) is serialized and
+emitted once.
+"""
+import time
+import threading
+from collections import deque
+
+
+def latest(old, new):
+    """Default merge policy: the most recent payload wins."""
+    return new
+
+
+class EventDispatcher:
+    """Queue events from any thread and emit them from a dedicated worker."""
+
+    def __init__(self, latency_samples: int = 512):
+        self._queue = deque()
+        self._wakeup = threading.Event()
+        self._handlers = {}
+        self._pending = {}              # (kind, key) -> [first posted, payload, due], worker only
+        self._thread = None
+        self._start_lock = threading.Lock()
+        # Counters are updated by producer threads and the worker alike
+        self._stats_lock = threading.Lock()
+        self._latencies = deque(maxlen=latency_samples)
+        self._kind_stats = {}
+        self._stats = {
+            'posted': 0,
+            'dispatched': 0,
+            'coalesced': 0,
+            'dropped': 0,
+            'merged': 0,
+            'errors': 0,
+            'max_queue_depth': 0,
+        }
+
+    def register(self, kind: str, handler, merge=latest, window: float = 0.0):
+        """
+        Register the handler for an event kind.
+
+        Args:
+            kind: Event kind used when posting
+            handler: Callable receiving the (merged) payload
+            merge: Callable (old_payload, new_payload) -> payload used to
+                coalesce events of the same kind and key
+            window: Seconds events are held after the first one of a burst,
+                0 dispatches on the next drain
+        """
+        self._handlers[kind] = (handler, merge, window)
+        self._kind_stats.setdefault(kind, {'posted': 0, 'dispatched': 0, 'dropped': 0, 'merged': 0})
+
+    def post(self, kind: str, payload=None, key=None):
+        """Queue an event; safe to call from any thread, never blocks."""
+        self._queue.append((kind, key, payload, time.monotonic()))
+        with self._stats_lock:
+            self._stats['posted'] += 1
+            if kind in self._kind_stats:
+                self._kind_stats[kind]['posted'] += 1
+            depth = len(self._queue)
+            if depth > self._stats['max_queue_depth']:
+                self._stats['max_queue_depth'] = depth
+        if self._thread is None:
+            self.start()
+        self._wakeup.set()
+
+    def start(self):
+        """Start the worker thread (once)."""
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='event-dispatcher', daemon=True)
+                self._thread.start()
+
+    def drain(self, flush: bool = False):
+        """
+        Dispatch queued events whose window elapsed, coalescing duplicates.
+
+        Args:
+            flush: Dispatch held events even if their window is still open
+
+        Returns:
+            Seconds until the next held event is due, or None
+        """
+        pending = self._pending
+        while self._queue:
+            kind, key, payload, posted_at = self._queue.popleft()
+            slot = (kind, key)
+            entry = pending.get(slot)
+            if entry is None:
+                _, _, window = self._handlers.get(kind, (None, latest, 0.0))
+                pending[slot] = [posted_at, payload, posted_at + window]
+                continue
+            _, merge, _ = self._handlers.get(kind, (None, latest, 0.0))
+            entry[1] = merge(entry[1], payload)
+            # Latest-wins drops the older payload, other policies fold it in
+            counter = 'dropped' if merge is latest else 'merged'
+            with self._stats_lock:
+                self._stats['coalesced'] += 1
+                self._stats[counter] += 1
+                if kind in self._kind_stats:
+                    self._kind_stats[kind][counter] += 1
+
+        now = time.monotonic()
+        # dicts keep insertion order, so kinds are dispatched in arrival order
+        ready = [slot for slot, entry in pending.items() if flush or entry[2] <= now]
+        for slot in ready:
+            posted_at, payload, _ = pending.pop(slot)
+            kind = slot[0]
+            handler, _, _ = self._handlers.get(kind, (None, None, None))
+            if handler is None:
+                continue
+            try:
+                handler(payload)
+                outcome = 'dispatched'
+            except Exception as e:
+                outcome = 'errors'
+                print(f"Error dispatching {kind} event: {e}")
+            with self._stats_lock:
+                self._stats[outcome] += 1
+                if outcome == 'dispatched':
+                    self._kind_stats[kind]['dispatched'] += 1
+            self._latencies.append(time.monotonic() - posted_at)
+
+        if not pending:
+            return None
+        return max(0.0, min(entry[2] for entry in pending.values()) - time.monotonic())
+
+    def get_metrics(self) -> dict:
+        """Return counters, queue depth and dispatch latency (ms)."""
+        with self._stats_lock:
+            metrics = dict(self._stats)
+            metrics['kinds'] = {kind: dict(stats) for kind, stats in self._kind_stats.items()}
+        metrics['queue_depth'] = len(self._queue)
+        metrics['held'] = len(self._pending)
+        latencies = sorted(self._latencies)
+        if latencies:
+            metrics['latency_ms'] = {
+                'avg': round(sum(latencies) / len(latencies) * 1000, 3),
+                'p50': round(latencies[len(latencies) // 2] * 1000, 3),
+                'p95': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 3),
+                'max': round(latencies[-1] * 1000, 3),
+            }
+        else:
+            metrics['latency_ms'] = None
+        return metrics
+
+    def _run(self):
+        timeout = None
+        while True:
+            self._wakeup.wait(timeout)
+            self._wakeup.clear()
+            timeout = self.drain()
+
+
+# Create a singleton instance for the application
+dispatcher = EventDispatcher()
@@ -1,52 +1,278 @@
 """
 WebSocket Events
 This module handles real-time updates via Socket.IO.
+
+Updates are sent to topic rooms rather than to every connected client:
+
+- ``player`` - ``player_status_update`` and ``player_clock``
+- ``library`` - ``library_update``
+- ``playlists`` - ``playlist_changed`` of every playlist
+- ``playlist:<id>`` - ``playlist_changed`` of one playlist
+- ``scan-jobs`` - ``scan_job`` progress of library scans and loudness analysis
+
+Clients pick their topics with ``subscribe``/``unsubscribe`` messages, or
+with ``{"topics": [...]}`` as connection auth; without it they join
+``settings.WS_DEFAULT_TOPICS``.  Emitters skip building payloads for rooms
+nobody joined.
+
+Status, library and playlist events go through the event dispatcher with a
+``settings.WS_COALESCE_WINDOW_MS`` window: a burst of status updates emits
+only the latest status, and the changes of one playlist are emitted as one
+``batch`` event.  Library and playlist events carry the change log version
+(see app/models/changes.py); ``library_update`` also carries the changed
+rows when there are few of them.
 """
-from flask_socketio import SocketIO, emit
+import re
+import threading
+from flask import request
+from flask_socketio import SocketIO, emit, join_room, leave_room, rooms
+from config import settings
 from ..api.serializers import player_status_schema, track_schema, playlist_schema
+from ..loudness import loudness_analyzer
+from ..models.changes import change_log
+from .dispatcher import dispatcher
 
 # Initialize Socket.IO
 socketio = SocketIO()
 
+TOPICS = ('player', 'library', 'playlists', 'scan-jobs')
+PLAYLIST_TOPIC = re.compile(r'^playlist:(\d+)$')
+
+# Callables receiving the session id of disconnecting clients
+_disconnect_hooks = []
+
+# Session ids per topic room, tracked here so emitters do not depend on
+# python-socketio's internal room bookkeeping
+_topic_members = {}
+_topic_members_lock = threading.Lock()
+
+def on_disconnect(callback):
+    """Register a callable to clean up per-client state on disconnect."""
+    _disconnect_hooks.append(callback)
+    return callback
+
+def parse_topics(topics):
+    """
+    Validate a list of topic names.
+
+    Args:
+        topics: Topic name or list of topic names
+
+    Returns:
+        List of topic names
+
+    Raises:
+        ValueError: If a topic is unknown
+    """
+    if isinstance(topics, str):
+        topics = [topics]
+    if not isinstance(topics, (list, tuple)):
+        raise ValueError("topics must be a list of topic names")
+    for topic in topics:
+        if not isinstance(topic, str) or (topic not in TOPICS and not PLAYLIST_TOPIC.match(topic)):
+            raise ValueError(f"Unknown topic: {topic}")
+    return list(topics)
+
+def subscribed_topics(sid):
+    """Topic rooms a client is in (its own sid room excluded)."""
+    return sorted(room for room in rooms(sid=sid) if room != sid)
+
+def join_topic(topic, sid=None):
+    """Add the current (or given) client to a topic room."""
+    sid = sid or request.sid
+    join_room(topic, sid=sid)
+    with _topic_members_lock:
+        _topic_members.setdefault(topic, set()).add(sid)
+
+def leave_topic(topic, sid=None):
+    """Remove the current (or given) client from a topic room."""
+    sid = sid or request.sid
+    leave_room(topic, sid=sid)
+    with _topic_members_lock:
+        _discard_member(topic, sid)
+
+def _discard_member(topic, sid):
+    members = _topic_members.get(topic)
+    if members is not None:
+        members.discard(sid)
+        if not members:
+            del _topic_members[topic]
+
+def has_subscribers(*rooms_):
+    """Whether anyone joined one of the rooms, so unread payloads are not built."""
+    with _topic_members_lock:
+        return any(_topic_members.get(room) for room in rooms_)
+
+def _topics_message(data):
+    topics = data.get('topics') if isinstance(data, dict) else data
+    return parse_topics(topics)
+
 @socketio.on('connect')
-def handle_connect():
+def handle_connect(auth=None):
     """Handle client connection."""
     # This could log connections or initialize client-specific state
     print("Client connected")
-    
+    try:
+        topics = _topics_message(auth) if auth and 'topics' in auth else settings.WS_DEFAULT_TOPICS
+    except ValueError:
+        topics = settings.WS_DEFAULT_TOPICS
+    for topic in topics:
+        join_topic(topic)
+    # Give the new client a clock anchor so it never has to poll the status
+    from .clock import player_clock
+    player_clock.start()
+    socketio.emit('player_clock', player_clock.anchor, to=request.sid)
+
 @socketio.on('disconnect')
 def handle_disconnect():
     """Handle client disconnection."""
     print("Client disconnected")
+    with _topic_members_lock:
+        for topic in list(_topic_members):
+            _discard_member(topic, request.sid)
+    for callback in _disconnect_hooks:
+        callback(request.sid)
+
+@socketio.on('subscribe')
+def handle_subscribe(data=None):
+    """Join topic rooms; the acknowledgement lists the client's topics."""
+    try:
+        topics = _topics_message(data)
+    except ValueError as e:
+        return {'error': str(e)}
+    for topic in topics:
+        join_topic(topic)
+    return {'topics': subscribed_topics(request.sid)}
+
+@socketio.on('unsubscribe')
+def handle_unsubscribe(data=None):
+    """Leave topic rooms; the acknowledgement lists the client's topics."""
+    try:
+        topics = _topics_message(data)
+    except ValueError as e:
+        return {'error': str(e)}
+    for topic in topics:
+        leave_topic(topic)
+    return {'topics': subscribed_topics(request.sid)}
 
 def emit_player_status(status):
     """
-    Emit player status update to all connected clients.
-    
+    Emit player status update to clients subscribed to the player.
+
+    Updates within the coalescing window are merged; the latest wins.
+
     Args:
         status: Player status dictionary
     """
-    socketio.emit('player_status_update', player_status_schema(status))
+    if has_subscribers('player'):
+        dispatcher.post('player_status', status)
+
+def _send_player_status(status):
+    socketio.emit('player_status_update', player_status_schema(status), to='player')
+
+def emit_library_update(since=None):
+    """
+    Emit library update notification to clients subscribed to the library.
+
+    Args:
+        since: Change log version before the update; the event then carries
+            the changes after it (see ``change_log.changes_since``)
+    """
+    if not has_subscribers('library'):
+        return
+    if since is None:
+        payload = {'since': None, 'version': change_log.current_version(), 'changes': None}
+    else:
+        delta = change_log.changes_since(since, limit=settings.CHANGE_FEED_INLINE_MAX)
+        changes = None if delta['more'] or delta['reset'] else delta['changes']
+        payload = {'since': since, 'version': delta['version'], 'changes': changes}
+    dispatcher.post('library_update', payload)
+
+def merge_library_updates(old, new):
+    """
+    Aggregate two library updates into one delta from the older ``since``.
 
-def emit_library_update():
-    """Emit library update notification to all connected clients."""
-    socketio.emit('library_update')
+    The changes are dropped (clients fetch ``/api/changes``) if either
+    update has none or the merged delta exceeds the inline limit.
+    """
+    changes = None
+    if old['changes'] is not None and new['changes'] is not None:
+        # Later state of a row replaces the earlier one
+        merged = {(change['entity'], change['id']): change for change in old['changes']}
+        merged.update(((change['entity'], change['id']), change) for change in new['changes'])
+        if len(merged) <= settings.CHANGE_FEED_INLINE_MAX:
+            changes = list(merged.values())
+    return {'since': old['since'], 'version': new['version'], 'changes': changes}
+
+def _send_library_update(payload):
+    socketio.emit('library_update', payload, to='library')
 
 def emit_playlist_changed(playlist_id, action, data=None):
     """
-    Emit playlist change notification to all connected clients.
-    
+    Emit playlist change notification to clients subscribed to the playlist.
+
+    Changes of one playlist within the coalescing window are merged into a
+    single ``batch`` event.
+
     Args:
         playlist_id: ID of the changed playlist
-        action: The action performed (created, updated, deleted, track_added, track_removed)
+        action: The action performed (created, deleted, track_added, track_removed);
+            coalesced changes are sent as ``batch`` (see :func:`merge_playlist_changes`)
         data: Optional additional data (depends on action)
     """
+    if not has_subscribers('playlists', f"playlist:{playlist_id}"):
+        return
+
     event_data = {
         'playlist_id': playlist_id,
-        'action': action
+        'action': action,
+        'version': change_log.current_version()
     }
-    
+
     if data:
         event_data['data'] = data
-        
-    socketio.emit('playlist_changed', event_data)
\ No newline at end of file
+
+    dispatcher.post('playlist_changed', event_data, key=playlist_id)
+
+def merge_playlist_changes(old, new):
+    """
+    Aggregate two changes of a playlist.
+
+    Returns:
+        ``new`` if the playlist was deleted, otherwise a ``batch`` event
+        whose ``changes`` list the actions in order
+    """
+    if new['action'] == 'deleted':
+        return new
+    if old['action'] == 'batch':
+        changes = old['changes']
+    else:
+        changes = [{key: value for key, value in old.items() if key not in ('playlist_id', 'version')}]
+    changes.append({key: value for key, value in new.items() if key not in ('playlist_id', 'version')})
+    return {'playlist_id': new['playlist_id'], 'action': 'batch', 'version': new['version'], 'changes': changes}
+
+def _send_playlist_changed(event_data):
+    playlist_id = event_data['playlist_id']
+    # A client in both rooms receives the event once
+    socketio.emit('playlist_changed', event_data, to=['playlists', f"playlist:{playlist_id}"])
+
+def emit_scan_job(job, state, **progress):
+    """
+    Emit scan job progress to clients subscribed to scan jobs.
+
+    Args:
+        job: Job name ('library_scan' or 'loudness')
+        state: 'started', 'progress', 'completed', 'stopped' or 'failed'
+        progress: Job specific counters
+    """
+    socketio.emit('scan_job', dict(progress, job=job, state=state), to='scan-jobs')
+
+def _on_loudness_progress(state, status):
+    emit_scan_job('loudness', state, total=status['total'], done=status['done'], failed=status['failed'])
+
+loudness_analyzer.add_listener(_on_loudness_progress)
+
+_window = settings.WS_COALESCE_WINDOW_MS / 1000.0
+dispatcher.register('player_status', _send_player_status, window=_window)
+dispatcher.register('library_update', _send_library_update, merge=merge_library_updates, window=_window)
+dispatcher.register('playlist_changed', _send_playlist_changed, merge=merge_playlist_changes, window=_window)
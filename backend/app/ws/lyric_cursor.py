@@ -0,0 +1,150 @@
+"""
+Lyric Cursor
+This module pushes the current and next lyric line of the playing track to
+subscribed clients.
+
+The server tracks the line under the playhead: the position comes from the
+player clock, a ``bisect`` over the line start times finds the line, and the
+loop sleeps until the next line is due.  Every published clock anchor (seek,
+pause, rate or track change) re-anchors the cursor immediately, so clients
+only render what they receive instead of scanning the lyrics themselves.
+"""
+import time
+import threading
+from flask import request
+from flask_socketio import join_room, leave_room
+from ..lyrics import lyrics_manager, LyricTimeline
+from .events import socketio, on_disconnect
+from .clock import player_clock
+
+ROOM = 'lyrics'
+
+
+class LyricCursor:
+    """Follow the playhead through the lyric timeline of the playing track."""
+
+    # Upper bound of a sleep, so state changes missed by anchors are noticed
+    MAX_SLEEP = 0.25
+
+    def __init__(self, socketio):
+        self.socketio = socketio
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._task = None
+        self._track = None
+        self._lyrics = None
+        self._timeline = None
+        self._index = None
+        self._seq = 0
+
+    def subscribe(self, sid: str) -> dict:
+        """Add a client to the lyrics room and return the current cursor."""
+        join_room(ROOM, sid=sid)
+        anchor = player_clock.anchor
+        with self._lock:
+            self._subscribers.add(sid)
+            self._load(anchor.get('current_track'))
+            cursor = self._cursor(anchor, player_clock.predicted_position(), 'subscribe')
+            if self._task is None:
+                self._task = self.socketio.start_background_task(self._run)
+        return cursor
+
+    def unsubscribe(self, sid: str):
+        with self._lock:
+            self._subscribers.discard(sid)
+
+    def on_anchor(self, anchor: dict):
+        """Player clock listener: re-anchor on every state change."""
+        if not self._subscribers:
+            return
+        with self._lock:
+            self._load(anchor.get('current_track'))
+            cursor = self._cursor(anchor, player_clock.predicted_position(), anchor.get('reason', 'state'))
+        self.socketio.emit('lyric_cursor', cursor, to=ROOM)
+
+    def _load(self, track):
+        """Refresh the timeline if the track or its lyrics changed (lock held)."""
+        lyrics = lyrics_manager.get_lyrics_for_path(track) if track else None
+        if track != self._track or lyrics is not self._lyrics:
+            self._track = track
+            self._lyrics = lyrics
+            self._timeline = LyricTimeline.from_lyrics(lyrics)
+            self._index = None
+
+    def _cursor(self, anchor: dict, position: float, reason: str) -> dict:
+        """Build the event payload and remember the current line (lock held)."""
+        timeline = self._timeline
+        self._seq += 1
+        cursor = {
+            'seq': self._seq,
+            'reason': reason,
+            'track': self._track,
+            'synchronized': timeline is not None,
+            'position': position,
+            'rate': anchor.get('rate', 1.0),
+            'server_time': time.monotonic(),
+            'current': None,
+            'next': None,
+        }
+        if timeline is not None:
+            index = timeline.index_at(position)
+            self._index = index
+            cursor['current'] = timeline.line(index)
+            cursor['next'] = timeline.line(index + 1)
+        return cursor
+
+    def _tick(self) -> float:
+        """Emit a cursor if the playhead entered a new line; return the sleep time."""
+        anchor = player_clock.anchor
+        if not anchor['state'].endswith('Playing'):
+            return self.MAX_SLEEP
+        with self._lock:
+            if anchor.get('current_track') != self._track:
+                self._load(anchor.get('current_track'))
+            timeline = self._timeline
+            if timeline is None:
+                return self.MAX_SLEEP
+            position = player_clock.predicted_position()
+            index = timeline.index_at(position)
+            cursor = None
+            if index != self._index:
+                cursor = self._cursor(anchor, position, 'advance')
+            following = timeline.line(index + 1)
+        if cursor is not None:
+            self.socketio.emit('lyric_cursor', cursor, to=ROOM)
+        if following is None:
+            return self.MAX_SLEEP
+        rate = anchor.get('rate') or 1.0
+        return min(self.MAX_SLEEP, max(0.005, (following['time'] - position) / rate))
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._subscribers:
+                    self._task = None
+                    return
+            try:
+                delay = self._tick()
+            except Exception as e:
+                print(f"Error updating lyric cursor: {e}")
+                delay = self.MAX_SLEEP
+            self.socketio.sleep(delay)
+
+
+# Create a singleton instance for the application
+lyric_cursor = LyricCursor(socketio)
+player_clock.add_anchor_listener(lyric_cursor.on_anchor)
+on_disconnect(lyric_cursor.unsubscribe)
+
+
+@socketio.on('lyrics_subscribe')
+def handle_lyrics_subscribe(data=None):
+    """Receive lyric_cursor events for the playing track."""
+    return lyric_cursor.subscribe(request.sid)
+
+
+@socketio.on('lyrics_unsubscribe')
+def handle_lyrics_unsubscribe(data=None):
+    """Stop receiving lyric_cursor events."""
+    lyric_cursor.unsubscribe(request.sid)
+    leave_room(ROOM)
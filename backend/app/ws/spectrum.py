@@ -0,0 +1,308 @@
+"""
+Live Spectrum Stream
+This module streams compact FFT band frames of the playing track over
+Socket.IO for live visualizers.
+
+Frames are computed ahead of the playhead from the decoded file, in chunks of
+one second on a worker thread, at a base rate of 60 fps and 256 mel bands.
+The playing track stays open on one decoder that is read sequentially from
+chunk to chunk; it is only repositioned after a seek.
+Each subscriber picks its own frame rate and band count; bands are reduced by
+max-pooling.  The playhead is taken from the player clock anchor, so no
+libvlc call is made per frame.
+
+Backpressure: a frame is only sent to a client once it acknowledged the
+previous one; frames due in the meantime are dropped, never queued.
+
+Files no decoder can read faster than real time (compressed formats without
+soundfile or ffmpeg) get no frames; subscribers are told with a
+``spectrum_status`` event instead.
+"""
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from flask import request
+from config import settings
+from ..audio_io import open_audio, downmix, UnsupportedAudioError
+from ..spectrogram import mel_filterbank, quantize_db
+from .events import socketio, on_disconnect
+from .clock import player_clock
+
+BASE_FPS = 60
+BASE_BANDS = 256
+N_FFT = 2048
+CHUNK_SECONDS = 1
+ALLOWED_BANDS = (8, 16, 32, 64, 128, 256)
+# Seconds decoded per read from the open track
+READ_SECONDS = 0.25
+
+
+class TrackSamples:
+    """
+    Mono samples of one track read sequentially from a single open decoder.
+
+    Consecutive chunks overlap by up to one FFT window, which is kept in a
+    small buffer; reading anywhere else (after a seek) restarts the decoder
+    at that position.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.reader = open_audio(file_path)
+        self.sample_rate = self.reader.sample_rate
+        self._blocks = None
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._start = 0         # Sample index of _buffer[0]
+        self._eof = False
+
+    def _seek(self, start: int):
+        if self._blocks is not None:
+            self._blocks.close()
+        block_frames = max(1, int(self.sample_rate * READ_SECONDS))
+        self._blocks = self.reader.blocks(block_frames, start_frame=start)
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._start = start
+        self._eof = False
+
+    def read(self, start: int, length: int) -> np.ndarray:
+        """Samples ``[start, start + length)``, fewer at the end of the file."""
+        if self._blocks is None or not self._start <= start <= self._start + len(self._buffer):
+            self._seek(start)
+        parts = [self._buffer]
+        available = self._start + len(self._buffer)
+        while available < start + length and not self._eof:
+            block = next(self._blocks, None)
+            if block is None:
+                self._eof = True
+                break
+            mono = downmix(block)
+            parts.append(mono)
+            available += len(mono)
+        if len(parts) > 1:
+            self._buffer = np.concatenate(parts)
+        samples = self._buffer[start - self._start:start - self._start + length]
+        # Keep the window the next chunk shares with this one
+        drop = min(len(self._buffer), max(0, start + length - N_FFT - self._start))
+        self._buffer = self._buffer[drop:]
+        self._start += drop
+        return samples
+
+    def close(self):
+        if self._blocks is not None:
+            self._blocks.close()
+            self._blocks = None
+        self.reader.close()
+
+
+class SpectrumStreamer:
+    """Compute band frames ahead of the playhead and fan them out."""
+
+    # An unacknowledged frame no longer blocks a client after this long
+    ACK_TIMEOUT = 1.0
+
+    def __init__(self, socketio, lookahead: float = None):
+        self.socketio = socketio
+        self.lookahead = lookahead or settings.SPECTRUM_LOOKAHEAD_SECONDS
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='spectrum')
+        self._task = None
+        self._track = None
+        self._chunks = {}       # chunk index -> uint8 (frames, BASE_BANDS) or None
+        self._pending = {}      # chunk index -> Future
+        self._bank_cache = {}
+        self._source = None     # TrackSamples of the streamed track (worker thread only)
+        self._status = None     # {'track', 'available', 'error'} once the track was opened
+        self._stats = {'frames_sent': 0, 'frames_dropped': 0, 'chunks_computed': 0}
+
+    def subscribe(self, sid: str, fps: int = 30, bands: int = 64) -> dict:
+        """
+        Register (or update) a subscriber.
+
+        Raises:
+            ValueError: If fps or bands are out of range
+        """
+        fps = int(fps)
+        bands = int(bands)
+        if not 1 <= fps <= BASE_FPS:
+            raise ValueError(f"fps must be between 1 and {BASE_FPS}")
+        if bands not in ALLOWED_BANDS:
+            raise ValueError(f"bands must be one of {ALLOWED_BANDS}")
+        with self._lock:
+            self._subscribers[sid] = {
+                'fps': fps,
+                'bands': bands,
+                'next_due': 0.0,
+                'awaiting_ack': None,
+                'seq': 0,
+            }
+            if self._task is None:
+                self._task = self.socketio.start_background_task(self._run)
+        return {'fps': fps, 'bands': bands, 'base_fps': BASE_FPS, 'status': self._status}
+
+    def unsubscribe(self, sid: str):
+        with self._lock:
+            self._subscribers.pop(sid, None)
+
+    def get_stats(self) -> dict:
+        stats = dict(self._stats)
+        stats['subscribers'] = len(self._subscribers)
+        return stats
+
+    def _band_matrix(self, sample_rate: int) -> np.ndarray:
+        if sample_rate not in self._bank_cache:
+            self._bank_cache[sample_rate] = mel_filterbank(sample_rate, N_FFT, BASE_BANDS)
+        return self._bank_cache[sample_rate]
+
+    def _compute_chunk(self, file_path: str, chunk: int):
+        """Band frames for one chunk of a file, or None past the end."""
+        window = np.hanning(N_FFT).astype(np.float32)
+        scale = (2.0 / window.sum()) ** 2
+        source = self._source
+        if source is None or source.file_path != file_path:
+            if source is not None:
+                source.close()
+            source = self._source = TrackSamples(file_path)
+        sr = source.sample_rate
+        first = chunk * CHUNK_SECONDS * BASE_FPS
+        count = CHUNK_SECONDS * BASE_FPS
+        centers = ((first + np.arange(count)) * sr / BASE_FPS).astype(np.int64)
+        start = max(0, int(centers[0]) - N_FFT // 2)
+        length = int(centers[-1]) + N_FFT // 2 - start
+        samples = np.zeros(length, dtype=np.float32)
+        read = source.read(start, length)
+        offset = len(read)
+        samples[:offset] = read
+        # Frame count is only estimated for compressed files; trust the decoder
+        centers = centers[centers < start + offset]
+        if not len(centers):
+            return None
+        # Frames are centred on their timestamp; the file start is zero padded
+        padded = np.concatenate([np.zeros(N_FFT, dtype=np.float32), samples, np.zeros(N_FFT, dtype=np.float32)])
+        index = (centers - start - N_FFT // 2 + N_FFT)[:, None] + np.arange(N_FFT)
+        spectrum = np.fft.rfft(padded[index] * window, axis=1)
+        power = (spectrum.real ** 2 + spectrum.imag ** 2) * scale
+        bands = power @ self._band_matrix(sr).T
+        self._stats['chunks_computed'] += 1
+        return quantize_db(bands)
+
+    def _set_status(self, file_path: str, error: str = None):
+        """Record whether the track can be streamed and tell the subscribers."""
+        self._status = {'track': file_path, 'available': error is None, 'error': error}
+        with self._lock:
+            sids = list(self._subscribers)
+        for sid in sids:
+            self.socketio.emit('spectrum_status', self._status, to=sid)
+
+    def _prefetch(self, file_path: str, position: float):
+        """Schedule chunks covering [position, position + lookahead]."""
+        if file_path != self._track:
+            self._track = file_path
+            self._chunks = {}
+            self._pending = {}
+            self._status = None
+        if self._status is not None and not self._status['available']:
+            return
+        first = int(position // CHUNK_SECONDS)
+        last = int((position + self.lookahead) // CHUNK_SECONDS)
+        for chunk in range(first, last + 1):
+            future = self._pending.get(chunk)
+            if future is not None and future.done():
+                try:
+                    self._chunks[chunk] = future.result()
+                    if self._status is None:
+                        self._set_status(file_path)
+                except UnsupportedAudioError as e:
+                    # libvlc alone would decode at playback speed, always too late for frames
+                    self._pending = {}
+                    self._set_status(file_path, str(e))
+                    return
+                except Exception as e:
+                    print(f"Error computing spectrum chunk: {e}")
+                    self._chunks[chunk] = None
+                del self._pending[chunk]
+            elif chunk not in self._chunks and future is None:
+                self._pending[chunk] = self._executor.submit(self._compute_chunk, file_path, chunk)
+        # Forget chunks behind the playhead
+        for chunk in [c for c in self._chunks if c < first - 1]:
+            del self._chunks[chunk]
+
+    def _frame_at(self, position: float):
+        chunk = int(position // CHUNK_SECONDS)
+        frames = self._chunks.get(chunk)
+        if frames is None:
+            return None
+        index = int((position - chunk * CHUNK_SECONDS) * BASE_FPS)
+        return frames[index] if index < len(frames) else None
+
+    def _send(self, sid: str, sub: dict, frame: np.ndarray, position: float, now: float):
+        reduced = frame.reshape(sub['bands'], -1).max(axis=1)
+        sub['seq'] += 1
+        sub['awaiting_ack'] = now
+
+        def _acked(*args):
+            sub['awaiting_ack'] = None
+
+        self.socketio.emit(
+            'spectrum_frame',
+            {'seq': sub['seq'], 'position': round(position, 4), 'bands': reduced.tobytes()},
+            to=sid,
+            callback=_acked,
+        )
+        self._stats['frames_sent'] += 1
+
+    def _run(self):
+        while True:
+            with self._lock:
+                subscribers = list(self._subscribers.items())
+            if not subscribers:
+                with self._lock:
+                    if not self._subscribers:
+                        self._task = None
+                        return
+                continue
+
+            anchor = player_clock.anchor
+            max_fps = max(sub['fps'] for _, sub in subscribers)
+            track = anchor.get('current_track')
+            if not track or not anchor['state'].endswith('Playing'):
+                self.socketio.sleep(0.1)
+                continue
+
+            now = time.monotonic()
+            position = player_clock.predicted_position(now)
+            self._prefetch(track, position)
+            frame = self._frame_at(position)
+            if frame is not None:
+                for sid, sub in subscribers:
+                    if now < sub['next_due']:
+                        continue
+                    sub['next_due'] = now + 1.0 / sub['fps']
+                    waiting = sub['awaiting_ack']
+                    if waiting is not None and now - waiting < self.ACK_TIMEOUT:
+                        self._stats['frames_dropped'] += 1
+                        continue
+                    self._send(sid, sub, frame, position, now)
+            self.socketio.sleep(1.0 / max_fps)
+
+
+# Create a singleton instance for the application
+spectrum_streamer = SpectrumStreamer(socketio)
+on_disconnect(spectrum_streamer.unsubscribe)
+
+
+@socketio.on('spectrum_subscribe')
+def handle_spectrum_subscribe(data=None):
+    """Subscribe to live spectrum frames: {fps, bands}."""
+    data = data if isinstance(data, dict) else {}
+    try:
+        return spectrum_streamer.subscribe(request.sid, data.get('fps', 30), data.get('bands', 64))
+    except (TypeError, ValueError) as e:
+        return {'error': str(e)}
+
+
+@socketio.on('spectrum_unsubscribe')
+def handle_spectrum_unsubscribe(data=None):
+    """Stop receiving live spectrum frames."""
+    spectrum_streamer.unsubscribe(request.sid)
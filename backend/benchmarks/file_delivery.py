@@ -0,0 +1,73 @@
+"""
+File delivery benchmark.
+
+Serves an audio file from Werkzeug's threading server (what
+``socketio.run`` uses without eventlet or gevent) and measures the server's CPU time per download: with the kernel
+copying the file to the socket (``FILE_DELIVERY = 'auto'``) and with the
+file read through Python in blocks (``'python'``, as ``send_file`` did).
+Downloads run in a separate client process, so only the server is measured.
+
+Usage:
+    python benchmarks/file_delivery.py [--size-mb 64] [--downloads 5] [--repeat 3]
+
+A temporary SQLite database and a file of random bytes are created.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+backend_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if backend_path not in sys.path:
+    sys.path.insert(0, backend_path)
+
+# The database must be chosen before the application modules are imported
+_tmpdir = tempfile.mkdtemp(prefix='acoustic-bench-')
+os.environ['DATABASE_URI'] = f"sqlite:///{os.path.join(_tmpdir, 'bench.db')}"
+
+from werkzeug.serving import make_server
+from config import settings
+from main import create_app
+from app.models.database import Track, db_session
+
+CLIENT = "import sys, urllib.request\nfor url in sys.argv[1:]:\n    urllib.request.urlopen(url).read()"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size-mb', type=int, default=64, help='Size of the served file')
+    parser.add_argument('--downloads', type=int, default=5, help='Downloads per run')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per mode, the best is reported')
+    args = parser.parse_args()
+
+    path = os.path.join(_tmpdir, 'track.wav')
+    with open(path, 'wb') as f:
+        f.write(os.urandom(args.size_mb * 1024 * 1024))
+    app = create_app()
+    track = Track(path=path, title='Benchmark', artist='Benchmark', album='Benchmark')
+    db_session.add(track)
+    db_session.commit()
+
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/api/library/tracks/{track.id}/audio"
+
+    print(f"{args.downloads} downloads of {args.size_mb} MB")
+    for mode in ('python', 'auto'):
+        settings.FILE_DELIVERY = mode
+        best_cpu, best_wall = float('inf'), float('inf')
+        for _ in range(args.repeat):
+            cpu, wall = time.process_time(), time.perf_counter()
+            subprocess.run([sys.executable, '-c', CLIENT] + [url] * args.downloads, check=True)
+            best_cpu = min(best_cpu, time.process_time() - cpu)
+            best_wall = min(best_wall, time.perf_counter() - wall)
+        print(f"  {mode:<8} server CPU {best_cpu * 1000 / args.downloads:7.1f} ms/download  "
+              f"wall {best_wall * 1000 / args.downloads:7.1f} ms/download")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""
+LRC parser benchmark.
+
+Compares the regex based parser (app/lrc.py) with the previous
+character-by-character implementation on a corpus of LRC files.
+
+Usage:
+    python benchmarks/lrc_parser.py [LRC_DIR] [--files N] [--lines N] [--repeat N]
+
+Without LRC_DIR a synthetic corpus of large files is generated (multi-timestamp
+lines, enhanced word tags, metadata, CRLF line endings and BOMs).
+"""
+import argparse
+import glob
+import os
+import random
+import sys
+import time
+
+backend_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if backend_path not in sys.path:
+    sys.path.insert(0, backend_path)
+
+from app.lrc import parse_lrc
+
+
+def legacy_parse_lrc(lrc_content):
+    """The parser this benchmark measures against (LyricsManager.parse_lrc before the rewrite)."""
+    if not lrc_content:
+        return {'metadata': {}, 'lines': []}
+    lines = lrc_content.strip().split('\n')
+    result = {'metadata': {}, 'lines': []}
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith('[') and ':' in line and ']' in line:
+            tag_end = line.find(']')
+            tag = line[1:line.find(':')]
+            value = line[line.find(':') + 1:tag_end]
+            if tag not in ['00', '01', '02'] and not tag.replace('.', '').isdigit():
+                result['metadata'][tag] = value
+                continue
+        time_tags = []
+        remaining_line = line
+        while remaining_line.startswith('[') and ']' in remaining_line:
+            tag_end = remaining_line.find(']')
+            potential_time = remaining_line[1:tag_end]
+            if ':' in potential_time and potential_time.replace(':', '').replace('.', '').isdigit():
+                try:
+                    minutes, seconds = potential_time.split(':')
+                    total_seconds = int(minutes) * 60 + float(seconds)
+                    time_tags.append(total_seconds * 1000)
+                    remaining_line = remaining_line[tag_end + 1:]
+                except ValueError:
+                    break
+            else:
+                break
+        if time_tags and remaining_line:
+            for time_ms in time_tags:
+                result['lines'].append({'time': time_ms, 'text': remaining_line.strip()})
+    result['lines'].sort(key=lambda x: x['time'])
+    return result
+
+
+WORDS = ('love', 'night', 'light', 'heart', 'fire', 'dream', 'rain', 'road', 'home', 'time',
+         'never', 'always', 'falling', 'running', 'tonight', 'forever', 'ocean', 'sky')
+
+
+def _tag(ms):
+    return f"[{ms // 60000:02d}:{ms // 1000 % 60:02d}.{ms % 1000 // 10:02d}]"
+
+
+def synthetic_lrc(lines, rng):
+    """One large LRC document with the features found in the wild."""
+    out = ['\ufeff[ti:Benchmark]', '[ar:Nobody]', '[al:Corpus]', '[by:generator]', '[offset:+120]']
+    ms = 0
+    for _ in range(lines):
+        ms += rng.randint(800, 4000)
+        words = rng.sample(WORDS, rng.randint(3, 8))
+        if rng.random() < 0.3:
+            # Enhanced LRC word timing
+            text = ' '.join(f"<{_tag(ms + i * 300)[1:-1]}>{word}" for i, word in enumerate(words))
+        else:
+            text = ' '.join(words)
+        tags = _tag(ms)
+        if rng.random() < 0.15:
+            # Chorus repeated later with a second time tag
+            tags += _tag(ms + rng.randint(60000, 120000))
+        out.append(tags + text)
+    return '\r\n'.join(out)
+
+
+def load_corpus(directory, files, lines, seed=7):
+    if directory:
+        corpus = []
+        for path in sorted(glob.glob(os.path.join(directory, '**', '*.lrc'), recursive=True)):
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                corpus.append(f.read())
+        return corpus
+    rng = random.Random(seed)
+    return [synthetic_lrc(lines, rng) for _ in range(files)]
+
+
+def bench(parser, corpus, repeat):
+    """Best wall time of parsing the whole corpus."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for content in corpus:
+            parser(content)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('lrc_dir', nargs='?', help='Directory with .lrc files (default: synthetic corpus)')
+    parser.add_argument('--files', type=int, default=200, help='Synthetic files')
+    parser.add_argument('--lines', type=int, default=2000, help='Lines per synthetic file')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per parser, the best is reported')
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.lrc_dir, args.files, args.lines)
+    if not corpus:
+        sys.exit(f"No .lrc files found in {args.lrc_dir}")
+    megabytes = sum(len(content.encode('utf-8')) for content in corpus) / 1e6
+    total_lines = sum(content.count('\n') + 1 for content in corpus)
+    print(f"Corpus: {len(corpus)} files, {total_lines} lines, {megabytes:.1f} MB")
+
+    results = {}
+    for name, function in (('legacy', legacy_parse_lrc), ('regex', parse_lrc)):
+        seconds = bench(function, corpus, args.repeat)
+        results[name] = seconds
+        print(f"{name:>8}: {seconds * 1000:8.1f} ms  {megabytes / seconds:7.1f} MB/s  "
+              f"{total_lines / seconds / 1e6:6.2f} M lines/s")
+    print(f" speedup: {results['legacy'] / results['regex']:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
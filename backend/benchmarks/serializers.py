@@ -0,0 +1,115 @@
+"""
+Track serialization benchmark.
+
+Measures serializing the whole library, query included, in the way the API
+did before the row serializer (Track objects, ``track_schema`` and the
+standard library JSON encoder as used by ``jsonify``) and with the current
+path (column tuples, ``track_row_schema`` and the negotiated wire encoder).
+
+Usage:
+    python benchmarks/serializers.py [--tracks 10000 100000] [--thumbnails 0.3] [--repeat 3]
+
+A temporary SQLite database with synthetic tracks is created for every size.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+backend_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if backend_path not in sys.path:
+    sys.path.insert(0, backend_path)
+
+# The database must be chosen before the application modules are imported
+_tmpdir = tempfile.mkdtemp(prefix='acoustic-bench-')
+os.environ['DATABASE_URI'] = f"sqlite:///{os.path.join(_tmpdir, 'bench.db')}"
+
+from app.models.database import Base, Track, engine, db_session
+from app.api.serializers import track_schema, track_row_schema, TRACK_ROW_COLUMNS
+from app.api.streaming import iter_encoded
+from app.api.encoders import WIRE_FORMATS, orjson
+
+
+def populate(count, thumbnails, seed=3):
+    """Replace the tracks table with ``count`` synthetic tracks."""
+    rng = random.Random(seed)
+    thumbnail = bytes(rng.getrandbits(8) for _ in range(6000))
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    rows = []
+    for i in range(count):
+        rows.append({
+            'path': f"/music/Artist {i % 700}/Album {i % 7000}/{i:06d} Track.flac",
+            'title': f"Track {i} {rng.choice(('Love', 'Night', 'Fire', 'Rain', 'Road'))}",
+            'artist': f"Artist {i % 700}",
+            'album': f"Album {i % 7000}",
+            'duration': rng.uniform(90, 420),
+            'track_num': i % 14 + 1,
+            'genre': rng.choice(('Rock', 'Jazz', 'Pop', 'Electronic')),
+            'year': rng.randint(1960, 2024),
+            'album_art_path': f"/art/{i % 7000:040x}.jpg",
+            'album_art_thumbnail': thumbnail if rng.random() < thumbnails else None,
+        })
+        if len(rows) == 10000:
+            with engine.begin() as connection:
+                connection.execute(Track.__table__.insert(), rows)
+            rows = []
+    if rows:
+        with engine.begin() as connection:
+            connection.execute(Track.__table__.insert(), rows)
+
+
+def before():
+    """Track objects, track_schema, stdlib JSON with Flask's defaults."""
+    tracks = db_session.query(Track).all()
+    data = json.dumps([track_schema(track) for track in tracks], separators=(',', ':'), sort_keys=True)
+    return data.encode('utf-8')
+
+
+def after(fmt):
+    """Column tuples, track_row_schema, streamed encoder."""
+    rows = iter(db_session.query(*TRACK_ROW_COLUMNS).yield_per(500))
+    return b''.join(iter_encoded(rows, track_row_schema, fmt))
+
+
+def bench(function, repeat):
+    """Best wall time and output size."""
+    best, size = float('inf'), 0
+    for _ in range(repeat):
+        db_session.remove()
+        start = time.perf_counter()
+        size = len(function())
+        best = min(best, time.perf_counter() - start)
+    return best, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tracks', type=int, nargs='+', default=[10000, 100000], help='Library sizes')
+    parser.add_argument('--thumbnails', type=float, default=0.3, help='Share of tracks with a thumbnail')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per case, the best is reported')
+    args = parser.parse_args()
+
+    print(f"JSON encoder: {'orjson' if orjson is not None else 'json (stdlib)'}")
+    for count in args.tracks:
+        populate(count, args.thumbnails)
+        print(f"\n{count} tracks")
+        cases = [('before (ORM + track_schema + json)', before)]
+        for fmt in WIRE_FORMATS:
+            if fmt.available():
+                cases.append((f"after ({fmt.name})", lambda fmt=fmt: after(fmt)))
+            else:
+                print(f"  {fmt.name}: not installed, skipped")
+        baseline = None
+        for name, function in cases:
+            seconds, size = bench(function, args.repeat)
+            baseline = baseline or seconds
+            print(f"  {name:<36} {seconds * 1000:8.1f} ms  {count / seconds / 1000:7.1f} k tracks/s  "
+                  f"{size / 1e6:6.1f} MB  {baseline / seconds:5.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -17,6 +17,37 @@ DATABASE_URI = f"sqlite:///{os.path.join(BASE_DIR, 'acoustic_player.db')}"
 DEFAULT_LIBRARY_PATH = os.path.join(os.path.expanduser("~"), "Music")
 ALLOWED_EXTENSIONS = {'mp3', 'wav', 'ogg', 'flac', 'aac', 'm4a'}
 CORS_ORIGINS = ["*"]  # Allow all origins in development
+GAPLESS_PLAYBACK = True  # Preload the next queued track on a standby player
+CROSSFADE_SECONDS = 0.0  # 0 disables crossfading, up to 12 seconds
+CROSSFADE_CURVE = 'equal_power'  # 'linear' or 'equal_power'
+CROSSFADE_TICK_MS = 20  # Volume ramp resolution
+LOUDNESS_NORMALIZATION = 'track'  # 'off', 'track' or 'album'
+LOUDNESS_TARGET_LUFS = -18.0  # ReplayGain 2.0 reference level
+LOUDNESS_WORKERS = 0  # Analysis processes, 0 uses one per CPU
+PLAYER_CLOCK_DRIFT_SECONDS = 5.0  # Interval of the clock drift check
+PLAYER_CLOCK_DRIFT_TOLERANCE = 0.25  # Seconds of drift before re-anchoring
+ARTIFACT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".acoustic_player", "artifacts")  # Next to album_art
+ARTIFACT_CACHE_MAX_MB = 1024  # Disk budget of cached peaks, spectrograms and images
+SPRITE_CELL_SIZE = 150  # Thumbnail cell size of sprite sheets, the thumbnail size
+SPRITE_COLUMNS = 10  # Cells per sprite sheet row
+SPRITE_MAX_TILES = 200  # Track IDs accepted per sprite sheet request
+SPRITE_JPEG_QUALITY = 85  # JPEG quality of sprite sheet atlases
+FILE_DELIVERY = 'auto'  # 'auto' (os.sendfile; threading server only, not eventlet/gevent), 'python', or 'x-sendfile'/'x-accel-redirect' behind Apache/nginx
+X_ACCEL_REDIRECT_PREFIX = '/protected-files'  # nginx internal location aliasing the filesystem root
+FILE_DELIVERY_BLOCK_SIZE = 256 * 1024  # Read size when files are sent through Python
+SPECTRUM_LOOKAHEAD_SECONDS = 2.0  # Live spectrum frames computed ahead of the playhead
+LYRICS_CACHE_SIZE = 512  # Tracks whose parsed lyrics are kept in memory
+CHANGE_LOG_RETENTION = 200000  # Change log entries kept for delta sync; older clients reload everything
+CHANGE_FEED_PAGE_SIZE = 1000  # Change log entries returned per /api/changes request
+CHANGE_FEED_INLINE_MAX = 100  # Changes carried by library_update; larger deltas are fetched from /api/changes
+STREAM_BATCH_ROWS = 500  # Rows fetched and serialized at a time by streamed listings
+COMPRESSION_ENABLED = True  # Compress JSON/NDJSON/MessagePack/CBOR responses the client accepts encoded
+COMPRESSION_MIN_BYTES = 1024  # Smaller bodies are sent uncompressed
+COMPRESSION_GZIP_LEVEL = 5  # 1 (fastest) to 9 (smallest)
+COMPRESSION_BROTLI_QUALITY = 4  # 0 (fastest) to 11 (smallest), needs the brotli package
+COMPRESSION_ZSTD_LEVEL = 3  # 1 (fastest) to 22 (smallest), needs the zstandard package
+WS_COALESCE_WINDOW_MS = 50  # Status, library and playlist events within this window are emitted once
+WS_DEFAULT_TOPICS = ['player', 'library', 'playlists', 'scan-jobs']  # Rooms joined by clients connecting without topics
 
 # Load configuration from default_config.json if exists
 CONFIG_FILE = os.path.join(os.path.dirname(__file__), 'default_config.json')
@@ -5,13 +5,20 @@ This module serves as the entry point for the Flask API server.
 from flask import Flask, jsonify
 from flask_cors import CORS
 from config import settings
-from app.api import player_api, library_api, playlist_api, lyrics_api
-from app.ws import socketio
-from app.models.database import init_db, close_db_session
 
 def create_app():
     """Create and configure the Flask application."""
+    # Imported here, not at module level: analysis worker processes (spawned)
+    # re-import this module and must not build the player, the database
+    # session and the other singletons of the application layers
+    from app.api import player_api, library_api, playlist_api, lyrics_api, visualizer_api, changes_api
+    from app.ws import socketio
+    from app.api.encoders import FastJSONProvider
+    from app.api.compression import compress_response
+    from app.models.database import init_db, close_db_session
+
     app = Flask(__name__)
+    app.json = FastJSONProvider(app)
     
     # Load configuration
     app.config.from_object('config.settings')
@@ -27,6 +34,11 @@ def create_app():
     app.register_blueprint(library_api, url_prefix='/api/library')
     app.register_blueprint(playlist_api, url_prefix='/api/playlists')
     app.register_blueprint(lyrics_api, url_prefix='/api/lyrics')
+    app.register_blueprint(visualizer_api, url_prefix='/api/visualizer')
+    app.register_blueprint(changes_api, url_prefix='/api/changes')
+    
+    # Compress responses the client accepts encoded
+    app.after_request(compress_response)
     
     # Register teardown function to close database session
     @app.teardown_appcontext
@@ -49,6 +61,7 @@ def create_app():
 
 if __name__ == '__main__':
     app = create_app()
+    socketio = app.extensions['socketio']
 
     # Run the app with Socket.IO using configured host and port
     socketio.run(